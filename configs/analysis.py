@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+analysis.py
+
+Vectorized post-processing of whole sweeps. All runs of a sweep are loaded
+from the columnar stats store (stats_store.py; built on first use) into
+NumPy arrays, one row per run (its final dump), and the derived metrics
+are computed column-wise across all runs at once:
+
+  ipc, cpi         core throughput
+  mpki             branch mispredictions per 1000 instructions
+  l1d_mpki, l2_mpki
+  mem_bound        fraction of simulated time with an L1D demand miss
+                   outstanding (MSHR miss latency / simTicks, capped at 1;
+                   an upper bound, as overlapping misses are all counted)
+  speedup          simulated time of the width=1 run with otherwise equal
+                   parameters / this run's
+  area             core area proxy: width x ROB entries
+  retiring, bad_spec, frontend, backend_mem, backend_core
+                   top-down CPI stack fractions (topdown.py)
+
+Parameters missing from a point take the config script's argparse defaults.
+
+Run with the host python, e.g.:
+  python3 experiments/configs/analysis.py summary out/width_sweep --csv=out/width_sweep/summary.csv
+  python3 experiments/configs/analysis.py pareto out/width_sweep
+  python3 experiments/configs/analysis.py plot out/width_sweep --x=width --y=speedup --out=out/plots
+
+"plot" needs matplotlib; without it the plotted series are written as CSV.
+From Python: runs = analysis.load("out/width_sweep"); runs.metrics()["ipc"].
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+import sweep
+from result_cache import script_defaults
+from stats_store import StatsStore, build_from_sweep
+from topdown import CATEGORIES, coalesce, topdown
+
+STORE_NAME = "stats.npz"
+
+INST_STATS = ("system.cpu.commitStats0.numInsts", "system.cpu.committedInsts", "simInsts")
+CYCLE_STATS = ("system.cpu.numCycles",)
+MISPREDICT_STATS = ("system.cpu.branchPred.condIncorrect", "system.cpu.commit.branchMispredicts")
+L1D_MISS_STATS = ("system.cpu.dcache.demandMisses::total", "system.ff_cpu.dcache.demandMisses::total")
+L2_MISS_STATS = ("system.l2.demandMisses::total",)
+MEM_LATENCY_STATS = ("system.cpu.dcache.demandMshrMissLatency::total",
+                     "system.ff_cpu.dcache.demandMshrMissLatency::total")
+
+# Metrics printed by "summary", in order
+SUMMARY_METRICS = ("ipc", "cpi", "mpki", "l1d_mpki", "l2_mpki", "mem_bound", "speedup", "area") + CATEGORIES
+
+
+def param_dest(key):
+    # Sweep grid key -> argparse dest of the config script ("rob" -> "rob_entries")
+    flag = sweep.PARAM_FLAGS.get(key)
+    return flag.lstrip("-").replace("-", "_") if flag else key
+
+
+def load(path, script=None, cache_dir=None):
+    # path: a sweep directory (store built or rebuilt when older than sweep.json) or a store
+    if os.path.isdir(path):
+        sweep_json = os.path.join(path, "sweep.json")
+        store_path = os.path.join(path, STORE_NAME)
+        if not os.path.exists(store_path) or os.path.getmtime(store_path) < os.path.getmtime(sweep_json):
+            build_from_sweep(path, store_path, cache_dir)
+        if script is None:
+            with open(sweep_json) as f:
+                script = json.load(f).get("script")
+    else:
+        store_path = path
+    defaults = {}
+    script = script or sweep.DEFAULT_SCRIPT
+    if os.path.exists(script):
+        defaults = script_defaults(script)
+    return Runs(StatsStore(store_path), defaults)
+
+
+class Runs:
+    # One row per run (its final dump); stats and parameters as NumPy columns
+    def __init__(self, store, defaults=None):
+        self.store = store
+        self._rows = store.last_dump_mask()
+        self.points = store.points[self._rows]
+        self._cache = {}
+        self._names = set(store.names)
+        self.defaults = defaults = defaults or {}
+        meta = store.meta
+        keys = sorted({k for m in meta.values() for k in m} - {"exit_cause"})
+        self.params = {}
+        for key in keys:
+            default = defaults.get(param_dest(key))
+            values = [meta.get(p, {}).get(key, default) for p in self.points]
+            self.params[key] = np.array(["" if v is None else str(v) for v in values])
+
+    def __len__(self):
+        return len(self.points)
+
+    def stat(self, *names):
+        # Per run the first of the names it has (they vary across gem5 versions); NaN if none
+        if names not in self._cache:
+            present = [self.store.column(n)[self._rows] for n in names if n in self._names]
+            self._cache[names] = coalesce(present, len(self))
+        return self._cache[names]
+
+    def numeric(self, key):
+        # A parameter as floats (NaN where empty or not a number); the script
+        # default when no point sets it
+        values = self.params.get(key)
+        if values is None:
+            values = np.array([str(self.defaults.get(param_dest(key)))] * len(self))
+        out = np.full(len(self), np.nan)
+        for text in np.unique(values):
+            try:
+                out[values == text] = float(text)
+            except ValueError:
+                pass
+        return out
+
+    def groups(self, exclude):
+        # Group index of every run over all parameters except `exclude`
+        keys = [k for k in self.params if k not in exclude]
+        if not keys:
+            return np.zeros(len(self), dtype=np.int64)
+        joined = self.params[keys[0]].astype(object)
+        for key in keys[1:]:
+            joined = joined + "\x1f" + self.params[key].astype(object)
+        return np.unique(joined.astype(str), return_inverse=True)[1].reshape(-1)
+
+    def metrics(self):
+        insts = self.stat(*INST_STATS)
+        cycles = self.stat(*CYCLE_STATS)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ipc = self.stat("system.cpu.ipc")
+            ipc = np.where(np.isnan(ipc), insts / cycles, ipc)
+            pki = 1000.0 / insts
+            metrics = {
+                "ipc": ipc,
+                "cpi": 1.0 / ipc,
+                "mpki": self.stat(*MISPREDICT_STATS) * pki,
+                "l1d_mpki": self.stat(*L1D_MISS_STATS) * pki,
+                "l2_mpki": self.stat(*L2_MISS_STATS) * pki,
+                "mem_bound": np.minimum(1.0, self.stat(*MEM_LATENCY_STATS) / self.stat("simTicks")),
+                "speedup": self.speedup("width", "1"),
+                "area": self.numeric("width") * self.numeric("rob"),
+            }
+        stack = topdown(self.stat, self.numeric("width"))
+        metrics.update({category: stack[category] for category in CATEGORIES})
+        return metrics
+
+    def speedup(self, key, base_value):
+        # Simulated-time speedup over the run with key=base_value and otherwise equal parameters
+        seconds = self.stat("simSeconds", "sim_seconds")
+        if key not in self.params:
+            return np.full(len(self), np.nan)
+        group = self.groups({key})
+        base = np.full(group.max() + 1 if len(group) else 0, np.nan)
+        is_base = self.params[key] == base_value
+        base[group[is_base]] = seconds[is_base]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return base[group] / seconds
+
+    def to_dataframe(self):
+        # Parameters and metrics as a pandas DataFrame (pandas is optional)
+        import pandas as pd
+        return pd.DataFrame(dict(point=self.points, **self.params, **self.metrics()))
+
+
+def pareto_front(cost, value, group=None):
+    # Mask of runs no other run of their group beats with lower-or-equal cost and
+    # higher value; runs with NaN cost or value are never on the front
+    n = len(cost)
+    group = np.zeros(n, dtype=np.int64) if group is None else np.asarray(group)
+    valid = ~(np.isnan(cost) | np.isnan(value))
+    idx = np.flatnonzero(valid)
+    order = idx[np.lexsort((-value[idx], cost[idx], group[idx]))]
+    g, v = group[order], value[order]
+    # segmented running maximum: shift every group above the previous one's values
+    span = (np.nanmax(v) - np.nanmin(v) + 1.0) if len(v) else 1.0
+    shifted = v + g * span
+    best = np.maximum.accumulate(shifted)
+    prev = np.empty_like(best)
+    prev[:1] = -np.inf
+    prev[1:] = best[:-1]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = g[1:] != g[:-1]
+    on_front = first | (shifted > prev)
+    mask = np.zeros(n, dtype=bool)
+    mask[order[on_front]] = True
+    return mask
+
+
+def rows_for(runs, metrics, names, index=None):
+    # One dict per run (or per run in index)
+    keys = list(runs.params)
+    for i in range(len(runs)) if index is None else index:
+        row = {"point": runs.points[i]}
+        row.update({k: runs.params[k][i] for k in keys})
+        row.update({name: metrics[name][i] for name in names})
+        yield row
+
+
+def fmt(value):
+    if isinstance(value, float) or isinstance(value, np.floating):
+        return "-" if math.isnan(value) else f"{value:.4g}"
+    return str(value)
+
+
+def print_rows(rows, columns, out=sys.stdout):
+    out.write("\t".join(columns) + "\n")
+    for row in rows:
+        out.write("\t".join(fmt(row[c]) for c in columns) + "\n")
+
+
+def write_csv(path, rows, columns):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def plot_scaling(runs, metrics, x, y, outdir):
+    # One line per parameter combination other than x, one figure per benchmark
+    os.makedirs(outdir, exist_ok=True)
+    xs = runs.numeric(x)
+    group = runs.groups({x})
+    benches = runs.params.get("bench", np.array([""] * len(runs)))
+    series = []
+    for g in np.unique(group):
+        sel = np.flatnonzero((group == g) & ~np.isnan(xs))
+        sel = sel[np.argsort(xs[sel])]
+        if len(sel):
+            label = ",".join(f"{k}={runs.params[k][sel[0]]}" for k in runs.params if k not in (x, "bench"))
+            series.append((os.path.basename(benches[sel[0]]), label or y, xs[sel], metrics[y][sel]))
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        path = os.path.join(outdir, f"{y}_vs_{x}.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["bench", "series", x, y])
+            for bench, label, sx, sy in series:
+                writer.writerows([bench, label, a, b] for a, b in zip(sx, sy))
+        print(f"Warning: matplotlib not installed; wrote the series to {path}", file=sys.stderr)
+        return [path]
+    paths = []
+    for bench in sorted({s[0] for s in series}):
+        fig, ax = plt.subplots(figsize=(6, 4))
+        for _, label, sx, sy in (s for s in series if s[0] == bench):
+            ax.plot(sx, sy, marker="o", label=label)
+        ax.set_xlabel(x)
+        ax.set_ylabel(y)
+        ax.set_title(bench)
+        ax.grid(True, alpha=0.3)
+        if len(ax.lines) > 1:
+            ax.legend(fontsize="small")
+        path = os.path.join(outdir, f"{bench}-{y}_vs_{x}.png")
+        fig.savefig(path, dpi=120, bbox_inches="tight")
+        plt.close(fig)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized sweep analytics")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, text in (("summary", "Derived metrics of every run"),
+                       ("pareto", "IPC vs area-proxy Pareto front per benchmark"),
+                       ("plot", "Scaling plots of a metric over a parameter")):
+        cmd = sub.add_parser(name, help=text)
+        cmd.add_argument("path", help="Sweep directory (with sweep.json) or stats store .npz")
+        cmd.add_argument("--script", type=str, default=None,
+                         help="Config script whose defaults fill missing parameters (default: from sweep.json)")
+        cmd.add_argument("--cache-dir", type=str, default=None, help="Result cache for cached points")
+        if name != "plot":
+            cmd.add_argument("--csv", type=str, default=None, help="Also write the table as CSV")
+    plot = sub.choices["plot"]
+    plot.add_argument("--x", type=str, default="width", help="Parameter on the x axis")
+    plot.add_argument("--y", type=str, default="speedup", choices=SUMMARY_METRICS, help="Metric")
+    plot.add_argument("--out", type=str, default="plots", help="Output directory")
+    args = parser.parse_args()
+
+    start = time.time()
+    runs = load(args.path, args.script, args.cache_dir)
+    metrics = runs.metrics()
+    columns = ["point"] + list(runs.params)
+
+    if args.command == "summary":
+        rows = list(rows_for(runs, metrics, SUMMARY_METRICS))
+        columns += list(SUMMARY_METRICS)
+    elif args.command == "pareto":
+        benches = runs.params.get("bench", np.array([""] * len(runs)))
+        group = np.unique(benches, return_inverse=True)[1].reshape(-1)
+        front = pareto_front(metrics["area"], metrics["ipc"], group)
+        rows = sorted(rows_for(runs, metrics, ("area", "ipc"), np.flatnonzero(front)),
+                      key=lambda r: (r.get("bench", ""), r["area"]))
+        columns += ["area", "ipc"]
+        print(f"{front.sum()} of {len(runs)} runs on the IPC / (width x ROB) Pareto front")
+    else:
+        for path in plot_scaling(runs, metrics, args.x, args.y, args.out):
+            print("Wrote", path)
+        print(f"({len(runs)} runs in {time.time() - start:.2f}s)", file=sys.stderr)
+        return
+
+    print_rows(rows, columns)
+    if args.csv:
+        write_csv(args.csv, rows, columns)
+    print(f"({len(runs)} runs in {time.time() - start:.2f}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
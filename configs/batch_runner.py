@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+batch_runner.py
+
+Runs many configurations of a config script inside one gem5 invocation.
+
+gem5 start-up (interpreter boot, SimObject import) and the CPU-independent
+part of each system (clock, bus, memory; see system_builder.build_base) are
+paid once in this parent process. Every configuration then runs in a forked
+child that only adds the CPU and workload, instantiates and simulates, with
+gem5's output directory (stats.txt, config.ini, simout/simerr) moved to the
+point's own outdir.
+
+Usage example:
+  build/X86/gem5.opt --outdir=out/batch experiments/configs/batch_runner.py \
+    --points=out/batch/points.json --jobs=8
+
+points.json is a list of
+  {"name": "...", "outdir": "...", "argv": ["--bench=vector", "--width=4"]}
+where argv are the config script's own arguments. The script (default
+se_superscalar_v25.py) must provide parse_args(argv), config_from_args(args)
+and run(args, base=None). Each child writes result.json to its outdir.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+import traceback
+
+import m5
+import m5.objects  # import every SimObject once, before forking
+
+from system_builder import base_key, build_base
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_script(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def redirect_output(outdir):
+    # As m5.fork() does: move gem5's output directory; open files (stats.txt) follow
+    os.makedirs(outdir, exist_ok=True)
+    m5.options.outdir = outdir
+    m5.core.setOutputDir(outdir)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for fd, name in ((1, "simout"), (2, "simerr")):
+        out = os.open(os.path.join(outdir, name), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.dup2(out, fd)
+        os.close(out)
+
+
+def run_child(script, args, point, base):
+    redirect_output(point["outdir"])
+    start = time.time()
+    status = 0
+    try:
+        script.run(args, base)
+    except SystemExit as e:
+        status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    except Exception:
+        traceback.print_exc()
+        status = 1
+    with open(os.path.join(point["outdir"], "result.json"), "w") as f:
+        json.dump({"returncode": status, "host_seconds": time.time() - start,
+                   "tick": m5.curTick()}, f)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(status)
+
+
+def exit_status(status):
+    if os.WIFEXITED(status):
+        return os.WEXITSTATUS(status)
+    return -os.WTERMSIG(status)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run many configurations in one gem5 process")
+    parser.add_argument("--script", type=str, default=os.path.join(HERE, "se_superscalar_v25.py"),
+                        help="Config script providing parse_args/config_from_args/run")
+    parser.add_argument("--points", type=str, required=True, help="JSON list of points")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Concurrent child simulations")
+    args = parser.parse_args()
+
+    script = load_script(args.script)
+    with open(args.points) as f:
+        points = json.load(f)
+
+    bases = {}
+    running = {}
+    returncodes = {}
+    start = time.time()
+
+    def reap():
+        pid, status = os.wait()
+        point = running.pop(pid)
+        returncodes[point["name"]] = exit_status(status)
+        print(f"[{len(returncodes)}/{len(points)}] {point['name']}: rc={returncodes[point['name']]}")
+
+    for point in points:
+        try:
+            point_args = script.parse_args(point["argv"])
+        except SystemExit:
+            returncodes[point["name"]] = 2
+            print(f"Invalid arguments for {point['name']}: {point['argv']}", file=sys.stderr)
+            continue
+        # One CPU-independent base per distinct clock/memory, built here once
+        # and inherited copy-on-write by every child that needs it
+        key = base_key(script.config_from_args(point_args))
+        if key not in bases:
+            try:
+                bases[key] = build_base(script.config_from_args(point_args))
+            except ValueError as e:
+                returncodes[point["name"]] = 2
+                print(f"Invalid system for {point['name']}: {e}", file=sys.stderr)
+                continue
+
+        while len(running) >= max(1, args.jobs):
+            reap()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            run_child(script, point_args, point, bases[key])
+        running[pid] = point
+
+    while running:
+        reap()
+
+    failed = sum(1 for rc in returncodes.values() if rc != 0)
+    print(f"Batch of {len(points)} finished in {time.time() - start:.1f}s, {failed} failed")
+    sys.exit(1 if failed else 0)
+
+
+# gem5 runs config scripts with __name__ set to "__m5_main__"
+if __name__ in ("__main__", "__m5_main__"):
+    main()
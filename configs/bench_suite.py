@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+bench_suite.py
+
+Benchmark suite for the sweeps: the parameterized kernels in benchmarks/
+built as static binaries across an optimization / ISA extension / OpenMP
+matrix. Builds are cached by a hash of the sources, the compiler version
+and the flags, so a variant is compiled once and every sweep runs the
+same binary.
+
+  scalar_add      float add, kept scalar (-fno-tree-vectorize)
+  vector          float add, auto-vectorized at -O2/-O3
+  vector_add_avx  float add with SSE (4 lanes) or AVX (8 lanes) intrinsics
+  vector_add      double add, OpenMP parallel for
+  stride          strided int64 read sweep (size = working set, stride = locality)
+  flops           peak FP throughput probe: independent multiply-add chains
+  stream          memory bandwidth probe: STREAM triad over 3 x size doubles
+
+Every kernel takes a size and a stride (build-time -DSIZE/-DSTRIDE, run-time
+argv[1]/argv[2]) and prints a "SELFCHECK PASS|FAIL ..." line; sweep.py
+records it per point.
+
+Run with the host python, e.g.:
+  python3 experiments/configs/bench_suite.py build                   # default matrix
+  python3 experiments/configs/bench_suite.py build --bench=stride --opt=O2 \
+    --isa=sse --size=4096 --size=1048576 --stride=1 --stride=8 --check
+  python3 experiments/configs/bench_suite.py list
+  python3 experiments/configs/bench_suite.py path vector:O3,avx2
+A variant is written as <bench>[:<opt>,<isa>,omp,m5ops,size=N,stride=N]
+(default O2, sse, no OpenMP, no m5 ops, the benchmark's size and stride).
+An m5ops variant brackets the kernel with m5_work_begin/end, for
+--roi-work-begin and --interval-work-items; it links util/m5 from
+$GEM5_ROOT (default: the current directory, the gem5 root). sweep.py and the
+other drivers accept --bench=suite:<variant> and build it on demand:
+  python3 experiments/configs/sweep.py --bench=suite:vector:O3,avx2 \
+    --bench=suite:stride:size=1048576,stride=8 --grid width=2,4,8
+Binaries go to $BENCH_SUITE_DIR (default benchmarks/build) as
+<hash>/<variant>, with manifest.json listing every built variant.
+"""
+
+import argparse
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SOURCE_DIR = os.path.join(HERE, "benchmarks")
+DEFAULT_SUITE_DIR = os.environ.get("BENCH_SUITE_DIR", os.path.join(SOURCE_DIR, "build"))
+# gem5 tree whose util/m5 the m5ops variants link
+DEFAULT_GEM5_ROOT = os.environ.get("GEM5_ROOT", ".")
+MANIFEST = "manifest.json"
+SPEC_PREFIX = "suite:"
+COMMON_HEADERS = ("bench.h",)
+
+# name -> source, extra flags, default size and stride, whether OpenMP applies
+BENCHMARKS = {
+    "scalar_add": {"source": "scalar_add.c", "flags": ["-fno-tree-vectorize"],
+                   "size": 1000000, "stride": 1, "omp": False},
+    "vector": {"source": "vector.c", "flags": [], "size": 1000000, "stride": 1, "omp": False},
+    "vector_add_avx": {"source": "vector_add_avx.c", "flags": [], "size": 1000000, "stride": 1,
+                       "omp": False},
+    "vector_add": {"source": "vector_add.cpp", "flags": [], "size": 1000000, "stride": 1,
+                   "omp": True},
+    "stride": {"source": "stride.c", "flags": [], "size": 1 << 20, "stride": 8, "omp": False},
+    # roofline.py probes
+    "flops": {"source": "flops.c", "flags": [], "size": 1 << 20, "stride": 1, "omp": False},
+    "stream": {"source": "stream.c", "flags": [], "size": 1 << 20, "stride": 1, "omp": False},
+}
+
+OPT_LEVELS = ("O0", "O1", "O2", "O3")
+# ISA extension -> compiler flags; sse is the x86-64 baseline (SSE2)
+ISA_FLAGS = {
+    "sse": ["-msse2", "-mno-avx"],
+    "avx2": ["-mavx2", "-mfma"],
+}
+DEFAULT_VARIANT = {"opt": "O2", "isa": "sse", "omp": False, "m5ops": False}
+
+SELFCHECK_RE = re.compile(r"^SELFCHECK (PASS|FAIL) (\S+)", re.MULTILINE)
+
+# build() runs in threads; they share the manifest
+_manifest_lock = threading.Lock()
+
+
+class BuildError(Exception):
+    pass
+
+
+def parse_variant(text):
+    # "vector:O3,avx2,omp,size=4096" -> {"bench", "opt", "isa", "omp", "m5ops", "size", "stride"}
+    bench, _, options = text.partition(":")
+    if bench not in BENCHMARKS:
+        raise ValueError(f"Unknown benchmark {bench!r} (known: {', '.join(BENCHMARKS)})")
+    variant = dict(DEFAULT_VARIANT, bench=bench, size=None, stride=None)
+    for token in filter(None, (t.strip() for t in options.split(","))):
+        key, sep, value = token.partition("=")
+        if token in OPT_LEVELS:
+            variant["opt"] = token
+        elif token in ISA_FLAGS:
+            variant["isa"] = token
+        elif token in ("omp", "noomp"):
+            variant["omp"] = token == "omp"
+        elif token == "m5ops":
+            variant["m5ops"] = True
+        elif sep and key in ("size", "stride") and value.isdigit() and int(value) > 0:
+            variant[key] = int(value)
+        else:
+            raise ValueError(f"Invalid variant option {token!r} in {text!r} "
+                             f"(expected {'/'.join(OPT_LEVELS)}, {'/'.join(ISA_FLAGS)}, omp, "
+                             f"m5ops, size=N or stride=N)")
+    if variant["omp"] and not BENCHMARKS[bench]["omp"]:
+        raise ValueError(f"{bench} has no OpenMP version")
+    return variant
+
+
+def variant_name(variant):
+    # Also the binary's file name, so sweep point names tell variants apart
+    parts = [variant["bench"], variant["opt"], variant["isa"]]
+    if variant["omp"]:
+        parts.append("omp")
+    if variant.get("m5ops"):
+        parts.append("m5ops")
+    for key, tag in (("size", "n"), ("stride", "s")):
+        if variant[key] is not None:
+            parts.append(f"{tag}{variant[key]}")
+    return "-".join(parts)
+
+
+def is_spec(bench):
+    return bench.startswith(SPEC_PREFIX)
+
+
+_compiler_versions = {}
+
+
+def compiler_version(compiler):
+    if compiler not in _compiler_versions:
+        try:
+            out = subprocess.run([compiler, "--version"], capture_output=True, text=True, check=True)
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise BuildError(f"Compiler {compiler!r} not usable: {e}")
+        _compiler_versions[compiler] = out.stdout.splitlines()[0].strip()
+    return _compiler_versions[compiler]
+
+
+def build_command(variant, cc="gcc", cxx="g++", m5ops=None):
+    # (compiler, flags before the source, libraries after it); m5ops is the gem5
+    # root of an m5ops variant (default $GEM5_ROOT)
+    bench = BENCHMARKS[variant["bench"]]
+    compiler = cxx if bench["source"].endswith(".cpp") else cc
+    flags = ["-static", "-" + variant["opt"]] + ISA_FLAGS[variant["isa"]]
+    if variant["omp"]:
+        flags.append("-fopenmp")
+    flags += bench["flags"]
+    flags += [f"-DSIZE={variant['size'] or bench['size']}",
+              f"-DSTRIDE={variant['stride'] or bench['stride']}"]
+    libs = []
+    if variant.get("m5ops"):
+        m5ops = m5ops or DEFAULT_GEM5_ROOT
+        flags += ["-DM5OPS", "-I" + os.path.join(m5ops, "include")]
+        libs = ["-L" + os.path.join(m5ops, "util", "m5", "build", "x86", "out"), "-lm5"]
+    return compiler, flags, libs
+
+
+def build_hash(variant, cc="gcc", cxx="g++", m5ops=None):
+    # sha256 of the sources, the compiler version and the full command
+    compiler, flags, libs = build_command(variant, cc, cxx, m5ops)
+    h = hashlib.sha256()
+    h.update(json.dumps([compiler_version(compiler), flags, libs]).encode())
+    for name in (BENCHMARKS[variant["bench"]]["source"],) + COMMON_HEADERS:
+        with open(os.path.join(SOURCE_DIR, name), "rb") as f:
+            h.update(name.encode() + b"\0" + f.read())
+    return h.hexdigest()
+
+
+def binary_path(variant, digest, suite_dir=DEFAULT_SUITE_DIR):
+    return os.path.join(suite_dir, digest[:16], variant_name(variant))
+
+
+def build(variant, suite_dir=DEFAULT_SUITE_DIR, cc="gcc", cxx="g++", m5ops=None):
+    # Path of the variant's binary, compiled unless the hash is already built
+    digest = build_hash(variant, cc, cxx, m5ops)
+    path = binary_path(variant, digest, suite_dir)
+    if os.path.exists(path):
+        return path, False
+    compiler, flags, libs = build_command(variant, cc, cxx, m5ops)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    source = os.path.join(SOURCE_DIR, BENCHMARKS[variant["bench"]]["source"])
+    cmd = [compiler] + flags + ["-I", SOURCE_DIR, source, "-o", tmp] + libs
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise BuildError(f"Building {variant_name(variant)} failed:\n  {' '.join(cmd)}\n{proc.stderr}")
+    # concurrent builders of the same hash produce the same binary
+    os.replace(tmp, path)
+    record(suite_dir, variant, digest, path, [compiler] + flags + libs)
+    return path, True
+
+
+def load_manifest(suite_dir=DEFAULT_SUITE_DIR):
+    try:
+        with open(os.path.join(suite_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def record(suite_dir, variant, digest, path, command):
+    with _manifest_lock:
+        _record(suite_dir, variant, digest, path, command)
+
+
+def _record(suite_dir, variant, digest, path, command):
+    manifest = load_manifest(suite_dir)
+    manifest[variant_name(variant)] = {
+        "variant": variant,
+        "hash": digest,
+        "path": os.path.relpath(path, suite_dir),
+        "command": command,
+        "compiler": compiler_version(command[0]),
+        "built": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    tmp = os.path.join(suite_dir, f"{MANIFEST}.tmp{os.getpid()}")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, os.path.join(suite_dir, MANIFEST))
+
+
+def resolve(bench, suite_dir=DEFAULT_SUITE_DIR):
+    # "suite:<variant>" -> built binary path; anything else is a path already
+    if not is_spec(bench):
+        return bench
+    path, built = build(parse_variant(bench[len(SPEC_PREFIX):]), suite_dir)
+    if built:
+        print(f"Built {bench} -> {path}")
+    return path
+
+
+def resolve_benches(benches):
+    # For the drivers' --bench lists; exits on an invalid or unbuildable variant
+    try:
+        return [resolve(b) for b in benches]
+    except (ValueError, BuildError) as e:
+        sys.exit(str(e))
+
+
+def parse_selfcheck(text):
+    # "PASS" / "FAIL" from a benchmark's (or simout's) output, None without a self-check
+    verdicts = SELFCHECK_RE.findall(text)
+    if not verdicts:
+        return None
+    return "FAIL" if any(v == "FAIL" for v, _ in verdicts) else "PASS"
+
+
+def expand_matrix(args):
+    benches = args.bench or list(BENCHMARKS)
+    for name in benches:
+        if name not in BENCHMARKS:
+            sys.exit(f"Unknown benchmark {name!r} (known: {', '.join(BENCHMARKS)})")
+    variants = []
+    for name, opt, isa, omp, size, stride in itertools.product(
+            benches, args.opt or OPT_LEVELS, args.isa or list(ISA_FLAGS),
+            [False, True] if args.omp is None else [args.omp == "on"],
+            args.size or [None], args.stride or [None]):
+        if omp and not BENCHMARKS[name]["omp"]:
+            continue
+        variants.append({"bench": name, "opt": opt, "isa": isa, "omp": omp,
+                         "m5ops": args.m5ops is not None, "size": size, "stride": stride})
+    return variants
+
+
+def check(path, timeout=600):
+    # Run a binary natively; (verdict, detail)
+    try:
+        proc = subprocess.run([path], capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return "ERROR", str(e)
+    verdict = parse_selfcheck(proc.stdout)
+    if verdict is None:
+        return "ERROR", f"no self-check line (exit {proc.returncode})"
+    line = SELFCHECK_RE.search(proc.stdout)
+    return verdict, proc.stdout[line.start():].splitlines()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and look up the benchmark suite")
+    parser.add_argument("--suite-dir", type=str, default=DEFAULT_SUITE_DIR,
+                        help="Build cache directory (default: $BENCH_SUITE_DIR or benchmarks/build)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bld = sub.add_parser("build", help="Build a matrix of variants (cached)")
+    bld.add_argument("--bench", action="append", default=None, help="Benchmark (repeatable; default: all)")
+    bld.add_argument("--opt", action="append", choices=OPT_LEVELS, default=None,
+                     help="Optimization level (repeatable; default: all)")
+    bld.add_argument("--isa", action="append", choices=list(ISA_FLAGS), default=None,
+                     help="ISA extension (repeatable; default: all)")
+    bld.add_argument("--omp", choices=["on", "off"], default=None,
+                     help="OpenMP (default: both, for the benchmarks that use it)")
+    bld.add_argument("--size", action="append", type=int, default=None,
+                     help="Build-time size (repeatable; default: the benchmark's)")
+    bld.add_argument("--stride", action="append", type=int, default=None,
+                     help="Build-time stride (repeatable; default: the benchmark's)")
+    bld.add_argument("--cc", type=str, default="gcc", help="C compiler")
+    bld.add_argument("--cxx", type=str, default="g++", help="C++ compiler")
+    bld.add_argument("--m5ops", type=str, default=None, metavar="GEM5_ROOT",
+                     help="Build m5ops variants: mark the kernels with m5_work_begin/end (needs util/m5 built)")
+    bld.add_argument("--jobs", type=int, default=os.cpu_count(), help="Concurrent compiles")
+    bld.add_argument("--check", action="store_true", help="Run every binary natively and verify its self-check")
+    sub.add_parser("list", help="List the built variants")
+    pth = sub.add_parser("path", help="Print the binary of a variant (building it if needed)")
+    pth.add_argument("variant", help="<bench>[:<opt>,<isa>,omp,m5ops,size=N,stride=N]")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        manifest = load_manifest(args.suite_dir)
+        for name in sorted(manifest):
+            entry = manifest[name]
+            print(f"{name:<40} {entry['hash'][:16]}  {os.path.join(args.suite_dir, entry['path'])}")
+        return
+
+    if args.command == "path":
+        variant = args.variant[len(SPEC_PREFIX):] if is_spec(args.variant) else args.variant
+        try:
+            path, _ = build(parse_variant(variant), args.suite_dir)
+        except (ValueError, BuildError) as e:
+            sys.exit(str(e))
+        print(path)
+        return
+
+    variants = expand_matrix(args)
+    print(f"Building {len(variants)} variants -> {args.suite_dir}")
+    failed = 0
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {pool.submit(build, v, args.suite_dir, args.cc, args.cxx, args.m5ops): v
+                   for v in variants}
+        for future in concurrent.futures.as_completed(futures):
+            name = variant_name(futures[future])
+            try:
+                path, built = future.result()
+            except (BuildError, OSError) as e:
+                failed += 1
+                print(f"  {name}: FAILED\n{e}", file=sys.stderr)
+                continue
+            results.append((name, path))
+            print(f"  {name}: {'built' if built else 'cached'}")
+
+    if args.check:
+        for name, path in sorted(results):
+            verdict, detail = check(path)
+            failed += verdict != "PASS"
+            print(f"{verdict:<6} {name}: {detail}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+/*
+ * Shared by the benchmark suite (bench_suite.py): size/stride parameters,
+ * ROI markers and the self-check line.
+ *
+ * SIZE and STRIDE are set at build time (-DSIZE=, -DSTRIDE=) and can be
+ * overridden at run time: argv[1] is the size, argv[2] the stride.
+ * Every kernel ends with one line
+ *   SELFCHECK PASS|FAIL <name> size=<n> stride=<s> checksum=<x> expected=<y>
+ * and exits with status 1 on FAIL.
+ */
+#ifndef BENCH_H
+#define BENCH_H
+
+#include <stdio.h>
+#include <stdlib.h>
+
+#ifndef SIZE
+#define SIZE 1000000
+#endif
+#ifndef STRIDE
+#define STRIDE 1
+#endif
+
+/* -DM5OPS (bench_suite.py m5ops variants) brackets the kernel with m5_work_begin/end */
+#ifdef M5OPS
+#include <gem5/m5ops.h>
+#define ROI_BEGIN() m5_work_begin(0, 0)
+#define ROI_END() m5_work_end(0, 0)
+#else
+#define ROI_BEGIN()
+#define ROI_END()
+#endif
+
+static void bench_params(int argc, char **argv, long *size, long *stride)
+{
+    *size = argc > 1 ? atol(argv[1]) : SIZE;
+    *stride = argc > 2 ? atol(argv[2]) : STRIDE;
+    if (*size < 1 || *stride < 1) {
+        fprintf(stderr, "usage: %s [size >= 1] [stride >= 1]\n", argv[0]);
+        exit(2);
+    }
+}
+
+/* Heap arrays, cache line aligned (the original kernels put 12 MB on the stack) */
+static void *bench_alloc(long count, size_t elem)
+{
+    size_t bytes = ((count * elem + 63) / 64) * 64;
+    void *p = aligned_alloc(64, bytes);
+    if (p == NULL) {
+        fprintf(stderr, "out of memory (%zu bytes)\n", bytes);
+        exit(2);
+    }
+    return p;
+}
+
+/* Number of indices 0, stride, 2*stride, ... below size */
+static long bench_touched(long size, long stride)
+{
+    return (size + stride - 1) / stride;
+}
+
+static int bench_check(const char *name, long size, long stride, double checksum, double expected)
+{
+    double diff = checksum > expected ? checksum - expected : expected - checksum;
+    double scale = expected < 0 ? -expected : expected;
+    int ok = diff <= 1e-6 * scale;
+    printf("SELFCHECK %s %s size=%ld stride=%ld checksum=%.17g expected=%.17g\n",
+           ok ? "PASS" : "FAIL", name, size, stride, checksum, expected);
+    return ok ? 0 : 1;
+}
+
+#endif
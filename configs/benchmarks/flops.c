@@ -0,0 +1,38 @@
+#include "bench.h"
+
+/*
+ * Peak floating-point throughput probe (roofline.py): CHAINS independent
+ * multiply-add chains held in registers, no memory traffic. SIZE is the
+ * number of iterations; STRIDE is unused.
+ */
+#define CHAINS 16
+
+int main(int argc, char **argv) {
+    long size, stride;
+    bench_params(argc, argv, &size, &stride);
+    // read at run time so the compiler cannot fold the chains
+    volatile float scale_in = 0.5f, add_in = 1.0f;
+    float s = scale_in, t = add_in;
+    // distinct start values, so the chains cannot be merged either
+    float x[CHAINS];
+    for (int k = 0; k < CHAINS; k++) {
+        x[k] = k * t;
+    }
+
+    ROI_BEGIN();
+    for (long i = 0; i < size; i++) {
+        for (int k = 0; k < CHAINS; k++) {
+            x[k] = x[k] * s + t;
+        }
+    }
+    ROI_END();
+
+    // chain k: x_n = 2 + (k - 2) * 2^-n
+    double checksum = 0, offset = 0;
+    for (int k = 0; k < CHAINS; k++) {
+        checksum += x[k];
+        offset += k - 2;
+    }
+    double expected = 2.0 * CHAINS + (size >= 60 ? 0.0 : offset / (double)(1L << size));
+    return bench_check("flops", size, stride, checksum, expected);
+}
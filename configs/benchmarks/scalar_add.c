@@ -0,0 +1,28 @@
+#include "bench.h"
+
+/* Element-wise float add; built with -fno-tree-vectorize to stay scalar */
+int main(int argc, char **argv) {
+    long size, stride;
+    bench_params(argc, argv, &size, &stride);
+    float *a = bench_alloc(size, sizeof(float));
+    float *b = bench_alloc(size, sizeof(float));
+    float *c = bench_alloc(size, sizeof(float));
+    for (long i = 0; i < size; i++) {
+        a[i] = i * 0.5f;
+        b[i] = i * 0.25f;
+    }
+
+    ROI_BEGIN();
+    for (long i = 0; i < size; i += stride) {
+        c[i] = a[i] + b[i];
+    }
+    ROI_END();
+
+    double checksum = 0;
+    for (long i = 0; i < size; i += stride) {
+        checksum += c[i];
+    }
+    long n = bench_touched(size, stride);
+    double expected = 0.75 * stride * ((double)n * (n - 1) / 2);
+    return bench_check("scalar_add", size, stride, checksum, expected);
+}
@@ -0,0 +1,39 @@
+#include "bench.h"
+
+#ifndef PASSES
+#define PASSES 2
+#endif
+
+/*
+ * Memory bandwidth probe (roofline.py): STREAM triad a = b + s * c over
+ * SIZE doubles per array, PASSES times. Keep 3 * SIZE * 8 bytes well above
+ * the last-level cache.
+ */
+int main(int argc, char **argv) {
+    long size, stride;
+    bench_params(argc, argv, &size, &stride);
+    double *a = bench_alloc(size, sizeof(double));
+    double *b = bench_alloc(size, sizeof(double));
+    double *c = bench_alloc(size, sizeof(double));
+    volatile double scale_in = 3.0;
+    double s = scale_in;
+    for (long i = 0; i < size; i++) {
+        a[i] = 0.0;
+        b[i] = 1.0;
+        c[i] = 2.0;
+    }
+
+    ROI_BEGIN();
+    for (int pass = 0; pass < PASSES; pass++) {
+        for (long i = 0; i < size; i += stride) {
+            a[i] = b[i] + s * c[i];
+        }
+    }
+    ROI_END();
+
+    double checksum = 0;
+    for (long i = 0; i < size; i++) {
+        checksum += a[i];
+    }
+    return bench_check("stream", size, stride, checksum, 7.0 * bench_touched(size, stride));
+}
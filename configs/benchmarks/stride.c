@@ -0,0 +1,33 @@
+#include <stdint.h>
+#include "bench.h"
+
+#ifndef PASSES
+#define PASSES 4
+#endif
+
+/*
+ * Strided read sweep over SIZE 8-byte elements, PASSES times: the working
+ * set (SIZE * 8 bytes) picks the cache level, STRIDE (in elements; 8 = one
+ * access per 64-byte line) the spatial locality.
+ */
+int main(int argc, char **argv) {
+    long size, stride;
+    bench_params(argc, argv, &size, &stride);
+    int64_t *a = bench_alloc(size, sizeof(int64_t));
+    for (long i = 0; i < size; i++) {
+        a[i] = i;
+    }
+
+    int64_t sum = 0;
+    ROI_BEGIN();
+    for (int pass = 0; pass < PASSES; pass++) {
+        for (long i = 0; i < size; i += stride) {
+            sum += a[i];
+        }
+    }
+    ROI_END();
+
+    long n = bench_touched(size, stride);
+    double expected = (double)PASSES * stride * ((double)n * (n - 1) / 2);
+    return bench_check("stride", size, stride, (double)sum, expected);
+}
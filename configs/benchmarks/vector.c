@@ -0,0 +1,32 @@
+#include "bench.h"
+
+/* Element-wise float add the compiler may auto-vectorize (-O2/-O3, ISA flags) */
+int main(int argc, char **argv) {
+    long size, stride;
+    bench_params(argc, argv, &size, &stride);
+    float *A = bench_alloc(size, sizeof(float));
+    float *B = bench_alloc(size, sizeof(float));
+    float *C = bench_alloc(size, sizeof(float));
+
+    for (long i = 0; i < size; i++) {
+        A[i] = i * 0.1;
+        B[i] = i * 0.2;
+    }
+
+    ROI_BEGIN();
+    for (long i = 0; i < size; i += stride) {
+        C[i] = A[i] + B[i];
+    }
+    ROI_END();
+
+    double checksum = 0;
+    for (long i = 0; i < size; i += stride) {
+        checksum += C[i];
+    }
+    long n = bench_touched(size, stride);
+    double expected = 0.3 * stride * ((double)n * (n - 1) / 2);
+    printf("C[0]=%f, C[N-1]=%f\n", C[0], C[(n - 1) * stride]);
+    int status = bench_check("vector", size, stride, checksum, expected);
+    free(A); free(B); free(C);
+    return status;
+}
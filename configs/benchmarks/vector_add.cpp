@@ -0,0 +1,30 @@
+#include <iostream>
+#include <vector>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#include "bench.h"
+
+int main(int argc, char **argv) {
+    long N, stride;
+    bench_params(argc, argv, &N, &stride);
+    std::vector<double> a(N, 1.0), b(N, 2.0), c(N, 0.0);
+
+    ROI_BEGIN();
+    // Parallelize the loop using OpenMP (serial when built without -fopenmp)
+    #pragma omp parallel for
+    for (long i = 0; i < N; i += stride) {
+        c[i] = a[i] + b[i];
+    }
+    ROI_END();
+
+    double checksum = 0;
+    for (long i = 0; i < N; i += stride) {
+        checksum += c[i];
+    }
+#ifdef _OPENMP
+    std::cout << "threads = " << omp_get_max_threads() << std::endl;
+#endif
+    std::cout << "c[0] = " << c[0] << ", c[N-1] = " << c[N-1] << std::endl;
+    return bench_check("vector_add", N, stride, checksum, 3.0 * bench_touched(N, stride));
+}
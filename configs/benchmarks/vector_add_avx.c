@@ -0,0 +1,59 @@
+#include <immintrin.h>  // For SSE/AVX intrinsics
+#include "bench.h"
+
+/*
+ * Explicit SIMD float add: 8 lanes with AVX (-mavx/-mavx2), 4 lanes with
+ * SSE otherwise. STRIDE counts vectors: every stride-th vector is added.
+ */
+#ifdef __AVX__
+#define LANES 8
+#else
+#define LANES 4
+#endif
+
+int main(int argc, char **argv) {
+    long size, stride;
+    bench_params(argc, argv, &size, &stride);
+    float *a = bench_alloc(size, sizeof(float));
+    float *b = bench_alloc(size, sizeof(float));
+    float *result = bench_alloc(size, sizeof(float));
+    // a[i] + b[i] == size for every element, exact in float below 2^24
+    for (long i = 0; i < size; i++) {
+        a[i] = (float)i;
+        b[i] = (float)(size - i);
+    }
+
+    long vectors = size / LANES;
+    ROI_BEGIN();
+    for (long v = 0; v < vectors; v += stride) {
+        long i = v * LANES;
+#ifdef __AVX__
+        __m256 vecA = _mm256_load_ps(a + i);
+        __m256 vecB = _mm256_load_ps(b + i);
+        _mm256_store_ps(result + i, _mm256_add_ps(vecA, vecB));
+#else
+        __m128 vecA = _mm_load_ps(a + i);
+        __m128 vecB = _mm_load_ps(b + i);
+        _mm_store_ps(result + i, _mm_add_ps(vecA, vecB));
+#endif
+    }
+    // Scalar tail
+    for (long i = vectors * LANES; i < size; i++) {
+        result[i] = a[i] + b[i];
+    }
+    ROI_END();
+
+    double checksum = 0;
+    long touched = size - vectors * LANES;
+    for (long v = 0; v < vectors; v += stride) {
+        for (long i = v * LANES; i < (v + 1) * LANES; i++) {
+            checksum += result[i];
+        }
+        touched += LANES;
+    }
+    for (long i = vectors * LANES; i < size; i++) {
+        checksum += result[i];
+    }
+    printf("lanes=%d\n", LANES);
+    return bench_check("vector_add_avx", size, stride, checksum, (double)touched * size);
+}
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+bp_compare.py
+
+Branch predictor comparison harness: runs every benchmark under every
+predictor of the zoo below (and a few table sizes each) as one parallel
+sweep (sweep.py: cores/RAM bounded jobs, result cache, ROI checkpoints) and
+prints one table of MPKI, IPC and simulated time per predictor.
+
+Run with the host python, e.g. from the gem5 root:
+  python3 experiments/configs/bp_compare.py --gem5=build/X86/gem5.opt \
+    --bench=vector --bench=scalar_add --grid width=4 --outdir=out/bp_compare
+Only some predictors, default sizes only:
+  ... bp_compare.py --bench=vector --predictor=tage_sc_l --predictor=local --no-sizes
+
+Predictors missing from the gem5 build fail their points and show up as
+"failed" in the table. The table is also written to <outdir>/bp_compare.csv
+and bp_compare.json.
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+
+import sweep
+from bench_suite import resolve_benches
+from gem5stats import get_stat, iter_dumps
+from result_cache import ResultCache
+
+# name -> (SimObject, [size variants as {predictor parameter: value}]);
+# the first variant ({}) is the class default
+PREDICTORS = {
+    "local": ("LocalBP", [{}, {"localPredictorSize": 4096, "localCtrBits": 2},
+                          {"localPredictorSize": 16384, "localCtrBits": 2}]),
+    "bimode": ("BiModeBP", [{}, {"globalPredictorSize": 16384, "choicePredictorSize": 16384},
+                            {"globalPredictorSize": 65536, "choicePredictorSize": 65536}]),
+    "tournament": ("TournamentBP", [{}, {"localPredictorSize": 4096, "globalPredictorSize": 16384,
+                                         "choicePredictorSize": 16384},
+                                    {"localPredictorSize": 16384, "globalPredictorSize": 65536,
+                                     "choicePredictorSize": 65536}]),
+    "tage": ("TAGE", [{}]),
+    "ltage": ("LTAGE", [{}]),
+    "tage_sc_l": ("TAGE_SC_L_8KB", [{}]),
+    "tage_sc_l_64kb": ("TAGE_SC_L_64KB", [{}]),
+    "perceptron": ("MultiperspectivePerceptron8KB", [{}]),
+    "perceptron_64kb": ("MultiperspectivePerceptron64KB", [{}]),
+}
+
+MISPREDICT_STATS = ("system.cpu.commit.branchMispredicts", "system.cpu.branchPred.condIncorrect")
+INST_STATS = ("system.cpu.commitStats0.numInsts", "system.cpu.committedInsts", "simInsts")
+
+
+def size_label(params):
+    if not params:
+        return "default"
+    return ",".join(f"{k}={v}" for k, v in params.items())
+
+
+def predictor_points(benches, names, sizes, grid):
+    points = []
+    for base in sweep.expand_points(benches, grid):
+        for name in names:
+            bp_type, variants = PREDICTORS[name]
+            for params in variants if sizes else variants[:1]:
+                point = dict(base, bp=bp_type)
+                for key, value in params.items():
+                    point[sweep.BP_PARAM_PREFIX + key] = value
+                points.append((name, size_label(params), point))
+    return points
+
+
+def result_stats(result, cache):
+    # Last stats dump of a sweep result, from its outdir or the result cache
+    stats_file = os.path.join(result["outdir"], "stats.txt")
+    if os.path.exists(stats_file):
+        stats = {}
+        for stats in iter_dumps(stats_file):
+            pass
+        return stats
+    entry = cache.get(result["cache_key"]) if cache and result.get("cache_key") else None
+    return entry["stats"][-1] if entry and entry["stats"] else {}
+
+
+def summarize(result, stats):
+    insts = get_stat(stats, *INST_STATS)
+    mispredicts = get_stat(stats, *MISPREDICT_STATS)
+    mpki = mispredicts * 1000 / insts if insts else math.nan
+    return {
+        "mpki": mpki,
+        "ipc": get_stat(stats, "system.cpu.ipc"),
+        "sim_seconds": get_stat(stats, "simSeconds", "sim_seconds"),
+        "insts": insts,
+        "ok": result["returncode"] == 0 and bool(stats),
+    }
+
+
+def fmt(value, spec):
+    return "-" if value is None or (isinstance(value, float) and math.isnan(value)) else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare branch predictors across benchmarks")
+    parser.add_argument("--gem5", type=str, default="build/X86/gem5.opt", help="gem5 binary")
+    parser.add_argument("--script", type=str, default=sweep.DEFAULT_SCRIPT,
+                        help="Config script (must take --bp-type/--bp-param)")
+    parser.add_argument("--bench", action="append", required=True, help="Benchmark binary or suite:<variant> (repeatable)")
+    parser.add_argument("--predictor", action="append", choices=sorted(PREDICTORS), default=None,
+                        help="Only these predictors (repeatable; default: all)")
+    parser.add_argument("--no-sizes", action="store_true", help="Only the default table sizes")
+    parser.add_argument("--grid", action="append", default=[],
+                        help="Extra sweep.py grid crossed with the predictors, e.g. width=4")
+    parser.add_argument("--outdir", type=str, default="out/bp_compare", help="Base output directory")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Concurrent simulations (default: bounded by cores and RAM)")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Result cache directory")
+    parser.add_argument("--cache-max-size", type=str, default="10GB",
+                        help="Evict least recently used cache entries beyond this size")
+    parser.add_argument("--roi-insts", type=int, default=None,
+                        help="Checkpoint each benchmark after this many instructions and restore it for all points")
+    parser.add_argument("--roi-work-begin", action="store_true",
+                        help="Checkpoint each benchmark at its first m5_work_begin op (suite:<variant>,m5ops)")
+    parser.add_argument("--ff-cpu", choices=["atomic", "kvm"], default="atomic",
+                        help="CPU model used to fast-forward to the ROI")
+    parser.add_argument("--checkpoint-dir", type=str, default=None,
+                        help="Where ROI checkpoints are kept (default: <outdir>/checkpoints)")
+    parser.add_argument("script_args", nargs="*", help="Extra arguments passed to the script (after --)")
+    args = parser.parse_args()
+    args.bench = resolve_benches(args.bench)
+
+    try:
+        grid = sweep.parse_grid(args.grid)
+        cache_max = sweep.parse_size(args.cache_max_size)
+    except ValueError as e:
+        parser.error(str(e))
+    if "bp" in grid:
+        parser.error("the predictor is chosen with --predictor, not --grid bp=...")
+    # sweep.run_sweep() options this harness does not expose
+    args.monitor = False
+    args.checkpoint_dir = args.checkpoint_dir or os.path.join(args.outdir, "checkpoints")
+
+    names = args.predictor or list(PREDICTORS)
+    labelled = predictor_points(args.bench, names, not args.no_sizes, grid)
+    points = [point for _, _, point in labelled]
+    jobs = args.jobs or sweep.default_jobs(points)
+    print(f"Comparing {len(names)} predictors on {len(args.bench)} benchmarks: "
+          f"{len(points)} points, {jobs} concurrent jobs -> {args.outdir}")
+    os.makedirs(args.outdir, exist_ok=True)
+    if args.roi_insts is not None or args.roi_work_begin:
+        args.checkpoints = sweep.take_checkpoints(points, args, jobs)
+    cache = ResultCache(args.cache_dir, cache_max) if args.cache_dir else None
+    results = {r["outdir"]: r for r in sweep.run_sweep(points, args, jobs, cache)}
+
+    rows = []
+    for name, sizes, point in labelled:
+        result = results[os.path.join(args.outdir, sweep.point_name(point))]
+        row = {"bench": os.path.basename(point["bench"]), "predictor": name, "sizes": sizes,
+               "outdir": result["outdir"]}
+        row.update({k: v for k, v in point.items() if k not in ("bench", "bp") and
+                    not k.startswith(sweep.BP_PARAM_PREFIX)})
+        row.update(summarize(result, result_stats(result, cache)))
+        rows.append(row)
+    rows.sort(key=lambda r: (r["bench"], not r["ok"], r["mpki"] if r["ok"] else 0))
+
+    print()
+    print(f"{'bench':<16} {'predictor':<16} {'sizes':<44} {'MPKI':>8} {'IPC':>7} {'sim s':>10}")
+    for row in rows:
+        if not row["ok"]:
+            print(f"{row['bench']:<16} {row['predictor']:<16} {row['sizes']:<44} {'failed':>8}")
+            continue
+        print(f"{row['bench']:<16} {row['predictor']:<16} {row['sizes']:<44} "
+              f"{fmt(row['mpki'], '8.3f')} {fmt(row['ipc'], '7.3f')} {fmt(row['sim_seconds'], '10.6f')}")
+
+    with open(os.path.join(args.outdir, "bp_compare.json"), "w") as f:
+        json.dump(rows, f, indent=2)
+    with open(os.path.join(args.outdir, "bp_compare.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["bench"])
+        writer.writeheader()
+        writer.writerows(rows)
+    failed = sum(1 for r in rows if not r["ok"])
+    if failed:
+        print(f"{failed} points failed (predictor not in this gem5 build?); see their simerr", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
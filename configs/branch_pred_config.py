@@ -1,17 +1,13 @@
 import m5
+import os
 import sys
-from m5.objects import (
-    System,
-    Root,
-    SrcClockDomain,
-    VoltageDomain,
-    SystemXBar,
-    O3CPU,
-    Process,
-    AddrRange,
-    LocalBP,
-    TournamentBP
-)
+from m5.objects import Root
+
+from bench_suite import resolve_benches
+from system_builder import GEM5_CONFIGS, SystemConfig, build_system
+
+# gem5's hello test program, relative to the gem5 tree
+HELLO = os.path.join(GEM5_CONFIGS, "..", "tests", "test-progs", "hello", "bin", "x86", "linux", "hello")
 
 # -----------------------------
 # Branch predictor from command line
@@ -23,47 +19,29 @@ else:
 
 print("Branch predictor selected:", branch_predictor)
 
-# -----------------------------
-# System setup
-# -----------------------------
-system = System()
-system.clk_domain = SrcClockDomain()
-system.clk_domain.clock = '1GHz'
-system.clk_domain.voltage_domain = VoltageDomain()
-
-system.mem_mode = 'timing'
-system.mem_ranges = [AddrRange('512MB')]
-system.membus = SystemXBar()
-
-# -----------------------------
-# CPU setup
-# -----------------------------
-cpu = O3CPU()
-system.cpu = cpu
-
-# Branch predictor assignment
-if branch_predictor == "LocalBP":
-    cpu.branchPred = LocalBP()
-elif branch_predictor == "TournamentBP":
-    cpu.branchPred = TournamentBP()
-else:
+if branch_predictor not in ("LocalBP", "TournamentBP"):
     print("Invalid predictor! Using LocalBP as baseline.")
-    cpu.branchPred = LocalBP()
+    branch_predictor = "LocalBP"
 
 # -----------------------------
-# Connect CPU ports (gem5 25)
+# System setup
 # -----------------------------
-cpu.icache_port = system.membus.cpu_side_ports
-cpu.dcache_port = system.membus.cpu_side_ports
-system.system_port = system.membus.cpu_side_ports
+config = SystemConfig(
+    cpu_type="O3CPU",
+    clock="1GHz",
+    mem_type="SimpleMemory",
+    bp_type=branch_predictor,
+)
 
 # -----------------------------
-# Workload
+# Workload: binary or suite:<variant> from the command line
 # -----------------------------
-process = Process()
-process.cmd = ["/home/anna/gem5/tests/test-progs/hello/bin/x86/linux/hello"]  # verify path
-system.cpu.workload = process
-system.cpu.createThreads()
+bench = sys.argv[2] if len(sys.argv) > 2 else os.path.normpath(HELLO)
+cmd = resolve_benches([bench])
+if not os.path.exists(cmd[0]):
+    sys.exit(f"Benchmark not found: {cmd[0]} (give a binary or suite:<variant> after the predictor)")
+print("Benchmark:", cmd[0])
+system = build_system(config, cmd)
 
 # -----------------------------
 # Root and simulation
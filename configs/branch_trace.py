@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+"""
+branch_trace.py
+
+Record the committed branch stream of a benchmark once, then replay it
+through branch predictor models without simulating the pipeline.
+
+  record   run se.py on AtomicSimpleCPU with the Exec debug trace
+           (ExecEnable,ExecUser,ExecMacro,ExecFlags) and convert it
+  convert  Exec debug trace (.gz ok) -> branch trace
+  replay   drive predictor models over a branch trace, print MPKI
+  info     summary of a branch trace
+
+A branch trace is a compressed .npz holding, per committed control
+instruction, pc and target (uint64), taken (bool) and kind (uint8, see
+KINDS), plus the number of committed instructions. The Exec trace has no
+instruction lengths, so the fall-through of a conditional branch is taken to
+be its nearest successor within MAX_INST_BYTES; a forward conditional
+branch that was never seen falling through and always jumps less than
+MAX_INST_BYTES ahead is recorded as not taken.
+
+Replay works on conditional branches only (direction prediction; global and
+local histories hold actual outcomes, as after commit). Every model is a
+table of saturating counters, and a counter's evolution is a composition of
+per-outcome state maps, so the replay groups branches by table entry and
+runs a segmented parallel prefix scan over those maps with numpy, in batches
+of --batch branches, carrying the table across batches. --engine=loop runs
+the same models branch by branch in plain Python, as a reference.
+
+  python3 experiments/configs/branch_trace.py record --gem5=build/X86/gem5.opt \
+    --bench=vector --out=out/bt/vector.npz
+  python3 experiments/configs/branch_trace.py replay out/bt/vector.npz \
+    --model=bimodal:size=4096 --model=gshare:size=16384,hist=14 \
+    --model=tournament:local=2048,lhist=11,global=8192,ghist=13
+"""
+
+import argparse
+import concurrent.futures
+import gzip
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# ExecMacro: x86 instructions are all microcoded, and without it only micro-ops
+# (which ExecMicro would print) exist in the trace
+EXEC_FLAGS = "ExecEnable,ExecUser,ExecMacro,ExecFlags"
+MAX_INST_BYTES = 15
+
+# kind codes
+COND, UNCOND, CALL, RETURN, INDIRECT = range(5)
+KINDS = {COND: "cond", UNCOND: "uncond", CALL: "call", RETURN: "return", INDIRECT: "indirect"}
+
+PC_RE = re.compile(r":\s+(0x[0-9a-fA-F]+)(?:\.\d+)?\s*(?:@\S*)?\s*:")
+FLAGS_RE = re.compile(r"flags=\(([^)]*)\)")
+
+
+# ----------------------------------------------------------------
+# Recording
+# ----------------------------------------------------------------
+def control_kind(flags):
+    if "IsControl" not in flags:
+        return None
+    if "IsReturn" in flags:
+        return RETURN
+    if "IsCall" in flags:
+        return CALL
+    if "IsCondControl" in flags:
+        return COND
+    if "IsIndirectControl" in flags:
+        return INDIRECT
+    return UNCOND
+
+
+def parse_exec_trace(path):
+    # Exec trace -> (pc, next pc, kind) arrays of control instructions, instruction count
+    opener = gzip.open if str(path).endswith(".gz") else open
+    pcs, nexts, kinds = [], [], []
+    insts = 0
+    pending = False
+    with opener(path, "rt", errors="replace") as f:
+        for line in f:
+            m = PC_RE.search(line)
+            if m is None:
+                continue
+            pc = int(m.group(1), 16)
+            insts += 1
+            if pending:
+                nexts.append(pc)
+                pending = False
+            if "IsControl" in line:
+                flags = FLAGS_RE.search(line)
+                kind = control_kind(flags.group(1) if flags else "IsControl")
+                pcs.append(pc)
+                kinds.append(kind)
+                pending = True
+    if pending:
+        # the program ended on a branch; its outcome is unknown
+        pcs.pop()
+        kinds.pop()
+    return (np.array(pcs, dtype=np.uint64), np.array(nexts, dtype=np.uint64),
+            np.array(kinds, dtype=np.uint8), insts)
+
+
+def resolve_outcomes(pc, next_pc, kind):
+    # taken/target per branch; conditional fall-throughs inferred per static branch
+    taken = np.ones(len(pc), dtype=bool)
+    target = next_pc.copy()
+    cond = np.nonzero(kind == COND)[0]
+    if len(cond):
+        static, inverse = np.unique(pc[cond], return_inverse=True)
+        succ = next_pc[cond]
+        near = (succ > pc[cond]) & (succ <= pc[cond] + np.uint64(MAX_INST_BYTES))
+        fallthrough = np.full(len(static), np.iinfo(np.uint64).max, dtype=np.uint64)
+        np.minimum.at(fallthrough, inverse, np.where(near, succ, np.iinfo(np.uint64).max))
+        cond_taken = succ != fallthrough[inverse]
+        taken[cond] = cond_taken
+        jump = np.zeros(len(static), dtype=np.uint64)
+        np.maximum.at(jump, inverse, np.where(cond_taken, succ, np.uint64(0)))
+        target[cond] = jump[inverse]
+    return taken, target
+
+
+def save_trace(path, pc, target, taken, kind, insts, source=None):
+    meta = {"insts": insts, "kinds": KINDS, "source": source}
+    np.savez_compressed(path, pc=pc, target=target, taken=taken, kind=kind,
+                        meta=np.array(json.dumps(meta)))
+
+
+def load_trace(path):
+    with np.load(path, allow_pickle=False) as npz:
+        trace = {name: npz[name] for name in ("pc", "target", "taken", "kind")}
+        trace["meta"] = json.loads(str(npz["meta"]))
+    return trace
+
+
+def convert(exec_trace, out):
+    pc, next_pc, kind, insts = parse_exec_trace(exec_trace)
+    taken, target = resolve_outcomes(pc, next_pc, kind)
+    save_trace(out, pc, target, taken, kind, insts, os.path.abspath(exec_trace))
+    return len(pc), insts
+
+
+# ----------------------------------------------------------------
+# Vectorized replay
+# ----------------------------------------------------------------
+def counter_maps(bits):
+    # (increment, decrement, identity) state maps of a saturating counter
+    states = np.arange(1 << bits)
+    return (np.minimum(states + 1, states[-1]).astype(np.uint8),
+            np.maximum(states - 1, 0).astype(np.uint8),
+            states.astype(np.uint8))
+
+
+def encode_map(state_map, bits):
+    # state map -> one integer, `bits` bits per state
+    return sum(int(v) << (bits * s) for s, v in enumerate(state_map))
+
+
+_compose_tables = {}
+
+
+def compose_table(bits):
+    # COMPOSE[(g << code bits) | f] = code of g o f, for counters of up to 2 bits (8-bit codes)
+    if bits not in _compose_tables:
+        states = 1 << bits
+        codes = 1 << (bits * states)
+        decoded = np.array([[(c >> (bits * s)) & (states - 1) for s in range(states)]
+                            for c in range(codes)], dtype=np.intp)
+        weights = np.array([1 << (bits * s) for s in range(states)], dtype=np.intp)
+        # (g o f)[s] = g[f[s]]
+        composed = np.take_along_axis(decoded[:, None, :].repeat(codes, axis=1),
+                                      decoded[None, :, :].repeat(codes, axis=0), axis=2)
+        _compose_tables[bits] = (composed @ weights).astype(np.uint8).ravel()
+    return _compose_tables[bits]
+
+
+def segments(index, size):
+    # Groups branches by table index, keeping program order inside a group:
+    # (sort order, first-of-group flags, position inside the group), all in
+    # sorted order. 16-bit keys get numpy's radix sort.
+    if size <= 1 << 16:
+        order = np.argsort(index.astype(np.uint16), kind="stable")
+    else:
+        order = np.argsort(index.astype(np.int64), kind="stable")
+    idx = index[order]
+    n = len(idx)
+    seg_start = np.ones(n, dtype=bool)
+    seg_start[1:] = idx[1:] != idx[:-1]
+    positions = np.arange(n)
+    offset = positions - np.maximum.accumulate(np.where(seg_start, positions, 0))
+    return order, seg_start, offset
+
+
+def scan_counters(index, up, table, bits, update=None):
+    # Predictions (counter in upper half) of a table of saturating counters
+    # indexed by index[i], each moved towards up[i] after its prediction
+    # (only where update[i]); table is updated in place with the final states
+    n = len(index)
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    order, seg_start, offset = segments(index, len(table))
+    idx = index[order]
+    init = table[idx]
+
+    inc, dec, ident = counter_maps(bits)
+    if bits <= 2:
+        # maps as 8-bit codes; composition is one table lookup
+        compose = compose_table(bits)
+        code_bits = bits << bits
+        maps = np.where(up[order], np.uint8(encode_map(inc, bits)), np.uint8(encode_map(dec, bits)))
+        if update is not None:
+            maps = np.where(update[order], maps, np.uint8(encode_map(ident, bits)))
+        apply = lambda m, state: (m >> (state * bits)) & ((1 << bits) - 1)
+    else:
+        maps = np.where(up[order][:, None], inc, dec)
+        if update is not None:
+            maps = np.where(update[order][:, None], maps, ident)
+        apply = lambda m, state: m[np.arange(len(m)), state]
+
+    # Hillis-Steele segmented inclusive scan: maps[i] = m_i o ... o m_start
+    d = 1
+    longest = int(offset.max())
+    while d <= longest:
+        if bits <= 2:
+            head = np.take(compose, (maps[d:].astype(np.uint16) << code_bits) | maps[:-d])
+            np.copyto(head, maps[d:], where=offset[d:] < d)
+            maps[d:] = head
+        else:
+            head = np.take_along_axis(maps[d:], maps[:-d].astype(np.intp), axis=1)
+            maps[d:] = np.where((offset[d:] >= d)[:, None], head, maps[d:])
+        d *= 2
+
+    before = init.copy()
+    inner = np.nonzero(~seg_start)[0]
+    before[inner] = apply(maps[inner - 1], init[inner])
+    ends = np.nonzero(np.r_[seg_start[1:], True])[0]
+    table[idx[ends]] = apply(maps[ends], init[ends])
+
+    prediction = np.empty(n, dtype=bool)
+    prediction[order] = before >= (1 << (bits - 1))
+    return prediction
+
+
+def history(taken, bits, groups=None):
+    # Outcomes of the previous `bits` branches (of the same group), newest in
+    # bit 0; groups: segments() of the grouping key
+    n = len(taken)
+    dtype = np.uint32 if bits <= 32 else np.uint64
+    if groups is None:
+        t, offset = taken.astype(dtype), None
+    else:
+        order, _, offset = groups
+        t = taken[order].astype(dtype)
+    hist = np.zeros(n, dtype=dtype)
+    for j in range(1, min(bits, n - 1) + 1):
+        shifted = t[:-j] << dtype(j - 1)
+        if offset is not None:
+            shifted[offset[j:] < j] = 0
+        hist[j:] |= shifted
+    if groups is None:
+        return hist.astype(np.uint64)
+    result = np.empty(n, dtype=np.uint64)
+    result[order] = hist
+    return result
+
+
+class Model:
+    # Base: param parsing and per-batch carry of tables and histories
+    defaults = {}
+
+    def __init__(self, spec, **params):
+        self.spec = spec
+        self.params = dict(self.defaults, **params)
+        self.bits = self.params.get("bits", 2)
+        self.tail_pc = np.zeros(0, dtype=np.uint64)
+        self.tail_taken = np.zeros(0, dtype=bool)
+
+    def table(self, size):
+        # counters start weakly not taken
+        return np.full(size, (1 << (self.bits - 1)) - 1, dtype=np.uint8)
+
+    def with_tail(self, pc, taken):
+        # Prepend the previous batch's last branches so histories carry over
+        keep = self.params.get("hist", 0) + self.params.get("ghist", 0) + 1
+        full_pc = np.concatenate([self.tail_pc, pc])
+        full_taken = np.concatenate([self.tail_taken, taken])
+        skip = len(self.tail_pc)
+        self.tail_pc, self.tail_taken = full_pc[-keep:], full_taken[-keep:]
+        return full_pc, full_taken, skip
+
+
+class StaticModel(Model):
+    # always taken, or backward taken / forward not taken (needs targets)
+    def predict_batch(self, pc, taken, target):
+        if self.params.get("btfn"):
+            return target < pc
+        return np.ones(len(pc), dtype=bool)
+
+
+class BimodalModel(Model):
+    defaults = {"size": 4096, "bits": 2}
+
+    def __init__(self, spec, **params):
+        super().__init__(spec, **params)
+        self.counters = self.table(self.params["size"])
+
+    def predict_batch(self, pc, taken, target):
+        return scan_counters(pc % np.uint64(self.params["size"]), taken, self.counters, self.bits)
+
+
+class GshareModel(Model):
+    defaults = {"size": 16384, "hist": 14, "bits": 2}
+
+    def __init__(self, spec, **params):
+        super().__init__(spec, **params)
+        self.counters = self.table(self.params["size"])
+
+    def predict_batch(self, pc, taken, target):
+        full_pc, full_taken, skip = self.with_tail(pc, taken)
+        ghist = history(full_taken, self.params["hist"])[skip:]
+        index = (pc ^ ghist) % np.uint64(self.params["size"])
+        return scan_counters(index, taken, self.counters, self.bits)
+
+
+class LocalModel(Model):
+    # Two-level: per-branch history table (by pc) indexing a pattern table
+    defaults = {"size": 2048, "hist": 11, "bits": 2, "histories": 2048}
+
+    def __init__(self, spec, **params):
+        super().__init__(spec, **params)
+        self.counters = self.table(self.params["size"])
+        self.histories = np.zeros(self.params["histories"], dtype=np.uint64)
+
+    def local_history(self, pc, taken):
+        # Per-entry local histories, continued from the previous batch
+        bits = self.params["hist"]
+        mask = np.uint64((1 << bits) - 1)
+        entries = pc % np.uint64(self.params["histories"])
+        groups = segments(entries, self.params["histories"])
+        order, seg_start, offset = groups
+        hist = history(taken, bits, groups)
+        # occurrence number of each branch within its entry in this batch
+        seen = np.empty(len(pc), dtype=np.int64)
+        seen[order] = offset
+        carried = self.histories[entries] << np.minimum(seen, 63).astype(np.uint64)
+        hist = (hist | np.where(seen < bits, carried, np.uint64(0))) & mask
+        # history after each entry's last branch of this batch
+        after = ((hist << np.uint64(1)) | taken.astype(np.uint64)) & mask
+        last = order[np.nonzero(np.r_[seg_start[1:], True])[0]]
+        self.histories[entries[last]] = after[last]
+        return hist
+
+    def predict_batch(self, pc, taken, target):
+        hist = self.local_history(pc, taken)
+        return scan_counters(hist % np.uint64(self.params["size"]), taken, self.counters, self.bits)
+
+
+class TournamentModel(Model):
+    # Local two-level + global (history-indexed) + choice indexed by global history
+    defaults = {"local": 2048, "lhist": 11, "global": 8192, "ghist": 13, "choice": 8192, "bits": 2}
+
+    def __init__(self, spec, **params):
+        super().__init__(spec, **params)
+        p = self.params
+        self.local = LocalModel(spec, size=p["local"], hist=p["lhist"], histories=p["local"], bits=self.bits)
+        self.global_counters = self.table(p["global"])
+        self.choice = self.table(p["choice"])
+
+    def predict_batch(self, pc, taken, target):
+        p = self.params
+        local_pred = self.local.predict_batch(pc, taken, target)
+        full_pc, full_taken, skip = self.with_tail(pc, taken)
+        ghist = history(full_taken, p["ghist"])[skip:]
+        global_pred = scan_counters(ghist % np.uint64(p["global"]), taken, self.global_counters, self.bits)
+        # the choice counter moves towards global only when the two disagree
+        disagree = local_pred != global_pred
+        use_global = scan_counters(ghist % np.uint64(p["choice"]), global_pred == taken,
+                                   self.choice, self.bits, update=disagree)
+        return np.where(use_global, global_pred, local_pred)
+
+
+MODELS = {
+    "static": StaticModel,
+    "bimodal": BimodalModel,
+    "gshare": GshareModel,
+    "local": LocalModel,
+    "tournament": TournamentModel,
+}
+
+
+def parse_model(spec):
+    # "gshare:size=16384,hist=14" -> GshareModel
+    name, _, rest = spec.partition(":")
+    if name not in MODELS:
+        raise ValueError(f"Unknown model {name!r} (known: {', '.join(MODELS)})")
+    params = {}
+    for item in filter(None, rest.split(",")):
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid model parameter {item!r} in {spec!r}")
+        params[key] = int(value)
+    return MODELS[name](spec, **params)
+
+
+def replay_vectorized(model, pc, taken, target, batch):
+    mispredicts = 0
+    for start in range(0, len(pc), batch):
+        end = start + batch
+        prediction = model.predict_batch(pc[start:end], taken[start:end], target[start:end])
+        mispredicts += int(np.count_nonzero(prediction != taken[start:end]))
+    return mispredicts
+
+
+# ----------------------------------------------------------------
+# Reference replay (one branch at a time)
+# ----------------------------------------------------------------
+def replay_loop(model, pc, taken, target):
+    p = model.params
+    bits = model.bits
+    top = (1 << bits) - 1
+    weak = (1 << (bits - 1)) - 1
+    half = 1 << (bits - 1)
+
+    def step(table, i, up):
+        table[i] = min(table.get(i, weak) + 1, top) if up else max(table.get(i, weak) - 1, 0)
+
+    pcs, outcomes, targets = pc.tolist(), taken.tolist(), target.tolist()
+    kind = type(model)
+    tables = [{}, {}, {}]
+    ghist = 0
+    local_hist = {}
+    mispredicts = 0
+    for b, t, tgt in zip(pcs, outcomes, targets):
+        if kind is StaticModel:
+            pred = tgt < b if p.get("btfn") else True
+        elif kind is BimodalModel:
+            i = b % p["size"]
+            pred = tables[0].get(i, weak) >= half
+            step(tables[0], i, t)
+        elif kind is GshareModel:
+            i = (b ^ (ghist & ((1 << p["hist"]) - 1))) % p["size"]
+            pred = tables[0].get(i, weak) >= half
+            step(tables[0], i, t)
+        elif kind is LocalModel:
+            e = b % p["histories"]
+            i = local_hist.get(e, 0) % p["size"]
+            pred = tables[0].get(i, weak) >= half
+            step(tables[0], i, t)
+            local_hist[e] = ((local_hist.get(e, 0) << 1) | t) & ((1 << p["hist"]) - 1)
+        else:
+            e = b % p["local"]
+            li = local_hist.get(e, 0) % p["local"]
+            local_pred = tables[0].get(li, weak) >= half
+            g = ghist & ((1 << p["ghist"]) - 1)
+            gi = g % p["global"]
+            global_pred = tables[1].get(gi, weak) >= half
+            ci = g % p["choice"]
+            pred = global_pred if tables[2].get(ci, weak) >= half else local_pred
+            step(tables[0], li, t)
+            step(tables[1], gi, t)
+            if local_pred != global_pred:
+                step(tables[2], ci, global_pred == t)
+            local_hist[e] = ((local_hist.get(e, 0) << 1) | t) & ((1 << p["lhist"]) - 1)
+        ghist = (ghist << 1) | t
+        mispredicts += pred != t
+    return mispredicts
+
+
+# ----------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------
+def cmd_record(args):
+    outdir = args.workdir or os.path.splitext(args.out)[0] + ".m5out"
+    exec_trace = os.path.join(outdir, "exec.trace.gz")
+    cmd = [args.gem5, "-re", f"--outdir={outdir}", f"--debug-flags={EXEC_FLAGS}",
+           "--debug-file=exec.trace.gz", args.se_script, "--cpu-type=AtomicSimpleCPU",
+           f"--cmd={args.bench}"]
+    if args.bench_args:
+        cmd.append(f"--options={args.bench_args}")
+    if args.max_insts:
+        cmd.append(f"--maxinsts={args.max_insts}")
+    os.makedirs(outdir, exist_ok=True)
+    print("Recording:", " ".join(cmd))
+    proc = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL)
+    if proc.returncode != 0 or not os.path.exists(exec_trace):
+        sys.exit(f"gem5 failed (rc={proc.returncode}); see {outdir}/simerr")
+    branches, insts = convert(exec_trace, args.out)
+    if branches == 0:
+        sys.exit(f"No branches in the Exec trace ({insts} instructions); kept {exec_trace} "
+                 f"for inspection")
+    if not args.keep_exec_trace:
+        os.remove(exec_trace)
+    print(f"Wrote {branches} branches ({insts} instructions) to {args.out}")
+
+
+def cmd_convert(args):
+    branches, insts = convert(args.exec_trace, args.out)
+    print(f"Wrote {branches} branches ({insts} instructions) to {args.out}")
+
+
+def cmd_info(args):
+    trace = load_trace(args.trace)
+    kind = trace["kind"]
+    print(f"instructions: {trace['meta']['insts']}")
+    print(f"branches:     {len(kind)}")
+    for code, name in KINDS.items():
+        mask = kind == code
+        if mask.any():
+            print(f"  {name:<9} {int(mask.sum()):>12}  taken {trace['taken'][mask].mean():.3f}")
+    print(f"static conditional branches: {len(np.unique(trace['pc'][kind == COND]))}")
+
+
+def conditional_branches(path):
+    trace = load_trace(path)
+    cond = trace["kind"] == COND
+    return trace["pc"][cond], trace["taken"][cond], trace["target"][cond], trace["meta"]["insts"]
+
+
+def replay_model(path, spec, engine, batch):
+    # One model over one trace: (mispredicts, host seconds); runs in a worker process
+    pc, taken, target, _ = conditional_branches(path)
+    model = parse_model(spec)
+    start = time.time()
+    if engine == "loop":
+        mispredicts = replay_loop(model, pc, taken, target)
+    else:
+        mispredicts = replay_vectorized(model, pc, taken, target, batch)
+    return mispredicts, time.time() - start
+
+
+def cmd_replay(args):
+    for spec in args.model:
+        try:
+            parse_model(spec)
+        except ValueError as e:
+            sys.exit(str(e))
+    pc, _, _, insts = conditional_branches(args.trace)
+    insts = insts or 1
+    print(f"{len(pc)} conditional branches, {insts} instructions ({args.engine} engine)")
+    print(f"{'model':<48} {'mispred':>10} {'MPKI':>8} {'acc':>7} {'Mbr/s':>8}")
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, len(args.model)))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(replay_model, args.trace, spec, args.engine, args.batch)
+                   for spec in args.model]
+        for spec, future in zip(args.model, futures):
+            mispredicts, seconds = future.result()
+            accuracy = 1 - mispredicts / len(pc) if len(pc) else float("nan")
+            print(f"{spec:<48} {mispredicts:>10} {mispredicts * 1000 / insts:>8.3f} "
+                  f"{accuracy:>7.4f} {len(pc) / max(seconds, 1e-9) / 1e6:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Branch trace recording and predictor replay")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    record = sub.add_parser("record", help="Run gem5 once and record the committed branch trace")
+    record.add_argument("--gem5", type=str, default="build/X86/gem5.opt", help="gem5 binary")
+    record.add_argument("--se-script", type=str, default=os.path.join(HERE, "se.py"), help="se.py to drive")
+    record.add_argument("--bench", type=str, required=True, help="Benchmark binary")
+    record.add_argument("--bench-args", type=str, default="", help="Benchmark arguments")
+    record.add_argument("--max-insts", type=int, default=None, help="Stop after this many instructions")
+    record.add_argument("--out", type=str, required=True, help="Branch trace (.npz)")
+    record.add_argument("--workdir", type=str, default=None, help="gem5 outdir (default: <out>.m5out)")
+    record.add_argument("--keep-exec-trace", action="store_true", help="Keep the (large) Exec debug trace")
+
+    conv = sub.add_parser("convert", help="Convert an existing Exec debug trace")
+    conv.add_argument("exec_trace", help=f"gem5 --debug-flags={EXEC_FLAGS} output (.gz ok)")
+    conv.add_argument("--out", type=str, required=True, help="Branch trace (.npz)")
+
+    info = sub.add_parser("info", help="Summarize a branch trace")
+    info.add_argument("trace")
+
+    replay = sub.add_parser("replay", help="Replay a branch trace through predictor models")
+    replay.add_argument("trace")
+    replay.add_argument("--model", action="append", required=True,
+                        help="Model spec, e.g. bimodal:size=4096 or gshare:size=16384,hist=14 "
+                             f"(repeatable; models: {', '.join(MODELS)})")
+    replay.add_argument("--engine", choices=["vector", "loop"], default="vector",
+                        help="numpy prefix-scan replay or the one-branch-at-a-time reference")
+    replay.add_argument("--batch", type=int, default=1 << 20, help="Branches per vectorized batch")
+    replay.add_argument("--jobs", type=int, default=None, help="Models replayed in parallel (default: cores)")
+
+    args = parser.parse_args()
+    {"record": cmd_record, "convert": cmd_convert, "info": cmd_info, "replay": cmd_replay}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,25 @@
+import argparse
 import m5
-from m5.objects import *
+from m5.objects import Root
 import os
 
+from system_builder import SystemConfig, add_memory_options, build_system, memory_fields
 
-system = System()
-system.clk_domain = SrcClockDomain(clock='1GHz', voltage_domain=VoltageDomain())
-system.mem_mode = 'timing'
-system.mem_ranges = [AddrRange('512MB')]
+# SimpleMemory by default; --mem-type/--mem-channels match the superscalar configs' backends
+parser = argparse.ArgumentParser()
+add_memory_options(parser, mem_type="SimpleMemory")
+args = parser.parse_args()
 
-# CPU
-system.cpu = TimingSimpleCPU()
-system.cpu.createInterruptController()
 
-# System bus
-system.membus = SystemXBar()
-system.cpu.icache_port = system.membus.cpu_side_ports
-system.cpu.dcache_port = system.membus.cpu_side_ports
-
-# Simple memory
-system.mem_ctrl = SimpleMemory()
-system.mem_ctrl.range = system.mem_ranges[0]
-system.mem_ctrl.port = system.membus.mem_side_ports
-
-# Connect the interrupt controller to the memory bus
-if hasattr(system.cpu, "interrupts"):
-    system.cpu.interrupts[0].pio = system.membus.mem_side_ports
-    system.cpu.interrupts[0].int_requestor = system.membus.cpu_side_ports
-    system.cpu.interrupts[0].int_responder = system.membus.mem_side_ports
+# Timing simple CPU with simple memory
+config = SystemConfig(cpu_type="TimingSimpleCPU", clock="1GHz", **memory_fields(args))
 
 # Workload
 hello_path = os.path.abspath("./tests/test-progs/hello/bin/x86/linux/hello")
 assert os.path.exists(hello_path), f"{hello_path} not found"
 assert os.access(hello_path, os.X_OK), f"{hello_path} not executable"
 
-system.workload = SEWorkload.init_compatible(hello_path)
-
-process = Process()
-process.cmd = [hello_path]
-system.cpu.workload = process
-system.cpu.createThreads()
+system = build_system(config, [hello_path])
 
 # Root and instantiate
 root = Root(full_system=False, system=system)
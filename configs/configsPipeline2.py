@@ -1,36 +1,17 @@
+import argparse
 import m5
-from m5.objects import *
+from m5.objects import Root
 
-# Create the system
-system = System()
-system.clk_domain = SrcClockDomain()
-system.clk_domain.clock = '1GHz'
-system.clk_domain.voltage_domain = VoltageDomain()
-system.mem_mode = 'timing'
-system.mem_ranges = [AddrRange('512MB')]
+from system_builder import SystemConfig, add_memory_options, build_system, memory_fields
 
-# Create CPU
-system.cpu = MinorCPU()
+# SimpleMemory by default; --mem-type/--mem-channels match the superscalar configs' backends
+parser = argparse.ArgumentParser()
+add_memory_options(parser, mem_type="SimpleMemory")
+args = parser.parse_args()
 
-# Create memory bus
-system.membus = SystemXBar()
-
-# Connect CPU ports to memory bus
-system.cpu.icache_port = system.membus.cpu_side_ports
-system.cpu.dcache_port = system.membus.cpu_side_ports
-
-# Create memory controller
-system.mem_ctrl = SimpleMemory()
-system.mem_ctrl.range = system.mem_ranges[0]
-system.mem_ctrl.port = system.membus.mem_side_ports
-
-# Create interrupt controller
-system.cpu.createInterruptController()
-
-# Create process
-process = Process()
-process.cmd = ['tests/test-progs/hello/bin/x86/linux/hello']
-system.cpu.workload = process
+# Create the system: MinorCPU with simple memory
+config = SystemConfig(cpu_type="MinorCPU", clock="1GHz", **memory_fields(args))
+system = build_system(config, ['tests/test-progs/hello/bin/x86/linux/hello'])
 
 # Create root
 root = Root(full_system=False, system=system)
@@ -39,4 +20,4 @@ root = Root(full_system=False, system=system)
 m5.instantiate()
 print("Starting simulation...")
 exit_event = m5.simulate()
-print(f"Exited at tick {m5.curTick()} because {exit_event.getCause()}")
\ No newline at end of file
+print(f"Exited at tick {m5.curTick()} because {exit_event.getCause()}")
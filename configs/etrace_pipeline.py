@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+etrace_pipeline.py
+
+Elastic-trace flow: capture the instruction fetch and data dependency
+traces of a benchmark once from a detailed O3 run (se.py --elastic-trace-en,
+i.e. CpuConfig.config_etrace), then replay them on TraceCPU
+(configs/example/etrace_replay.py) against many memory-system variants in
+parallel, without re-simulating the core.
+
+Stages (run all of them with "all", or one at a time):
+  capture  se.py --cpu-type=DerivO3CPU --caches --elastic-trace-en
+           -> capture/fetchtrace.proto.gz, capture/deptrace.proto.gz
+  replay   TraceCPU on every combination of --mem-type x --l1d-size x
+           --l2-size, in parallel (bounded by cores and RAM)
+  report   simulated time, cycles, DRAM bandwidth and L2 miss rate per variant
+
+Capture uses the minimal memory system se.py enforces for elastic traces
+(L1s only, SimpleMemory), so the recorded compute delays exclude memory
+latency; replays add the real hierarchy back.
+
+Run with the host python from the gem5 root, e.g.:
+  python3 experiments/configs/etrace_pipeline.py all --gem5=build/X86/gem5.opt \
+    --bench=vector --workdir=out/etrace/vector --mem-type=DDR3_1600_8x8 \
+    --mem-type=DDR4_2400_8x8 --mem-type=LPDDR3_1600_1x32 --l2-size=256kB --l2-size=1MB
+"""
+
+import argparse
+import concurrent.futures
+import itertools
+import json
+import os
+import re
+import subprocess
+import sys
+
+from gem5stats import get_stat, read_stats
+from sweep import default_jobs, parse_exit_cause
+from system_builder import GEM5_CONFIGS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+INST_TRACE = "fetchtrace.proto.gz"
+DATA_TRACE = "deptrace.proto.gz"
+
+
+def run_gem5(args, outdir, script, script_args):
+    cmd = [args.gem5, "-re", f"--outdir={outdir}", script] + script_args
+    os.makedirs(outdir, exist_ok=True)
+    proc = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL)
+    return proc.returncode, cmd
+
+
+def workpath(args, *parts):
+    return os.path.join(args.workdir, *parts)
+
+
+def trace_files(args):
+    return (workpath(args, "capture", INST_TRACE), workpath(args, "capture", DATA_TRACE))
+
+
+# ----------------------------------------------------------------
+# capture
+# ----------------------------------------------------------------
+def stage_capture(args):
+    inst_trace, data_trace = trace_files(args)
+    if os.path.exists(inst_trace) and os.path.exists(data_trace) and not args.force:
+        print(f"Reusing traces in {os.path.dirname(inst_trace)} (--force to recapture)")
+        return
+    se_args = ["--cpu-type=DerivO3CPU", "--caches", "--mem-type=SimpleMemory",
+               f"--mem-size={args.mem_size}", "--elastic-trace-en",
+               f"--inst-trace-file={INST_TRACE}", f"--data-trace-file={DATA_TRACE}",
+               f"--cmd={args.bench}"]
+    if args.bench_args:
+        se_args.append(f"--options={args.bench_args}")
+    if args.max_insts:
+        se_args.append(f"--maxinsts={args.max_insts}")
+    rc, cmd = run_gem5(args, workpath(args, "capture"), args.se_script, se_args)
+    if rc != 0 or not (os.path.exists(inst_trace) and os.path.exists(data_trace)):
+        sys.exit(f"Trace capture failed (rc={rc}): {' '.join(cmd)}")
+    print(f"Elastic traces written to {os.path.dirname(inst_trace)}")
+
+
+# ----------------------------------------------------------------
+# replay
+# ----------------------------------------------------------------
+def variants(args):
+    # Every memory-system combination; the name is its output directory
+    for mem_type, l1d, l2 in itertools.product(args.mem_type, args.l1d_size, args.l2_size):
+        name = re.sub(r"[^A-Za-z0-9_.+-]", "_", f"{mem_type}-l1d_{l1d}-l2_{l2}")
+        yield name, {"mem_type": mem_type, "l1d_size": l1d, "l2_size": l2}
+
+
+def stage_replay(args):
+    inst_trace, data_trace = trace_files(args)
+    if not (os.path.exists(inst_trace) and os.path.exists(data_trace)):
+        sys.exit("No elastic traces; run the capture stage first")
+    todo = list(variants(args))
+
+    def replay(name, variant):
+        outdir = workpath(args, "replay", name)
+        script_args = ["--cpu-type=TraceCPU", f"--inst-trace-file={os.path.abspath(inst_trace)}",
+                       f"--data-trace-file={os.path.abspath(data_trace)}",
+                       f"--mem-size={args.mem_size}", f"--mem-type={variant['mem_type']}",
+                       "--caches", "--l2cache", f"--l1d_size={variant['l1d_size']}",
+                       f"--l2_size={variant['l2_size']}"]
+        rc, cmd = run_gem5(args, outdir, args.replay_script, script_args)
+        return {"name": name, "variant": variant, "outdir": outdir, "returncode": rc,
+                "exit_cause": parse_exit_cause(os.path.join(outdir, "simout")), "command": cmd}
+
+    jobs = args.jobs or default_jobs([{"memsize": args.mem_size}] * len(todo))
+    print(f"Replaying {len(todo)} memory variants with {jobs} concurrent jobs")
+    results = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(replay, name, variant) for name, variant in todo]
+        for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            result = future.result()
+            status = "ok" if result["returncode"] == 0 else f"FAILED rc={result['returncode']}"
+            print(f"[{done}/{len(todo)}] {result['name']}: {status}")
+            results.append(result)
+    results.sort(key=lambda r: r["name"])
+    with open(workpath(args, "replay", "replay.json"), "w") as f:
+        json.dump(results, f, indent=2)
+
+
+# ----------------------------------------------------------------
+# report
+# ----------------------------------------------------------------
+def variant_summary(stats_file):
+    stats = read_stats(stats_file)[-1]
+    return {
+        "sim_seconds": get_stat(stats, "simSeconds", "sim_seconds"),
+        "cycles": get_stat(stats, "system.cpu.numCycles"),
+        "cpi": get_stat(stats, "system.cpu.cpi"),
+        "dram_bw": get_stat(stats, "system.mem_ctrls.dram.bwTotal::total", "system.mem_ctrls.bwTotal::total",
+                            "system.mem_ctrls.bw_total::total"),
+        "l2_miss_rate": get_stat(stats, "system.l2.overallMissRate::total", "system.l2.overall_miss_rate::total"),
+    }
+
+
+def stage_report(args):
+    try:
+        with open(workpath(args, "replay", "replay.json")) as f:
+            results = json.load(f)
+    except OSError:
+        sys.exit("No replay results; run the replay stage first")
+    rows = []
+    for result in results:
+        stats_file = os.path.join(result["outdir"], "stats.txt")
+        if result["returncode"] != 0 or not os.path.exists(stats_file):
+            print(f"Warning: {result['name']} failed, see {result['outdir']}/simerr", file=sys.stderr)
+            continue
+        rows.append(dict(result["variant"], name=result["name"], **variant_summary(stats_file)))
+    print(f"{'mem_type':<22} {'l1d':>6} {'l2':>6} {'sim s':>11} {'cycles':>12} {'CPI':>7} "
+          f"{'DRAM GB/s':>10} {'L2 miss':>8}")
+    for row in sorted(rows, key=lambda r: r["sim_seconds"]):
+        print(f"{row['mem_type']:<22} {row['l1d_size']:>6} {row['l2_size']:>6} {row['sim_seconds']:>11.6f} "
+              f"{row['cycles']:>12.0f} {row['cpi']:>7.3f} {row['dram_bw'] / 1e9:>10.3f} {row['l2_miss_rate']:>8.4f}")
+    with open(workpath(args, "etrace_report.json"), "w") as f:
+        json.dump(rows, f, indent=2)
+
+
+STAGES = {
+    "capture": stage_capture,
+    "replay": stage_replay,
+    "report": stage_report,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Elastic trace capture and TraceCPU replay pipeline")
+    parser.add_argument("stage", choices=list(STAGES) + ["all"])
+    parser.add_argument("--gem5", type=str, default="build/X86/gem5.opt", help="gem5 binary")
+    parser.add_argument("--se-script", type=str, default=os.path.join(HERE, "se.py"), help="se.py to drive")
+    parser.add_argument("--replay-script", type=str,
+                        default=os.path.join(GEM5_CONFIGS, "example", "etrace_replay.py"),
+                        help="gem5's etrace_replay.py")
+    parser.add_argument("--bench", type=str, required=True, help="Benchmark binary")
+    parser.add_argument("--bench-args", type=str, default="", help="Benchmark arguments")
+    parser.add_argument("--workdir", type=str, required=True, help="Directory for all stage outputs")
+    parser.add_argument("--max-insts", type=int, default=None, help="Stop the capture after this many instructions")
+    parser.add_argument("--mem-size", type=str, default="512MB", help="Physical memory size")
+    parser.add_argument("--mem-type", action="append", default=None,
+                        help="Memory controller/DRAM for the replays (repeatable; default DDR3_1600_8x8)")
+    parser.add_argument("--l1d-size", action="append", default=None, help="L1D size (repeatable; default 64kB)")
+    parser.add_argument("--l2-size", action="append", default=None, help="L2 size (repeatable; default 2MB)")
+    parser.add_argument("--jobs", type=int, default=None, help="Concurrent replays")
+    parser.add_argument("--force", action="store_true", help="Recapture even if traces exist")
+    args = parser.parse_args()
+
+    args.mem_type = args.mem_type or ["DDR3_1600_8x8"]
+    args.l1d_size = args.l1d_size or ["64kB"]
+    args.l2_size = args.l2_size or ["2MB"]
+    os.makedirs(args.workdir, exist_ok=True)
+    stages = list(STAGES) if args.stage == "all" else [args.stage]
+    for stage in stages:
+        print(f"== {stage}")
+        STAGES[stage](args)
+
+
+if __name__ == "__main__":
+    main()
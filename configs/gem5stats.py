@@ -0,0 +1,70 @@
+"""
+gem5stats.py
+
+Helpers for reading gem5 text stats (stats.txt) outside the simulator.
+
+iter_dumps() streams a stats file line by line and yields one
+{stat name: value} dict per "Begin/End Simulation Statistics" block, so
+periodic dumps in a multi-hundred-MB file never have to be held in memory
+at once. Gzipped files (stats.txt.gz) are read transparently.
+"""
+
+import gzip
+
+BEGIN_MARKER = "---------- Begin Simulation Statistics ----------"
+END_MARKER = "---------- End Simulation Statistics"
+
+
+def parse_value(text):
+    # gem5 prints ints, floats, nan/inf and "-nan"
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            return None
+
+
+def stat_selector(select):
+    # None -> everything; callable -> as is; names/prefixes ending in "." -> match
+    if select is None or callable(select):
+        return select
+    names = set(select)
+    prefixes = tuple(n for n in names if n.endswith((".", "::")))
+    return lambda name: name in names or bool(prefixes) and name.startswith(prefixes)
+
+
+def iter_dumps(path, select=None):
+    # Yields one {stat name: value} dict per dump block, in file order
+    keep = stat_selector(select)
+    opener = gzip.open if str(path).endswith(".gz") else open
+    current = None
+    with opener(path, "rt") as f:
+        for line in f:
+            if line.startswith(BEGIN_MARKER):
+                current = {}
+            elif line.startswith(END_MARKER):
+                if current is not None:
+                    yield current
+                current = None
+            elif current is not None:
+                fields = line.split("#", 1)[0].split()
+                if len(fields) < 2 or (keep is not None and not keep(fields[0])):
+                    continue
+                value = parse_value(fields[1])
+                if value is not None:
+                    current[fields[0]] = value
+
+
+def read_stats(path, select=None):
+    # Returns one {stat name: value} dict per dump block in the file
+    return list(iter_dumps(path, select))
+
+
+def get_stat(stats, *names, default=float("nan")):
+    # First stat present under any of the given names (they vary across gem5 versions)
+    for name in names:
+        if name in stats:
+            return stats[name]
+    return default
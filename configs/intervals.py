@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+intervals.py
+
+Interval (phase) statistics: dump and reset the stats every N committed
+instructions, every N ticks, or at every m5_work_begin/m5_work_end op, and
+keep a compact time series instead of one text block per interval.
+
+Inside gem5 the selected stats of each interval are read in-process
+(m5.stats.gem5stats) and stored as one row per interval in a columnar .npz
+(stats_store.StatsStore format: one run, one dump index per interval), then
+the stats are reset. Builds without the Python stats API fall back to
+m5.stats.dump() into stats.txt, which "convert" turns into the same .npz.
+
+  build/X86/gem5.opt --outdir=out/vec experiments/configs/se_superscalar_v25.py \
+    --bench=vector --width=4 --interval-insts=1000000
+  python3 experiments/configs/intervals.py show out/vec/intervals.npz
+  python3 experiments/configs/intervals.py convert out/old/stats.txt
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+
+INTERVAL_CAUSE = "stats interval"
+LIMIT_CAUSE = "simulate() limit reached"
+WORK_CAUSES = ("workbegin", "workend")
+DEFAULT_OUT = "intervals.npz"
+
+# Kept per interval unless --interval-stats is given ("." / "::" suffix: prefix)
+DEFAULT_STATS = (
+    "simTicks",
+    "simInsts",
+    "system.cpu.numCycles",
+    "system.cpu.ipc",
+    "system.cpu.cpi",
+    "system.cpu.committedInsts",
+    "system.cpu.commitStats0.numInsts",
+    "system.cpu.branchPred.condPredicted",
+    "system.cpu.branchPred.condIncorrect",
+    "system.cpu.commit.branchMispredicts",
+    "system.cpu.iew.lsqFullEvents",
+    "system.cpu.rename.LQFullEvents",
+    "system.cpu.rename.SQFullEvents",
+    "system.cpu.rob.reads",
+    "system.cpu.lsq0.",
+    "system.cpu.dcache.demandMisses::total",
+    "system.cpu.dcache.demandAccesses::total",
+    "system.ff_cpu.dcache.demandMisses::total",
+    "system.ff_cpu.dcache.demandAccesses::total",
+    # top-down CPI stack inputs (topdown.py intervals)
+    "system.cpu.commitStats0.numOps",
+    "system.cpu.commit.committedOps",
+    "system.cpu.rename.",
+    "system.cpu.dcache.demandMshrMissLatency::total",
+    "system.ff_cpu.dcache.demandMshrMissLatency::total",
+)
+
+# Columns of the "show" table: (header, numerator stats, denominator stats)
+SHOW_COLUMNS = (
+    ("ipc", ("system.cpu.ipc",), None),
+    ("mpki", ("system.cpu.branchPred.condIncorrect", "system.cpu.commit.branchMispredicts"),
+     ("system.cpu.commitStats0.numInsts", "system.cpu.committedInsts", "simInsts")),
+    ("lsq_full_pki", ("system.cpu.iew.lsqFullEvents",),
+     ("system.cpu.commitStats0.numInsts", "system.cpu.committedInsts", "simInsts")),
+    ("l1d_mpki", ("system.cpu.dcache.demandMisses::total", "system.ff_cpu.dcache.demandMisses::total"),
+     ("system.cpu.commitStats0.numInsts", "system.cpu.committedInsts", "simInsts")),
+)
+
+
+def add_interval_options(parser):
+    group = parser.add_argument_group("interval statistics")
+    group.add_argument("--interval-insts", type=int, default=None,
+                       help="Dump and reset stats every N committed instructions")
+    group.add_argument("--interval-ticks", type=int, default=None,
+                       help="Dump and reset stats every N ticks")
+    group.add_argument("--interval-work-items", action="store_true",
+                       help="Dump and reset stats at every m5_work_begin/m5_work_end op")
+    group.add_argument("--interval-out", type=str, default=None,
+                       help=f"Interval time series (default: <outdir>/{DEFAULT_OUT})")
+    group.add_argument("--interval-stats", action="append", default=None,
+                       help="Stat kept per interval (repeatable; trailing '.' selects a prefix)")
+    return group
+
+
+def interval_mode(args):
+    return bool(args.interval_insts or args.interval_ticks or args.interval_work_items)
+
+
+def flatten_simstat(node, name, out):
+    # m5.stats.gem5stats JSON -> {stats.txt style name: value}
+    if isinstance(node, (int, float)) and not isinstance(node, bool):
+        out[name] = node
+        return
+    if not isinstance(node, dict):
+        return
+    kind = node.get("type")
+    if kind == "Scalar":
+        if isinstance(node.get("value"), (int, float)):
+            out[name] = node["value"]
+        return
+    if kind == "Vector":
+        values = node.get("value", {})
+        items = values.items() if isinstance(values, dict) else enumerate(values)
+        for sub, child in items:
+            flatten_simstat(child, f"{name}::{sub}", out)
+        return
+    if kind == "Distribution":
+        for field in ("mean", "stdev", "min", "max", "num_samples"):
+            if isinstance(node.get(field), (int, float)):
+                out[f"{name}::{field}"] = node[field]
+        return
+    for key, child in node.items():
+        if key in ("type", "unit", "description", "datatype"):
+            continue
+        flatten_simstat(child, f"{name}.{key}" if name else key, out)
+
+
+class IntervalRecorder:
+    def __init__(self, system, path, select=None):
+        from gem5stats import stat_selector
+        from stats_store import StatsStoreBuilder
+
+        self.system = system
+        self.path = path
+        self.keep = stat_selector(select or DEFAULT_STATS)
+        self.builder = StatsStoreBuilder()
+        self.causes = []
+        self.ticks = []
+        self.start_tick = None
+        try:
+            from m5.stats.gem5stats import get_simstat
+            self._get_simstat = get_simstat
+        except ImportError:
+            print("Warning: no m5.stats.gem5stats in this gem5; intervals are dumped to stats.txt "
+                  "(convert them with intervals.py convert)", file=sys.stderr)
+            self._get_simstat = None
+
+    def record(self, cause):
+        import m5
+
+        tick = m5.curTick()
+        if self._get_simstat is None:
+            m5.stats.dump()
+        else:
+            simstat = self._get_simstat([self.system], prepare_stats=True)
+            stats = {}
+            flatten_simstat(json.loads(simstat.to_json()), "", stats)
+            stats = {k: v for k, v in stats.items() if self.keep(k)}
+            stats["interval.startTick"] = self.start_tick if self.start_tick is not None else 0
+            stats["interval.endTick"] = tick
+            self.builder.add_dump("run", len(self.causes), stats)
+        self.causes.append(cause)
+        self.ticks.append(tick)
+        self.start_tick = tick
+        m5.stats.reset()
+
+    def save(self):
+        if self._get_simstat is None or not self.causes:
+            return
+        self.builder.meta["run"] = {"causes": self.causes, "ticks": self.ticks}
+        try:
+            self.builder.meta["run"]["width"] = int(self.system.cpu.commitWidth)
+        except (AttributeError, TypeError, ValueError):
+            pass
+        self.builder.save(self.path)
+        print(f"Wrote {len(self.causes)} intervals to {self.path}")
+
+
+def run_intervals(args, system, simulate=None):
+    # Simulates to the end of the program, recording an interval at every
+    # boundary; returns the final exit event. With --interval-work-items,
+    # system.exit_on_work_items must be set before m5.instantiate().
+    import m5
+
+    simulate = simulate or m5.simulate
+    path = args.interval_out or os.path.join(m5.options.outdir, DEFAULT_OUT)
+    recorder = IntervalRecorder(system, path, args.interval_stats)
+    recorder.start_tick = m5.curTick()
+    stop_pending = False
+    while True:
+        if args.interval_insts and not stop_pending:
+            system.cpu.scheduleInstStop(0, args.interval_insts, INTERVAL_CAUSE)
+            stop_pending = True
+        if args.interval_ticks:
+            exit_event = simulate(args.interval_ticks)
+        else:
+            exit_event = simulate()
+        cause = exit_event.getCause()
+        if cause == INTERVAL_CAUSE:
+            stop_pending = False
+        if cause in (INTERVAL_CAUSE, LIMIT_CAUSE) or (args.interval_work_items and cause in WORK_CAUSES):
+            recorder.record(cause)
+            continue
+        # the tail since the last boundary is the final interval
+        recorder.record(cause)
+        recorder.save()
+        return exit_event
+
+
+def convert(stats_file, out, select=None):
+    # Periodic text dumps in stats.txt -> interval .npz
+    from gem5stats import iter_dumps
+    from stats_store import StatsStoreBuilder
+
+    builder = StatsStoreBuilder()
+    builder.add_run("run", iter_dumps(stats_file, select or DEFAULT_STATS))
+    builder.save(out)
+    return builder.rows
+
+
+def ratio(columns, numerators, denominators):
+    import numpy as np
+
+    def first(names):
+        for name in names:
+            if name in columns and not np.all(np.isnan(columns[name])):
+                return columns[name]
+        return None
+
+    num = first(numerators)
+    if num is None:
+        return None
+    if denominators is None:
+        return num
+    den = first(denominators)
+    if den is None:
+        return None
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return num * 1000.0 / den
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Interval statistics time series")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="Turn periodic stats.txt dumps into an interval .npz")
+    conv.add_argument("stats_file", help="stats.txt (or .gz) with one dump per interval")
+    conv.add_argument("--out", type=str, default=None, help=f"Output (default: next to stats_file, {DEFAULT_OUT})")
+    conv.add_argument("--select", action="append", default=None, help="Stat to keep (repeatable)")
+    show = sub.add_parser("show", help="Per-interval IPC, MPKI and LSQ pressure")
+    show.add_argument("store", help="Interval .npz")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        out = args.out or os.path.join(os.path.dirname(os.path.abspath(args.stats_file)), DEFAULT_OUT)
+        print(f"Wrote {convert(args.stats_file, out, args.select)} intervals to {out}")
+        return
+
+    from stats_store import StatsStore
+    store = StatsStore(args.store)
+    columns = store.columns(store.names)
+    series = [(header, ratio(columns, num, den)) for header, num, den in SHOW_COLUMNS]
+    series = [(header, values) for header, values in series if values is not None]
+    print("\t".join(["interval"] + [header for header, _ in series]))
+    for i, index in enumerate(store.dump_index):
+        print("\t".join([str(index)] + [
+            "-" if math.isnan(values[i]) else f"{values[i]:.3f}" for _, values in series]))
+
+
+if __name__ == "__main__":
+    main()
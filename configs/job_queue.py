@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+job_queue.py
+
+Persistent, resumable job queue for sweep points, kept in a local SQLite
+database. Every sweep point is one job row recording its config hash,
+state (pending, running, done, quarantined), attempts, host, wall time,
+peak RSS, exit cause and any "Warning: couldn't attach ..." fallbacks the
+config script printed. Workers claim jobs atomically, so several worker
+processes can share one database; after a reboot, re-running the same
+command resumes only the jobs that are not done.
+
+A crashed point (non-zero exit) goes back to pending with exponential
+backoff (--backoff * 2^(attempts-1) seconds). A point that fails twice
+with the same signature (return code, exit cause and last simerr line),
+or that reaches --max-attempts, is quarantined and no longer retried.
+
+Run with the host python (not gem5), e.g. from the gem5 root:
+  python3 experiments/configs/sweep.py --gem5=build/X86/gem5.opt \
+    --bench=suite:stride --grid width=1,2,4,8 --outdir=out/width_sweep \
+    --queue=out/width_sweep/jobs.db
+  python3 experiments/configs/job_queue.py work --db=out/width_sweep/jobs.db --jobs=8
+  python3 experiments/configs/job_queue.py status --db=out/width_sweep/jobs.db
+  python3 experiments/configs/job_queue.py retry --db=out/width_sweep/jobs.db
+  python3 experiments/configs/job_queue.py export --db=out/width_sweep/jobs.db \
+    --output=out/width_sweep/sweep.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+from result_cache import ResultCache
+from sweep import (cache_lookup, parse_exit_cause, point_command, point_name,
+                   read_selfcheck)
+
+STATES = ["pending", "running", "done", "quarantined"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    point TEXT NOT NULL,
+    command TEXT NOT NULL,
+    outdir TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    config TEXT,
+    cache_dir TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_try REAL NOT NULL DEFAULT 0,
+    host TEXT,
+    worker TEXT,
+    worker_pid INTEGER,
+    started REAL,
+    heartbeat REAL,
+    finished REAL,
+    wall_seconds REAL,
+    peak_rss_kb INTEGER,
+    returncode INTEGER,
+    exit_cause TEXT,
+    selfcheck TEXT,
+    warnings TEXT,
+    failure TEXT,
+    cached INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, next_try);
+CREATE TABLE IF NOT EXISTS attempts (
+    job_id INTEGER NOT NULL REFERENCES jobs (id),
+    attempt INTEGER NOT NULL,
+    host TEXT,
+    worker TEXT,
+    started REAL,
+    wall_seconds REAL,
+    peak_rss_kb INTEGER,
+    returncode INTEGER,
+    exit_cause TEXT,
+    failure TEXT
+);
+"""
+
+HOST = socket.gethostname()
+
+
+def job_warnings(outdir):
+    # "Warning: couldn't ..." fallbacks of system_builder.py, from simerr and simout
+    found = []
+    for name in ("simerr", "simout"):
+        try:
+            with open(os.path.join(outdir, name), errors="replace") as f:
+                found += [line.strip() for line in f if line.startswith("Warning: couldn't")]
+        except OSError:
+            continue
+    return found
+
+
+def last_error_line(outdir):
+    # Last non-empty simerr line, the most specific part of a failure signature
+    try:
+        with open(os.path.join(outdir, "simerr"), errors="replace") as f:
+            lines = [line.strip() for line in f if line.strip()]
+    except OSError:
+        return ""
+    return lines[-1] if lines else ""
+
+
+def failure_signature(returncode, exit_cause, outdir):
+    # Equal signatures on consecutive attempts mark a deterministic failure
+    return f"rc={returncode} cause={exit_cause} err={last_error_line(outdir)}"
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobQueue:
+    # One SQLite database; a fresh connection per call so threads and processes can share it
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self.connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+
+    def connect(self):
+        db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        db.execute("PRAGMA busy_timeout=60000")
+        return _Connection(db)
+
+    def submit(self, jobs):
+        # jobs: dicts with name, point, command, outdir, config_hash, config, cache_dir.
+        # Known names are left alone unless their config hash changed, which re-runs them.
+        added = reset = 0
+        now = time.time()
+        with self.connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            for job in jobs:
+                row = db.execute("SELECT id, config_hash FROM jobs WHERE name = ?",
+                                 (job["name"],)).fetchone()
+                values = (json.dumps(job["point"], sort_keys=True), json.dumps(job["command"]),
+                          job["outdir"], job["config_hash"],
+                          json.dumps(job["config"]) if job["config"] is not None else None,
+                          job["cache_dir"])
+                if row is None:
+                    db.execute("INSERT INTO jobs (point, command, outdir, config_hash, config, "
+                               "cache_dir, name, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                               values + (job["name"], now))
+                    added += 1
+                elif row["config_hash"] != job["config_hash"]:
+                    # Clearing the worker disowns a copy still running the old config:
+                    # its heartbeat reports the job lost and its finish() matches nothing
+                    db.execute("UPDATE jobs SET point = ?, command = ?, outdir = ?, config_hash = ?, "
+                               "config = ?, cache_dir = ?, state = 'pending', attempts = 0, "
+                               "next_try = 0, failure = NULL, worker = NULL, worker_pid = NULL "
+                               "WHERE id = ?", values + (row["id"],))
+                    reset += 1
+            db.execute("COMMIT")
+        return added, reset
+
+    def mark_cached(self, name, exit_cause, selfcheck=None):
+        with self.connect() as db:
+            db.execute("UPDATE jobs SET state = 'done', cached = 1, returncode = 0, exit_cause = ?, "
+                       "selfcheck = ?, wall_seconds = 0, finished = ? WHERE name = ? AND state = 'pending'",
+                       (exit_cause, selfcheck, time.time(), name))
+
+    def claim(self, worker):
+        # Atomically move the next runnable pending job to running; None if there is none
+        with self.connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            row = db.execute("SELECT * FROM jobs WHERE state = 'pending' AND next_try <= ? "
+                             "ORDER BY attempts, id LIMIT 1", (time.time(),)).fetchone()
+            if row is not None:
+                now = time.time()
+                db.execute("UPDATE jobs SET state = 'running', host = ?, worker = ?, worker_pid = ?, "
+                           "started = ?, heartbeat = ? WHERE id = ?",
+                           (HOST, worker, os.getpid(), now, now, row["id"]))
+            db.execute("COMMIT")
+        return row
+
+    def heartbeat(self, job_id, worker):
+        # True once the job is no longer ours (recover() handed it to another worker)
+        with self.connect() as db:
+            return db.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND worker = ? "
+                              "AND state = 'running'", (time.time(), job_id, worker)).rowcount == 0
+
+    def finish(self, row, worker, returncode, wall_seconds, peak_rss_kb, max_attempts, backoff):
+        # Record one attempt; returns the job's new state
+        outdir = row["outdir"]
+        exit_cause = parse_exit_cause(os.path.join(outdir, "simout"))
+        warnings = job_warnings(outdir)
+        attempt = row["attempts"] + 1
+        failure = None
+        state = "done"
+        next_try = 0
+        if returncode != 0:
+            failure = failure_signature(returncode, exit_cause, outdir)
+            if failure == row["failure"] or attempt >= max_attempts:
+                state = "quarantined"
+            else:
+                state = "pending"
+                next_try = time.time() + backoff * 2 ** (attempt - 1)
+        with self.connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("INSERT INTO attempts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       (row["id"], attempt, HOST, worker, time.time() - wall_seconds,
+                        round(wall_seconds, 3), peak_rss_kb, returncode, exit_cause, failure))
+            db.execute("UPDATE jobs SET state = ?, attempts = ?, next_try = ?, finished = ?, "
+                       "wall_seconds = ?, peak_rss_kb = ?, returncode = ?, exit_cause = ?, "
+                       "selfcheck = ?, warnings = ?, failure = ? WHERE id = ? AND worker = ?",
+                       (state, attempt, next_try, time.time(), round(wall_seconds, 3), peak_rss_kb,
+                        returncode, exit_cause, read_selfcheck(os.path.join(outdir, "simout")),
+                        json.dumps(warnings), failure, row["id"], worker))
+            db.execute("COMMIT")
+        return state, exit_cause, failure
+
+    def recover(self, stale_seconds):
+        # Running jobs whose worker died (same host) or stopped heartbeating go back to
+        # pending without counting an attempt
+        requeued = []
+        with self.connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            for row in db.execute("SELECT id, name, host, worker_pid, heartbeat FROM jobs "
+                                  "WHERE state = 'running'").fetchall():
+                lost = row["host"] == HOST and not pid_alive(row["worker_pid"])
+                if lost or time.time() - (row["heartbeat"] or 0) > stale_seconds:
+                    db.execute("UPDATE jobs SET state = 'pending', next_try = 0, worker = NULL "
+                               "WHERE id = ?", (row["id"],))
+                    requeued.append(row["name"])
+            db.execute("COMMIT")
+        return requeued
+
+    def requeue(self, names=None, states=("quarantined",)):
+        # Give jobs in the given states a fresh set of attempts
+        query = ("UPDATE jobs SET state = 'pending', attempts = 0, next_try = 0, failure = NULL "
+                 f"WHERE state IN ({','.join('?' * len(states))})")
+        params = list(states)
+        if names:
+            query += f" AND name IN ({','.join('?' * len(names))})"
+            params += list(names)
+        with self.connect() as db:
+            return db.execute(query, params).rowcount
+
+    def counts(self):
+        with self.connect() as db:
+            rows = db.execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state").fetchall()
+        counts = dict.fromkeys(STATES, 0)
+        counts.update({row["state"]: row["n"] for row in rows})
+        return counts
+
+    def next_wait(self):
+        # Seconds until the earliest pending job becomes runnable, or None if none is pending
+        with self.connect() as db:
+            row = db.execute("SELECT MIN(next_try) AS t FROM jobs WHERE state = 'pending'").fetchone()
+        return None if row["t"] is None else max(0.0, row["t"] - time.time())
+
+    def jobs(self, names=None):
+        with self.connect() as db:
+            rows = db.execute("SELECT * FROM jobs ORDER BY name").fetchall()
+        if names is not None:
+            names = set(names)
+            rows = [r for r in rows if r["name"] in names]
+        return rows
+
+
+class _Connection:
+    # sqlite3's own context manager commits but does not close
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self.db
+
+    def __exit__(self, *exc):
+        if exc[0] is not None and self.db.in_transaction:
+            self.db.execute("ROLLBACK")
+        self.db.close()
+
+
+def make_jobs(points, args, cache):
+    # Job rows for sweep points (sweep.py arguments); cached points are returned separately
+    jobs = []
+    cached = []
+    for point in points:
+        key, config, hit = cache_lookup(point, args, cache)
+        outdir = os.path.abspath(os.path.join(args.outdir, point_name(point)))
+        command = point_command(point, args, outdir)
+        if key is None:
+            # Without a result cache, hash what the point runs
+            key = hashlib.sha256(json.dumps(command).encode()).hexdigest()
+        jobs.append({"name": point_name(point), "point": point, "command": command,
+                     "outdir": outdir, "config_hash": key, "config": config,
+                     "cache_dir": cache.root if cache is not None and config is not None else None})
+        if hit is not None:
+            cached.append((point_name(point), hit["exit_cause"], hit["selfcheck"]))
+    return jobs, cached
+
+
+def run_job(name, command, outdir, timeout, on_heartbeat, heartbeat_interval=30.0):
+    # Runs a job's gem5 command; returns (returncode, wall seconds, peak RSS in KB).
+    # on_heartbeat() returning True cancels the job.
+    os.makedirs(outdir, exist_ok=True)
+    start = time.time()
+    proc = subprocess.Popen(command, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    done = threading.Event()
+
+    def beat():
+        while not done.wait(heartbeat_interval):
+            if on_heartbeat():
+                proc.kill()
+
+    def expire():
+        if done.is_set():
+            return
+        print(f"Warning: {name} exceeded {timeout:.0f}s; killing it", file=sys.stderr)
+        proc.kill()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    timer = threading.Timer(timeout, expire) if timeout else None
+    if timer:
+        timer.start()
+    # wait4 instead of wait() to get the child's resource usage
+    _, status, usage = os.wait4(proc.pid, 0)
+    done.set()
+    if timer:
+        timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, time.time() - start, usage.ru_maxrss
+
+
+def work(queue, jobs, max_attempts=4, backoff=30.0, stale_seconds=300.0, timeout=None,
+         heartbeat_interval=30.0, report=print):
+    # Runs jobs in `jobs` threads until no pending job is left
+    requeued = queue.recover(stale_seconds)
+    if requeued:
+        print(f"Resuming {len(requeued)} jobs of lost workers: {', '.join(requeued)}")
+    caches = {}
+    cache_lock = threading.Lock()
+
+    def cache_for(root):
+        with cache_lock:
+            if root not in caches:
+                caches[root] = ResultCache(root)
+            return caches[root]
+
+    def loop(index):
+        worker = f"{HOST}:{os.getpid()}:{index}"
+        while True:
+            row = queue.claim(worker)
+            if row is None:
+                wait = queue.next_wait()
+                if wait is None:
+                    return
+                time.sleep(min(wait, 5.0) + 0.1)
+                continue
+            lost = []
+
+            def beat():
+                if queue.heartbeat(row["id"], worker):
+                    lost.append(True)
+                return bool(lost)
+
+            returncode, wall, rss = run_job(row["name"], json.loads(row["command"]), row["outdir"],
+                                            timeout, beat, heartbeat_interval)
+            if lost:
+                report(f"{row['name']}: lost to another worker; killed this copy")
+                continue
+            state, exit_cause, failure = queue.finish(row, worker, returncode, wall, rss,
+                                                      max_attempts, backoff)
+            if state == "done" and row["cache_dir"] and row["config"]:
+                cache_for(row["cache_dir"]).put_outdir(row["config_hash"], json.loads(row["config"]),
+                                                       exit_cause, row["outdir"])
+            status = "ok" if state == "done" else f"{state} ({failure})"
+            report(f"{row['name']}: {status} ({wall:.1f}s, {rss / 1024:.0f}MB peak, "
+                   f"attempt {row['attempts'] + 1}, {exit_cause})")
+
+    threads = [threading.Thread(target=loop, args=(i,)) for i in range(jobs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def job_result(row):
+    # A job row as a sweep.py result record
+    return {
+        "point": json.loads(row["point"]),
+        "outdir": row["outdir"],
+        "command": json.loads(row["command"]),
+        "returncode": row["returncode"] if row["state"] in ("done", "quarantined") else None,
+        "wall_seconds": row["wall_seconds"] or 0.0,
+        "exit_cause": row["exit_cause"],
+        "selfcheck": row["selfcheck"],
+        "kips": None,
+        "cached": bool(row["cached"]),
+        "cache_key": row["config_hash"] if row["cache_dir"] else None,
+        "state": row["state"],
+        "attempts": row["attempts"],
+        "host": row["host"],
+        "peak_rss_kb": row["peak_rss_kb"],
+        "warnings": json.loads(row["warnings"]) if row["warnings"] else [],
+    }
+
+
+def run_queued(points, args, jobs, cache=None):
+    # sweep.py --queue: submit the points, work them off and return their results
+    queue = JobQueue(args.queue)
+    rows, cached = make_jobs(points, args, cache)
+    added, reset = queue.submit(rows)
+    for name, exit_cause, selfcheck in cached:
+        queue.mark_cached(name, exit_cause, selfcheck)
+    counts = queue.counts()
+    print(f"Queue {args.queue}: {added} new, {reset} changed; {counts['done']} done, "
+          f"{counts['pending']} pending, {counts['quarantined']} quarantined")
+    work(queue, jobs, args.max_attempts, args.backoff, args.stale_timeout, args.timeout)
+    results = [job_result(row) for row in queue.jobs([r["name"] for r in rows])]
+    fallback = [os.path.basename(r["outdir"]) for r in results if r["warnings"]]
+    if fallback:
+        print(f"Warning: {len(fallback)} points fell back to a default component: "
+              + ", ".join(fallback), file=sys.stderr)
+    return results
+
+
+def print_status(queue, verbose):
+    counts = queue.counts()
+    print(", ".join(f"{n} {state}" for state, n in counts.items()))
+    for row in queue.jobs():
+        warnings = json.loads(row["warnings"]) if row["warnings"] else []
+        if not verbose and row["state"] == "done" and not warnings:
+            continue
+        rss = f"{row['peak_rss_kb'] / 1024:.0f}MB" if row["peak_rss_kb"] else "-"
+        wall = f"{row['wall_seconds']:.1f}s" if row["wall_seconds"] is not None else "-"
+        print(f"  {row['name']:<40} {row['state']:<11} attempts={row['attempts']} "
+              f"host={row['host'] or '-'} wall={wall} rss={rss} cause={row['exit_cause']}")
+        if row["failure"] and row["state"] != "done":
+            print(f"    last failure: {row['failure']}")
+        for warning in warnings:
+            print(f"    {warning}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent SQLite job queue for sweep points")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    work_parser = sub.add_parser("work", help="Run pending jobs until none is left")
+    work_parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                             help="Concurrent simulations on this host")
+    work_parser.add_argument("--max-attempts", type=int, default=4,
+                             help="Quarantine a job after this many failed attempts")
+    work_parser.add_argument("--backoff", type=float, default=30.0,
+                             help="Seconds before the first retry; doubles with every attempt")
+    work_parser.add_argument("--stale-timeout", type=float, default=300.0,
+                             help="Requeue running jobs without a heartbeat for this many seconds")
+    work_parser.add_argument("--timeout", type=float, default=None,
+                             help="Kill a simulation after this many host seconds")
+
+    status_parser = sub.add_parser("status", help="Summarize job states, failures and fallback warnings")
+    status_parser.add_argument("--verbose", action="store_true", help="List every job")
+
+    retry_parser = sub.add_parser("retry", help="Requeue quarantined jobs with fresh attempts")
+    retry_parser.add_argument("names", nargs="*", help="Only these jobs (default: all quarantined)")
+
+    export_parser = sub.add_parser("export", help="Write the jobs as a sweep.json")
+    export_parser.add_argument("--output", type=str, required=True, help="sweep.json to write")
+
+    for p in (work_parser, status_parser, retry_parser, export_parser):
+        p.add_argument("--db", type=str, required=True, help="Job database")
+    args = parser.parse_args()
+
+    queue = JobQueue(args.db)
+    if args.command == "work":
+        work(queue, args.jobs, args.max_attempts, args.backoff, args.stale_timeout, args.timeout)
+        print_status(queue, verbose=False)
+    elif args.command == "status":
+        print_status(queue, args.verbose)
+    elif args.command == "retry":
+        print(f"Requeued {queue.requeue(args.names)} jobs")
+    elif args.command == "export":
+        rows = queue.jobs()
+        results = [job_result(row) for row in rows]
+        commands = [json.loads(row["command"]) for row in rows]
+        with open(args.output, "w") as f:
+            json.dump({"script": commands[0][3] if commands else None,
+                       "gem5": commands[0][0] if commands else None,
+                       "results": results}, f, indent=2)
+        print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
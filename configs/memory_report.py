@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+memory_report.py
+
+Memory backend comparison: runs every benchmark on each memory model
+(SimpleMemory, DDR3, DDR4, LPDDR5, HBM, N interleaved channels; see
+system_builder.MEMORY_TYPES) as one parallel sweep (sweep.py) and reports
+per run
+
+  GB/s        achieved bandwidth, summed over the channels
+  row hit %   DRAM row-buffer hits / bursts (reads and writes)
+  qlat ns     mean read queueing latency per burst
+  lat ns      mean read access latency per burst (queue + bus + device)
+  bus %       mean data bus utilization
+  sim err %   simulated time against the --reference backend
+  host s      host seconds of the simulation, and x its cheapest backend
+
+and, per benchmark, the cheapest backend (host time) whose simulated time
+is within --tolerance of the reference: the model to use for studies
+like that one. SimpleMemory has no rows or queues; those columns show "-".
+
+Run with the host python from the gem5 root, e.g.:
+  python3 experiments/configs/memory_report.py compare --gem5=build/X86/gem5.opt \
+    --bench=suite:stride:size=4194304 --bench=suite:vector --outdir=out/memory \
+    -- --caches --l2cache
+  python3 experiments/configs/memory_report.py compare ... \
+    --backend=simple --backend=ddr4 --backend=ddr4:4 --backend=hbm:8 --reference=hbm:8
+A backend is <mem type>[:<channels>]. Host seconds are measured while
+--jobs simulations share the host; use --jobs=1 for clean costs. One
+finished run:
+  python3 experiments/configs/memory_report.py run out/ss4
+The table is also written to <outdir>/memory_report.json and .csv.
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+
+import sweep
+from bench_suite import resolve_benches
+from bp_compare import fmt, result_stats
+from gem5stats import get_stat, iter_dumps
+from result_cache import ResultCache
+from system_builder import memory_type
+
+DEFAULT_BACKENDS = ("simple", "ddr3", "ddr4", "ddr4:2", "lpddr5", "hbm:8")
+DEFAULT_REFERENCE = "ddr4"
+
+# system.mem_ctrl, or system.mem_ctrl0, ... with several channels; DRAM
+# stats live in the MemCtrl's interface (.dram), SimpleMemory's in itself.
+# Groups: channel, ".dram" or None, stat
+MEM_STAT_RE = re.compile(r"^system\.mem_ctrl(\d*)(\.dram)?\.(\w+)(?:::total)?$")
+TICKS_PER_NS = 1000
+
+
+def parse_backend(spec):
+    # "ddr4:2" -> ("DDR4_2400_8x8", 2); "DDR3_1600_8x8" -> ("DDR3_1600_8x8", 1)
+    name, _, channels = spec.partition(":")
+    if not name or (channels and not channels.isdigit()):
+        raise ValueError(f"Invalid backend {spec!r} (expected <mem type>[:<channels>])")
+    return memory_type(name.strip()), int(channels or 1)
+
+
+def mem_stats(stats):
+    # {stat: [value per channel]} of the memory stats in one dump. The MemCtrl and
+    # its DRAM interface both report some stats (readBursts, writeBursts); those
+    # are taken from the interface only, not counted twice.
+    levels = {}
+    for name, value in stats.items():
+        m = MEM_STAT_RE.match(name)
+        if m and isinstance(value, (int, float)):
+            levels.setdefault(m.group(3), {}).setdefault(bool(m.group(2)), []).append(value)
+    return {stat: by_level.get(True, by_level.get(False)) for stat, by_level in levels.items()}
+
+
+def memory_summary(stats):
+    mem = mem_stats(stats)
+
+    def total(*names):
+        for name in names:
+            if name in mem:
+                return sum(mem[name])
+        return math.nan
+
+    def mean(name):
+        return sum(mem[name]) / len(mem[name]) if name in mem else math.nan
+
+    bursts = total("readBursts") + total("writeBursts")
+    row_hits = total("readRowHits") + total("writeRowHits")
+    reads = total("readBursts")
+    return {
+        "bw": total("bwTotal", "bw_total"),
+        "row_hit": 100 * row_hits / bursts if bursts else math.nan,
+        "qlat_ns": total("totQLat") / reads / TICKS_PER_NS if reads else math.nan,
+        "lat_ns": total("totMemAccLat") / reads / TICKS_PER_NS if reads else math.nan,
+        "bus_util": mean("busUtil"),
+        "rd_qlen": mean("avgRdQLen"),
+    }
+
+
+def summarize(result, stats):
+    row = {
+        "sim_seconds": get_stat(stats, "simSeconds", "sim_seconds"),
+        "host_seconds": get_stat(stats, "hostSeconds", "host_seconds"),
+        "insts": get_stat(stats, "simInsts", "sim_insts"),
+        "ok": result["returncode"] == 0 and bool(stats),
+    }
+    row.update(memory_summary(stats))
+    return row
+
+
+def add_comparison(rows, reference, tolerance):
+    # Simulated-time error against the reference backend, host cost against
+    # the cheapest one, per benchmark; returns {bench: recommended backend}
+    ref = {r["bench"]: r["sim_seconds"] for r in rows if r["ok"] and r["backend"] == reference}
+    cheapest = {}
+    for row in rows:
+        if row["ok"] and row["host_seconds"] > 0:
+            cheapest[row["bench"]] = min(cheapest.get(row["bench"], math.inf), row["host_seconds"])
+    best = {}
+    for row in rows:
+        t_ref = ref.get(row["bench"])
+        ok = row["ok"] and t_ref
+        row["sim_err"] = 100 * (row["sim_seconds"] - t_ref) / t_ref if ok else math.nan
+        row["host_cost"] = row["host_seconds"] / cheapest[row["bench"]] if ok and row["bench"] in cheapest else math.nan
+        row["accurate"] = bool(ok) and abs(row["sim_err"]) <= tolerance
+        if row["accurate"]:
+            current = best.get(row["bench"])
+            if current is None or row["host_seconds"] < current["host_seconds"]:
+                best[row["bench"]] = row
+    return {bench: row["backend"] for bench, row in best.items()}
+
+
+def print_run(path):
+    stats_file = os.path.join(path, "stats.txt") if os.path.isdir(path) else path
+    dumps = list(iter_dumps(stats_file))
+    if not dumps:
+        sys.exit(f"No stats in {stats_file}")
+    row = summarize({"returncode": 0}, dumps[-1])
+    print(f"{'GB/s':>8} {'row hit %':>9} {'qlat ns':>8} {'lat ns':>8} {'bus %':>6} {'rd qlen':>7} {'host s':>8}")
+    print(f"{fmt(row['bw'] / 1e9, '8.3f')} {fmt(row['row_hit'], '9.1f')} {fmt(row['qlat_ns'], '8.1f')} "
+          f"{fmt(row['lat_ns'], '8.1f')} {fmt(row['bus_util'], '6.1f')} {fmt(row['rd_qlen'], '7.2f')} "
+          f"{fmt(row['host_seconds'], '8.2f')}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory backends: bandwidth, row hits, queueing, host cost")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Memory stats of one finished run")
+    run.add_argument("path", help="Run output directory or stats.txt")
+    cmp = sub.add_parser("compare", help="Run every benchmark on every backend")
+    cmp.add_argument("--gem5", type=str, default="build/X86/gem5.opt", help="gem5 binary")
+    cmp.add_argument("--script", type=str, default=sweep.DEFAULT_SCRIPT,
+                     help="Config script (must take --mem-type and --mem-channels)")
+    cmp.add_argument("--bench", action="append", required=True,
+                     help="Benchmark binary or suite:<variant> (repeatable)")
+    cmp.add_argument("--backend", action="append", default=None,
+                     help=f"<mem type>[:<channels>] (repeatable; default: {', '.join(DEFAULT_BACKENDS)})")
+    cmp.add_argument("--reference", type=str, default=DEFAULT_REFERENCE,
+                     help="Backend the simulated time errors are measured against")
+    cmp.add_argument("--tolerance", type=float, default=5.0,
+                     help="Largest simulated-time error in percent of an accurate backend")
+    cmp.add_argument("--grid", action="append", default=[],
+                     help="Extra sweep.py grid crossed with the backends, e.g. width=2,8")
+    cmp.add_argument("--outdir", type=str, default="out/memory_report", help="Base output directory")
+    cmp.add_argument("--jobs", type=int, default=None,
+                     help="Concurrent simulations (default: bounded by cores and RAM)")
+    cmp.add_argument("--cache-dir", type=str, default=None,
+                     help="Result cache directory; points already in it are not re-simulated")
+    cmp.add_argument("--cache-max-size", type=str, default="10GB",
+                     help="Evict least recently used cache entries beyond this size")
+    cmp.add_argument("script_args", nargs="*", help="Extra arguments passed to the script (after --)")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        print_run(args.path)
+        return
+
+    args.bench = resolve_benches(args.bench)
+    backends = args.backend or list(DEFAULT_BACKENDS)
+    if args.reference not in backends:
+        backends.append(args.reference)
+    try:
+        grid = sweep.parse_grid(args.grid)
+        cache_max = sweep.parse_size(args.cache_max_size)
+        parsed = [parse_backend(b) for b in backends]
+    except ValueError as e:
+        parser.error(str(e))
+    if "mem_type" in grid or "mem_channels" in grid:
+        parser.error("memory backends are chosen with --backend")
+    # sweep.run_sweep() options this experiment does not expose
+    args.monitor = False
+
+    points = []
+    by_point = {}
+    for point in sweep.expand_points(args.bench, grid):
+        for backend, (mem_type, channels) in zip(backends, parsed):
+            points.append(dict(point, mem_type=mem_type, mem_channels=str(channels)))
+            by_point[sweep.point_name(points[-1])] = backend
+    jobs = args.jobs or sweep.default_jobs(points)
+    print(f"Comparing {len(backends)} memory backends on {len(args.bench)} benchmarks: "
+          f"{len(points)} points, {jobs} concurrent jobs -> {args.outdir}")
+    os.makedirs(args.outdir, exist_ok=True)
+    cache = ResultCache(args.cache_dir, cache_max) if args.cache_dir else None
+    results = {r["outdir"]: r for r in sweep.run_sweep(points, args, jobs, cache)}
+
+    rows = []
+    extra = list(grid)
+    for point in points:
+        name = sweep.point_name(point)
+        result = results[os.path.join(args.outdir, name)]
+        row = {"bench": os.path.basename(point["bench"]), "backend": by_point[name]}
+        row.update({k: point[k] for k in extra})
+        row["outdir"] = result["outdir"]
+        row.update(summarize(result, result_stats(result, cache)))
+        rows.append(row)
+    # errors and costs are per benchmark and extra grid point
+    recommended = {}
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(row[k] for k in extra), []).append(row)
+    for key, group in groups.items():
+        for bench, backend in add_comparison(group, args.reference, args.tolerance).items():
+            recommended[(bench,) + key] = backend
+
+    print()
+    print(f"{'bench':<24} {'backend':<10} {'GB/s':>8} {'row hit %':>9} {'qlat ns':>8} {'lat ns':>8} "
+          f"{'bus %':>6} {'sim err %':>9} {'host s':>8} {'cost x':>6}")
+    for row in rows:
+        label = row["bench"] + "".join(f",{k}={row[k]}" for k in extra)
+        if not row["ok"]:
+            print(f"{label:<24} {row['backend']:<10} {'failed':>8}")
+            continue
+        print(f"{label:<24} {row['backend']:<10} {fmt(row['bw'] / 1e9, '8.3f')} {fmt(row['row_hit'], '9.1f')} "
+              f"{fmt(row['qlat_ns'], '8.1f')} {fmt(row['lat_ns'], '8.1f')} {fmt(row['bus_util'], '6.1f')} "
+              f"{fmt(row['sim_err'], '9.2f')} {fmt(row['host_seconds'], '8.2f')} {fmt(row['host_cost'], '6.2f')}")
+    print()
+    print(f"Cheapest backend within {args.tolerance}% of {args.reference}:")
+    for key in sorted({(r["bench"],) + tuple(r[k] for k in extra) for r in rows}):
+        label = key[0] + "".join(f",{k}={v}" for k, v in zip(extra, key[1:]))
+        print(f"  {label:<24} {recommended.get(key, '-')}")
+
+    with open(os.path.join(args.outdir, "memory_report.json"), "w") as f:
+        json.dump({"reference": args.reference, "tolerance": args.tolerance, "rows": rows,
+                   "recommended": [{"bench": k[0], **dict(zip(extra, k[1:])), "backend": b}
+                                   for k, b in sorted(recommended.items())]}, f, indent=2)
+    with open(os.path.join(args.outdir, "memory_report.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["bench"])
+        writer.writeheader()
+        writer.writerows(rows)
+    failed = sum(1 for r in rows if not r["ok"])
+    if failed:
+        print(f"{failed} points failed; see their simerr", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
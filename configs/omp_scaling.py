@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+omp_scaling.py
+
+Thread-scaling experiment for OpenMP programs (benchmarks/vector_add.cpp):
+runs each benchmark on se_multicore.py with 1..16 cores (OMP_NUM_THREADS =
+cores) as one parallel sweep (sweep.py) and reports per core count
+
+  speedup     simulated time of the 1-core run / this run
+  efficiency  speedup / cores
+  snoop KB    coherence traffic: snoop bytes on the L2 crossbar and membus
+  snoops/KI   snoop requests per 1000 instructions
+  DRAM GB/s   achieved DRAM bandwidth, and bus utilization in percent;
+              runs at or above --saturation percent are flagged as
+              bandwidth saturated
+
+Run with the host python from the gem5 root, e.g.:
+  python3 experiments/configs/omp_scaling.py --gem5=build/X86/gem5.opt \
+    --bench=suite:vector_add:omp --outdir=out/omp_scaling
+Timing cores instead of O3, and a second memory type:
+  ... omp_scaling.py --bench=suite:vector_add:omp --grid mem_type=DDR3_1600_8x8,DDR4_2400_8x8 \
+    -- --cpu-type=TimingSimpleCPU
+
+The whole program is measured, including its serial initialization, so
+speedups follow Amdahl's law for that fraction. Results also go to
+<outdir>/omp_scaling.csv and omp_scaling.json.
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+
+import sweep
+from bench_suite import resolve_benches
+from bp_compare import fmt, result_stats
+from gem5stats import get_stat
+from memory_report import memory_summary
+from result_cache import ResultCache
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCRIPT = os.path.join(HERE, "se_multicore.py")
+DEFAULT_CORES = "1,2,4,8,16"
+
+SNOOP_BUSES = ("system.tol2bus", "system.membus")
+
+
+def summarize(result, stats):
+    insts = get_stat(stats, "simInsts", "sim_insts")
+    snoop_bytes = sum(get_stat(stats, bus + ".snoopTraffic", bus + ".snoop_traffic", default=0)
+                      for bus in SNOOP_BUSES)
+    snoops = sum(get_stat(stats, bus + ".snoops", default=0) for bus in SNOOP_BUSES)
+    # summed (bandwidth) or averaged (utilization) over the memory channels
+    memory = memory_summary(stats)
+    return {
+        "sim_seconds": get_stat(stats, "simSeconds", "sim_seconds"),
+        "insts": insts,
+        "snoop_bytes": snoop_bytes,
+        "snoops_pki": snoops * 1000 / insts if insts else math.nan,
+        "dram_bw": memory["bw"],
+        "dram_util": memory["bus_util"],
+        "ok": result["returncode"] == 0 and bool(stats),
+    }
+
+
+def row_group(row, extra):
+    # Rows that only differ in the core count
+    return (row["bench"],) + tuple(row[k] for k in extra)
+
+
+def add_speedups(rows, extra, saturation):
+    # Speedup against the 1-core run of the same benchmark and extra grid point
+    base = {row_group(r, extra): r["sim_seconds"] for r in rows if r["ok"] and r["cores"] == 1}
+    for row in rows:
+        t1 = base.get(row_group(row, extra))
+        ok = row["ok"] and t1 and row["sim_seconds"] > 0
+        row["speedup"] = t1 / row["sim_seconds"] if ok else math.nan
+        row["efficiency"] = row["speedup"] / row["cores"]
+        row["saturated"] = row["ok"] and row["dram_util"] >= saturation
+
+
+def variant(row, extra):
+    return ",".join(f"{k}={row[k]}" for k in extra) or "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenMP core-count scaling experiment")
+    parser.add_argument("--gem5", type=str, default="build/X86/gem5.opt", help="gem5 binary")
+    parser.add_argument("--script", type=str, default=DEFAULT_SCRIPT,
+                        help="Multi-core config script (must take --num-cpus)")
+    parser.add_argument("--bench", action="append", required=True,
+                        help="Statically linked OpenMP binary or suite:<variant> (repeatable)")
+    parser.add_argument("--cores", type=str, default=DEFAULT_CORES, help="Core counts to run")
+    parser.add_argument("--grid", action="append", default=[],
+                        help="Extra sweep.py grid crossed with the core counts, e.g. mem_type=...")
+    parser.add_argument("--no-caches", action="store_true",
+                        help="Cores straight on the membus instead of private L1s and a shared L2")
+    parser.add_argument("--saturation", type=float, default=60.0,
+                        help="DRAM bus utilization (percent) reported as bandwidth saturated")
+    parser.add_argument("--outdir", type=str, default="out/omp_scaling", help="Base output directory")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Concurrent simulations (default: bounded by cores and RAM)")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Result cache directory")
+    parser.add_argument("--cache-max-size", type=str, default="10GB",
+                        help="Evict least recently used cache entries beyond this size")
+    parser.add_argument("script_args", nargs="*", help="Extra arguments passed to the script (after --)")
+    args = parser.parse_args()
+    args.bench = resolve_benches(args.bench)
+
+    try:
+        grid = sweep.parse_grid(args.grid)
+        cache_max = sweep.parse_size(args.cache_max_size)
+        cores = sorted({int(c) for c in args.cores.split(",") if c.strip()})
+    except ValueError as e:
+        parser.error(str(e))
+    if "cores" in grid or "threads" in grid:
+        parser.error("core counts are chosen with --cores")
+    if 1 not in cores:
+        print("Warning: no 1-core run; speedups cannot be computed", file=sys.stderr)
+    grid["cores"] = [str(c) for c in cores]
+    if not args.no_caches:
+        args.script_args = ["--caches", "--l2cache"] + args.script_args
+    # sweep.run_sweep() options this experiment does not expose
+    args.monitor = False
+
+    points = sweep.expand_points(args.bench, grid)
+    jobs = args.jobs or sweep.default_jobs(points)
+    print(f"Scaling {len(args.bench)} benchmarks over {cores} cores: {len(points)} points, "
+          f"{jobs} concurrent jobs -> {args.outdir}")
+    os.makedirs(args.outdir, exist_ok=True)
+    cache = ResultCache(args.cache_dir, cache_max) if args.cache_dir else None
+    results = {r["outdir"]: r for r in sweep.run_sweep(points, args, jobs, cache)}
+
+    rows = []
+    for point in points:
+        result = results[os.path.join(args.outdir, sweep.point_name(point))]
+        row = {"bench": os.path.basename(point["bench"]), "cores": int(point["cores"]),
+               "outdir": result["outdir"]}
+        row.update({k: v for k, v in point.items() if k not in ("bench", "cores")})
+        row.update(summarize(result, result_stats(result, cache)))
+        rows.append(row)
+    extra = [k for k in points[0] if k not in ("bench", "cores")] if points else []
+    add_speedups(rows, extra, args.saturation)
+    rows.sort(key=lambda r: (row_group(r, extra), r["cores"]))
+
+    print()
+    print(f"{'bench':<16} {'variant':<24} {'cores':>5} {'sim s':>10} {'speedup':>8} {'effic':>6} "
+          f"{'snoop KB':>10} {'snoops/KI':>10} {'DRAM GB/s':>10} {'bus %':>6}")
+    for row in rows:
+        if not row["ok"]:
+            print(f"{row['bench']:<16} {variant(row, extra):<24} {row['cores']:>5} {'failed':>10}")
+            continue
+        flag = "  saturated" if row["saturated"] else ""
+        print(f"{row['bench']:<16} {variant(row, extra):<24} {row['cores']:>5} "
+              f"{fmt(row['sim_seconds'], '10.6f')} {fmt(row['speedup'], '8.2f')} {fmt(row['efficiency'], '6.2f')} "
+              f"{fmt(row['snoop_bytes'] / 1024, '10.1f')} {fmt(row['snoops_pki'], '10.2f')} "
+              f"{fmt(row['dram_bw'] / 1e9, '10.3f')} {fmt(row['dram_util'], '6.1f')}{flag}")
+
+    with open(os.path.join(args.outdir, "omp_scaling.json"), "w") as f:
+        json.dump(rows, f, indent=2)
+    with open(os.path.join(args.outdir, "omp_scaling.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ["bench"])
+        writer.writeheader()
+        writer.writerows(rows)
+    failed = sum(1 for r in rows if not r["ok"])
+    if failed:
+        print(f"{failed} points failed; see their simerr", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
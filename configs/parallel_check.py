@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+parallel_check.py
+
+Determinism check for parallel (multi-event-queue) simulation: runs a
+multi-core config once on the single event queue and once per
+--sim-quantum with one event queue per core (se_multicore.py
+--sim-quantum), then compares every statistic of the parallel runs with
+the single-queue reference and reports the host speedup.
+
+Run with the host python from the gem5 root, e.g.:
+  python3 experiments/configs/parallel_check.py --gem5=build/X86/gem5.opt \
+    --bench=vector_add --cores=8 --sim-quantum=1000 --sim-quantum=100000 \
+    --outdir=out/pcheck -- --caches --l2cache
+
+A run is "exact" when all stats match, otherwise the largest relative
+differences are listed. --repeat runs every parallel configuration several
+times to also catch run-to-run nondeterminism. Exits with status 1 if any
+parallel run differs by more than --tolerance.
+
+The reference runs alone before the parallel runs, so its host time is
+the speedup baseline; the parallel runs share the host with each other,
+so their host speedup is only a fair figure with --jobs=1.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+
+import sweep
+from bench_suite import resolve_benches
+from bp_compare import fmt
+from gem5stats import get_stat, read_stats
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCRIPT = os.path.join(HERE, "se_multicore.py")
+
+# Host-side stats differ between any two runs
+HOST_PREFIX = "host"
+SHOWN_DIFFS = 10
+
+
+def last_stats(result):
+    path = os.path.join(result["outdir"], "stats.txt")
+    if result["returncode"] != 0 or not os.path.exists(path):
+        return None
+    dumps = read_stats(path)
+    return dumps[-1] if dumps else None
+
+
+def rel_diff(a, b):
+    if a == b or (isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b)):
+        return 0.0
+    scale = max(abs(a), abs(b))
+    return abs(a - b) / scale if scale else 0.0
+
+
+def compare(ref, stats):
+    # [(relative difference, name, reference value, value)] of differing stats
+    diffs = []
+    for name in sorted(set(ref) | set(stats)):
+        if name.startswith(HOST_PREFIX):
+            continue
+        a, b = ref.get(name), stats.get(name)
+        if a is None or b is None:
+            diffs.append((math.inf, name, a, b))
+            continue
+        d = rel_diff(a, b)
+        if d > 0:
+            diffs.append((d, name, a, b))
+    diffs.sort(key=lambda d: d[0], reverse=True)
+    return diffs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare parallel-event-queue runs with the single-queue run")
+    parser.add_argument("--gem5", type=str, default="build/X86/gem5.opt", help="gem5 binary")
+    parser.add_argument("--script", type=str, default=DEFAULT_SCRIPT,
+                        help="Multi-core config script (must take --num-cpus and --sim-quantum)")
+    parser.add_argument("--bench", type=str, required=True, help="Benchmark binary or suite:<variant>")
+    parser.add_argument("--cores", type=int, default=4, help="Number of cores")
+    parser.add_argument("--sim-quantum", type=int, action="append", default=None,
+                        help="Quantum in ticks of a parallel run (repeatable; default 1000)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per parallel configuration")
+    parser.add_argument("--tolerance", type=float, default=0.0,
+                        help="Largest accepted relative difference of any stat (default: exact)")
+    parser.add_argument("--outdir", type=str, default="out/parallel_check", help="Base output directory")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Concurrent simulations (default: bounded by cores and RAM)")
+    parser.add_argument("script_args", nargs="*", help="Extra arguments passed to the script (after --)")
+    args = parser.parse_args()
+    args.bench, = resolve_benches([args.bench])
+
+    quanta = args.sim_quantum or [1000]
+    # sweep.run_sweep() options this check does not expose
+    args.monitor = False
+    base = {"bench": args.bench, "cores": str(args.cores)}
+    reference = dict(base)
+    parallel = [dict(base, sim_quantum=str(q)) for q in quanta]
+
+    # every repeat in its own directory, since equal points share a name
+    outdir = args.outdir
+    repeat_dirs = [os.path.join(outdir, f"repeat{repeat}") if args.repeat > 1 else outdir
+                   for repeat in range(args.repeat)]
+    # The reference alone on the host: its host time is the speedup baseline
+    args.outdir = repeat_dirs[0]
+    print(f"Reference: single event queue, 1 job -> {args.outdir}")
+    runs = [(0, result) for result in sweep.run_sweep([reference], args, 1)]
+    for repeat in range(args.repeat):
+        args.outdir = repeat_dirs[repeat]
+        jobs = args.jobs or sweep.default_jobs(parallel)
+        print(f"Run {repeat + 1}/{args.repeat}: {len(parallel)} points, {jobs} concurrent jobs -> {args.outdir}")
+        for result in sweep.run_sweep(parallel, args, jobs):
+            runs.append((repeat, result))
+
+    ref_result = next(r for _, r in runs if "sim_quantum" not in r["point"])
+    ref = last_stats(ref_result)
+    if ref is None:
+        sys.exit(f"Single-queue reference run failed; see {ref_result['outdir']}/simerr")
+    ref_host = get_stat(ref, "hostSeconds", "host_seconds")
+
+    rows = []
+    for repeat, result in runs:
+        if "sim_quantum" not in result["point"]:
+            continue
+        stats = last_stats(result)
+        row = {"sim_quantum": int(result["point"]["sim_quantum"]), "repeat": repeat,
+               "outdir": result["outdir"], "ok": stats is not None}
+        if stats is not None:
+            diffs = compare(ref, stats)
+            host = get_stat(stats, "hostSeconds", "host_seconds")
+            row.update({
+                "differing": len(diffs),
+                "max_rel_diff": diffs[0][0] if diffs else 0.0,
+                "sim_ticks_rel_diff": rel_diff(get_stat(ref, "simTicks"), get_stat(stats, "simTicks")),
+                "host_speedup": ref_host / host if host else math.nan,
+                "top_diffs": [{"stat": n, "reference": a, "parallel": b} for _, n, a, b in diffs[:SHOWN_DIFFS]],
+            })
+        rows.append(row)
+    rows.sort(key=lambda r: (r["sim_quantum"], r["repeat"]))
+
+    print()
+    print(f"{'quantum':>10} {'repeat':>6} {'verdict':>10} {'differing':>10} {'max rel':>10} "
+          f"{'simTicks':>10} {'host x':>7}")
+    failed = False
+    for row in rows:
+        if not row["ok"]:
+            failed = True
+            print(f"{row['sim_quantum']:>10} {row['repeat']:>6} {'failed':>10}")
+            continue
+        within = row["max_rel_diff"] <= args.tolerance
+        failed = failed or not within
+        verdict = "exact" if row["differing"] == 0 else ("within" if within else "DIFFERS")
+        print(f"{row['sim_quantum']:>10} {row['repeat']:>6} {verdict:>10} {row['differing']:>10} "
+              f"{fmt(row['max_rel_diff'], '10.2e')} {fmt(row['sim_ticks_rel_diff'], '10.2e')} "
+              f"{fmt(row['host_speedup'], '7.2f')}")
+        if not within:
+            for diff in row["top_diffs"]:
+                print(f"    {diff['stat']}: {diff['reference']} -> {diff['parallel']}")
+
+    with open(os.path.join(outdir, "parallel_check.json"), "w") as f:
+        json.dump({"reference": ref_result["outdir"], "runs": rows}, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+prefetch_report.py
+
+Prefetcher accuracy, coverage and timeliness next to IPC, per run.
+
+  accuracy    useful prefetches / issued prefetches
+  coverage    useful prefetches / (useful prefetches + remaining demand MSHR misses)
+  timeliness  share of useful prefetches whose line had arrived before the demand
+              access (the rest were hit while still in flight: pfUsefulButMiss)
+
+Typical study: sweep the L1D prefetcher over the streaming kernels, then
+  python3 experiments/configs/sweep.py --gem5=build/X86/gem5.opt \
+    --bench=vector --bench=scalar_add --grid width=1,2,4,8 \
+    --grid l1d_hwp=none,stride,tagged,ampm,bop --outdir=out/pf_sweep -- --caches --l2cache
+  python3 experiments/configs/prefetch_report.py out/pf_sweep
+A run directory or stats.txt can be given instead of a sweep directory.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+
+from gem5stats import get_stat, iter_dumps
+
+# Report level -> cache SimObject paths (as built by CacheConfig.config_cache;
+# with --fast-forward the L1s hang off system.ff_cpu)
+CACHE_LEVELS = (("l1d", ("system.cpu.dcache", "system.ff_cpu.dcache")), ("l2", ("system.l2",)))
+
+
+def last_dump(path):
+    stats = {}
+    for stats in iter_dumps(path):
+        pass
+    return stats
+
+
+def ratio(num, den):
+    if math.isnan(num) or math.isnan(den) or den == 0:
+        return math.nan
+    return num / den
+
+
+def prefetch_metrics(stats, cache):
+    # Returns None when the cache has no prefetcher (or does not exist)
+    pf = cache + ".prefetcher."
+    issued = get_stat(stats, pf + "pfIssued", pf + "num_hwpf_issued")
+    if math.isnan(issued):
+        return None
+    useful = get_stat(stats, pf + "pfUseful")
+    useful_but_miss = get_stat(stats, pf + "pfUsefulButMiss", default=0)
+    misses = get_stat(stats, pf + "demandMshrMisses", cache + ".demandMshrMisses::total")
+    return {
+        "issued": issued,
+        "useful": useful,
+        "accuracy": ratio(useful, issued),
+        "coverage": ratio(useful, useful + misses),
+        "timeliness": ratio(useful - useful_but_miss, useful),
+    }
+
+
+def run_report(stats_file):
+    stats = last_dump(stats_file)
+    report = {"ipc": get_stat(stats, "system.cpu.ipc")}
+    for level, paths in CACHE_LEVELS:
+        cache = next((p for p in paths if any(k.startswith(p + ".") for k in stats)), paths[0])
+        report[level] = prefetch_metrics(stats, cache)
+        report[level + "_miss_rate"] = get_stat(
+            stats, cache + ".demandMissRate::total", cache + ".overallMissRate::total")
+    return report
+
+
+def stats_files(path):
+    # (name, point params, stats.txt) for a sweep dir, a run dir or a stats file
+    if os.path.isfile(path):
+        return [(os.path.basename(os.path.dirname(os.path.abspath(path))), {}, path)]
+    sweep_json = os.path.join(path, "sweep.json")
+    if not os.path.exists(sweep_json):
+        return [(os.path.basename(os.path.abspath(path)), {}, os.path.join(path, "stats.txt"))]
+    with open(sweep_json) as f:
+        sweep = json.load(f)
+    return [(os.path.basename(r["outdir"]), r["point"], os.path.join(r["outdir"], "stats.txt"))
+            for r in sweep["results"]]
+
+
+def fmt(value, spec=".3f"):
+    return "-" if value is None or math.isnan(value) else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefetch accuracy/coverage/timeliness report")
+    parser.add_argument("paths", nargs="+", help="Sweep directories, run directories or stats.txt files")
+    parser.add_argument("--json", type=str, default=None, help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    rows = []
+    for path in args.paths:
+        for name, point, stats_file in stats_files(path):
+            if not os.path.exists(stats_file):
+                print(f"Warning: no stats for {name} ({stats_file})", file=sys.stderr)
+                continue
+            rows.append(dict(run_report(stats_file), name=name, point=point))
+
+    header = ["run", "ipc"]
+    for level, _ in CACHE_LEVELS:
+        header += [f"{level}_miss", f"{level}_acc", f"{level}_cov", f"{level}_timely"]
+    print("\t".join(header))
+    for row in rows:
+        line = [row["name"], fmt(row["ipc"])]
+        for level, _ in CACHE_LEVELS:
+            metrics = row[level] or {}
+            line += [fmt(row[level + "_miss_rate"]), fmt(metrics.get("accuracy")),
+                     fmt(metrics.get("coverage")), fmt(metrics.get("timeliness"))]
+        print("\t".join(line))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+progress.py
+
+Live progress telemetry for gem5 config scripts.
+
+Progress.simulate() replaces a blocking m5.simulate(): it simulates in
+quanta of ticks (sized to about --progress-interval host seconds, or fixed
+with --progress-ticks) or of committed instructions (--progress-insts) and
+after every quantum records
+
+  {"time": ..., "tick": ..., "insts": ..., "host_seconds": ..., "kips": ...,
+   "interval_kips": ..., "rss_bytes": ..., "eta_seconds": ..., "done": false}
+
+as one JSON line (--progress-file, "-" for stderr) and/or serves the latest
+record at http://127.0.0.1:<port>/ (--progress-port). The endpoint is only
+answered between quanta, since gem5 holds the interpreter lock while it
+simulates. Every exit handed back to the script adds a record with its
+"cause"; the script calls Progress.finish() once it is done simulating,
+which writes the run's last record, the only one with "done": true.
+
+  build/X86/gem5.opt --outdir=out/ss4 experiments/configs/se_superscalar_v25.py \
+    --bench=vector --width=4 --progress-file=out/ss4/progress.jsonl
+"""
+
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+LIMIT_CAUSE = "simulate() limit reached"
+QUANTUM_CAUSE = "progress quantum"
+FIRST_QUANTUM_TICKS = 10**8
+MAX_TICK = 2**64 - 1
+
+
+def add_progress_options(parser):
+    group = parser.add_argument_group("progress telemetry")
+    group.add_argument("--progress-file", type=str, default=None,
+                       help="Append JSON-lines progress records here ('-' for stderr)")
+    group.add_argument("--progress-port", type=int, default=None,
+                       help="Serve the latest progress record on this local HTTP port (0: any free port)")
+    group.add_argument("--progress-interval", type=float, default=5.0,
+                       help="Target host seconds between records (adapts the tick quantum)")
+    group.add_argument("--progress-ticks", type=int, default=None,
+                       help="Fixed quantum in ticks instead of the adaptive one")
+    group.add_argument("--progress-insts", type=int, default=None,
+                       help="Quantum in committed instructions of the first thread instead of ticks")
+    group.add_argument("--progress-target-insts", type=int, default=None,
+                       help="Expected instructions of the run, for the ETA")
+    return group
+
+
+def rss_bytes():
+    # Current resident set size of this process (Linux), else the peak
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps(self.server.progress.latest).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Progress:
+    def __init__(self, cpus, path=None, port=None, interval=5.0, quantum_ticks=None,
+                 quantum_insts=None, target_insts=None):
+        # cpus: CPUs whose committed instructions are counted
+        # target_insts: expected instruction count of the run, for the ETA
+        self.cpus = list(cpus)
+        self.interval = interval
+        self.quantum_ticks = quantum_ticks
+        self.quantum_insts = quantum_insts
+        self.target_insts = target_insts
+        self.latest = {}
+        # Run start, set by the first simulate() call; host_seconds, kips and
+        # the ETA cover the whole run, across calls
+        self._start = None
+        self._start_insts = None
+        self._inst_stop_pending = False
+        self._file = None
+        if path == "-":
+            self._file = sys.stderr
+        elif path:
+            self._file = open(path, "a")
+        self.server = None
+        if port is not None:
+            self.server = http.server.ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+            self.server.progress = self
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+            print("Progress endpoint: http://127.0.0.1:%d/" % self.server.server_address[1])
+
+    @classmethod
+    def from_args(cls, args, cpus, target_insts=None):
+        # None when no telemetry output was requested
+        if not args.progress_file and args.progress_port is None:
+            return None
+        return cls(cpus, args.progress_file, args.progress_port, args.progress_interval,
+                   args.progress_ticks, args.progress_insts,
+                   target_insts or args.progress_target_insts)
+
+    def insts(self):
+        return sum(cpu.totalInsts() for cpu in self.cpus)
+
+    def emit(self, record):
+        self.latest = record
+        if self._file is not None:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+
+    def simulate(self, max_ticks=None):
+        # Drop-in for m5.simulate(max_ticks); returns the first exit event that
+        # is not one of our own quantum ends. The script may simulate again after
+        # it (interval dumps, work items, fast-forward), so this is not "done".
+        import m5
+
+        end_tick = MAX_TICK if max_ticks is None else m5.curTick() + max_ticks
+        quantum = self.quantum_ticks or FIRST_QUANTUM_TICKS
+        last_insts, last_time = self.insts(), time.time()
+        if self._start is None:
+            self._start, self._start_insts = last_time, last_insts
+        while True:
+            if self.quantum_insts:
+                # an instruction stop left over from an earlier call still counts
+                if not self._inst_stop_pending:
+                    self.cpus[0].scheduleInstStop(0, self.quantum_insts, QUANTUM_CAUSE)
+                    self._inst_stop_pending = True
+                step = end_tick - m5.curTick()
+            else:
+                step = min(quantum, end_tick - m5.curTick())
+            event = m5.simulate(step)
+            cause = event.getCause()
+            if cause == QUANTUM_CAUSE:
+                self._inst_stop_pending = False
+            ours = cause == QUANTUM_CAUSE or (cause == LIMIT_CAUSE and m5.curTick() < end_tick)
+
+            now = time.time()
+            insts = self.insts()
+            elapsed = now - self._start
+            done_insts = insts - self._start_insts
+            kips = done_insts / elapsed / 1000 if elapsed > 0 else 0.0
+            record = {
+                "time": now,
+                "tick": m5.curTick(),
+                "insts": insts,
+                "host_seconds": round(elapsed, 3),
+                "kips": round(kips, 3),
+                "interval_kips": round((insts - last_insts) / max(now - last_time, 1e-9) / 1000, 3),
+                "rss_bytes": rss_bytes(),
+                "eta_seconds": None,
+                "done": False,
+            }
+            if self.target_insts and kips > 0:
+                record["eta_seconds"] = round(max(0, self.target_insts - insts) / (kips * 1000), 1)
+            if not ours:
+                record["cause"] = cause
+            self.emit(record)
+            if not ours:
+                return event
+
+            # Adapt the tick quantum towards one record per interval
+            if not self.quantum_ticks and now > last_time:
+                scale = min(4.0, max(0.25, self.interval / (now - last_time)))
+                quantum = max(1, int(step * scale))
+            last_insts, last_time = insts, now
+
+    def finish(self, cause):
+        # The run's last record, once the script stops simulating for good
+        import m5
+
+        record = dict(self.latest, time=time.time(), tick=m5.curTick(), insts=self.insts(),
+                      rss_bytes=rss_bytes(), eta_seconds=0, done=True, cause=cause)
+        self.emit(record)
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+        if self._file not in (None, sys.stderr):
+            self._file.close()
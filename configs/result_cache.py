@@ -0,0 +1,296 @@
+"""
+result_cache.py
+
+Content-addressed cache of simulation results, used by sweep.py so that
+unchanged sweep points are never simulated twice.
+
+A point's key is the SHA-256 of its fully resolved config:
+  - the content hash of the config script and of the local modules it
+    imports, e.g. system_builder.py (pins everything main() hard-codes,
+    e.g. the DerivO3CPU sizes and the memory controller choice),
+  - every argparse parameter of the script, defaults filled in and values
+    passed through the options' type= converters, so an explicit
+    --rob-entries=256 and the default 256 share one entry, as do
+    --mem-type=ddr3 and the default DDR3_1600_8x8,
+  - the benchmark binary's content hash,
+  - the gem5 binary's content hash.
+
+Entries hold the parsed stats, the exit cause and the benchmark's SELFCHECK
+verdict. The cache is bounded in
+size and evicts least recently used entries first.
+"""
+
+import argparse
+import ast
+import hashlib
+import importlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from bench_suite import parse_selfcheck
+from gem5stats import read_stats
+
+
+def file_digest(path, chunk_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def local_sources(script):
+    # The script plus every module it (transitively) imports from its own directory
+    here = os.path.dirname(os.path.abspath(script))
+    seen = {}
+    pending = [os.path.abspath(script)]
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        with open(path) as f:
+            tree = ast.parse(f.read(), filename=path)
+        seen[path] = file_digest(path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [a.name for a in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                candidate = os.path.join(here, name.split(".")[0] + ".py")
+                if os.path.exists(candidate):
+                    pending.append(candidate)
+    return {os.path.basename(p): digest for p, digest in sorted(seen.items())}
+
+
+def local_imports(script, tree):
+    # {name in the script: (module, attribute)} of what it imports from its own directory
+    here = os.path.dirname(os.path.abspath(script))
+    names = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module and not node.level \
+                and os.path.exists(os.path.join(here, node.module + ".py")):
+            for alias in node.names:
+                names[alias.asname or alias.name] = (node.module, alias.name)
+    return names
+
+
+def import_local(script, module, name):
+    # The local modules import m5 lazily, so they load with the host python
+    here = os.path.dirname(os.path.abspath(script))
+    if here not in sys.path:
+        sys.path.insert(0, here)
+    return getattr(importlib.import_module(module), name)
+
+
+def helper_parser(script, tree):
+    # A throwaway parser holding the add_*_options(parser) helpers the script
+    # imports from its own directory (system_builder.py, progress.py, intervals.py)
+    helpers = {k: v for k, v in local_imports(script, tree).items()
+               if v[1].startswith("add_") and v[1].endswith("_options")}
+    parser = argparse.ArgumentParser(add_help=False)
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                and node.func.id in helpers):
+            continue
+        try:
+            args = [ast.literal_eval(a) for a in node.args[1:]]
+            kwargs = {k.arg: ast.literal_eval(k.value) for k in node.keywords}
+        except ValueError:
+            args, kwargs = [], {}
+        import_local(script, *helpers[node.func.id])(parser, *args, **kwargs)
+    return parser
+
+
+def script_options(script):
+    # Read argparse defaults and type= converters ({dest: callable}) from the
+    # script source without importing m5
+    with open(script) as f:
+        tree = ast.parse(f.read(), filename=script)
+    parser = helper_parser(script, tree)
+    defaults = vars(parser.parse_args([]))
+    converters = {a.dest: a.type for a in parser._actions if a.type is not None}
+    imports = local_imports(script, tree)
+    for node in ast.walk(tree):
+        if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                and node.func.attr == "add_argument"):
+            continue
+        flags = [a.value for a in node.args
+                 if isinstance(a, ast.Constant) and isinstance(a.value, str)]
+        if not flags or not flags[0].startswith("-"):
+            continue
+        kwargs = {k.arg: k.value for k in node.keywords}
+        if "dest" in kwargs:
+            dest = ast.literal_eval(kwargs["dest"])
+        else:
+            long_flags = [f for f in flags if f.startswith("--")] or flags
+            dest = long_flags[0].lstrip("-").replace("-", "_")
+        converter = None
+        if isinstance(kwargs.get("type"), ast.Name):
+            name = kwargs["type"].id
+            if name in ("int", "float"):
+                converter = {"int": int, "float": float}[name]
+            elif name in imports:
+                converter = import_local(script, *imports[name])
+        if converter is not None:
+            converters[dest] = converter
+        default = None
+        if "default" in kwargs:
+            try:
+                default = ast.literal_eval(kwargs["default"])
+            except ValueError:
+                default = ast.unparse(kwargs["default"])
+            else:
+                # argparse converts string defaults too
+                if isinstance(default, str):
+                    default = convert(converter, default)
+        elif "action" in kwargs and ast.literal_eval(kwargs["action"]) == "store_true":
+            default = False
+        defaults[dest] = default
+    return defaults, converters
+
+
+def script_defaults(script):
+    return script_options(script)[0]
+
+
+def convert(converter, value):
+    # A command-line string as the script sees it; unconvertible values stay as given
+    if converter is None or not isinstance(value, str):
+        return value
+    try:
+        return converter(value)
+    except (ValueError, TypeError, argparse.ArgumentTypeError):
+        return value
+
+
+def config_key(config):
+    blob = json.dumps(config, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, root, max_bytes=None):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.objects = os.path.join(root, "objects")
+        self._lock = threading.Lock()
+        self._digests = {}
+        os.makedirs(self.objects, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.objects, key[:2], key + ".json")
+
+    def binary_digest(self, path):
+        # Hashing a gem5.opt is slow: memoize on (path, size, mtime), also on disk
+        path = os.path.realpath(path)
+        st = os.stat(path)
+        ident = f"{path}:{st.st_size}:{st.st_mtime_ns}"
+        with self._lock:
+            if ident in self._digests:
+                return self._digests[ident]
+            index_path = os.path.join(self.root, "binaries.json")
+            try:
+                with open(index_path) as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = {}
+            if ident not in index:
+                index[ident] = file_digest(path)
+                self._write_json(index_path, index)
+            self._digests[ident] = index[ident]
+            return index[ident]
+
+    def resolve(self, script, gem5, bench, params, extra_args=()):
+        # params: {argparse dest: value} as passed on the command line
+        defaults, converters = script_options(script)
+        resolved = dict(defaults)
+        resolved.update({k: convert(converters.get(k), str(v)) for k, v in params.items()})
+        resolved = {k: None if v is None else str(v) for k, v in resolved.items()}
+        resolved.pop("bench", None)
+        return {
+            "script": os.path.basename(script),
+            "sources": local_sources(script),
+            "params": resolved,
+            "extra_args": list(extra_args),
+            "bench_sha256": file_digest(bench),
+            "gem5_sha256": self.binary_digest(gem5),
+        }
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # mtime doubles as the LRU timestamp
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, config, exit_cause, stats, selfcheck=None):
+        entry = {
+            "key": key,
+            "config": config,
+            "exit_cause": exit_cause,
+            "selfcheck": selfcheck,
+            "stats": stats,
+            "created": time.time(),
+        }
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write_json(path, entry)
+        self.evict()
+        return entry
+
+    def put_outdir(self, key, config, exit_cause, outdir):
+        stats_file = os.path.join(outdir, "stats.txt")
+        stats = read_stats(stats_file) if os.path.exists(stats_file) else []
+        try:
+            with open(os.path.join(outdir, "simout")) as f:
+                selfcheck = parse_selfcheck(f.read())
+        except OSError:
+            selfcheck = None
+        return self.put(key, config, exit_cause, stats, selfcheck)
+
+    def evict(self):
+        if self.max_bytes is None:
+            return
+        with self._lock:
+            entries = []
+            total = 0
+            for dirpath, _, files in os.walk(self.objects):
+                for name in files:
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+                    total += st.st_size
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+
+    def _write_json(self, path, data):
+        # Atomic replace so concurrent readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
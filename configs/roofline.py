@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+roofline.py
+
+Roofline report of simulated runs. For every run of a sweep
+
+  flops       floating-point operations, from the committed op classes
+              (FloatAdd/Mult/Div/Sqrt = 1, FloatMultAcc = 2, SIMD op classes
+              x --simd-lanes: gem5 x86 splits SSE into 64-bit micro-ops,
+              i.e. 2 floats or 1 double each)
+  AI          arithmetic intensity: flops / DRAM bytes (read + written)
+  GFLOP/s     achieved compute, flops / simulated seconds
+  GB/s        achieved DRAM bandwidth
+
+The ceilings of each configuration (all parameters but the benchmark) are
+measured on that configuration by two probe kernels of the benchmark suite
+(bench_suite.py): "flops" (independent multiply-add chains: width and FU
+pool bound) and "stream" (STREAM triad: DRAM bound). Nominal ceilings from
+the run's config.ini (issue width x FP units x clock, DRAM burst rate of
+every channel) are shown next to them. A run is memory bound when its AI is
+below the ridge point (peak GFLOP/s / peak GB/s), and "roof %" is its
+achieved GFLOP/s over the roof at its AI.
+
+Run with the host python from the gem5 root, e.g.:
+  python3 experiments/configs/roofline.py run --gem5=build/X86/gem5.opt \
+    --bench=suite:vector:O3 --bench=suite:vector_add_avx:O3,avx2 \
+    --grid width=2,8 --grid mem_type=ddr3,ddr4 --outdir=out/roofline -- --caches --l2cache
+  python3 experiments/configs/roofline.py report out/roofline --plot-dir=out/roofline/plots
+"run" sweeps the benchmarks and both probes over the grid (one sweep.json);
+"report" works on any sweep that also ran the probes (benchmarks named
+flops-* / stream-*, as bench_suite.py names them). The probes are measured
+as whole programs, initialization included. Plots need matplotlib; without
+it only <dir>/roofline.csv is written.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+import analysis
+import sweep
+from bench_suite import resolve_benches
+from memory_report import MEM_STAT_RE
+from result_cache import ResultCache
+
+DEFAULT_PROBES = {"flops": "suite:flops:O3", "stream": "suite:stream:O3"}
+
+# Committed op class stats: v23+ commitStats, older commit.committedInstType_0
+OP_CLASS_RE = re.compile(
+    r"^system\.cpu\d*\.(?:commitStats0\.committedInstType|commit\.committedInstType_0)::(\w+)$")
+# Op class -> flops per op; "simd" ones are multiplied by the SIMD lanes
+FLOP_OPS = {
+    "FloatAdd": 1, "FloatMult": 1, "FloatMultAcc": 2, "FloatDiv": 1, "FloatSqrt": 1,
+}
+SIMD_FLOP_OPS = {
+    "SimdFloatAdd": 1, "SimdFloatMult": 1, "SimdFloatMultAcc": 2, "SimdFloatDiv": 1,
+    "SimdFloatSqrt": 1,
+}
+DRAM_BYTE_STATS = ("bytesRead", "bytesWritten")
+
+COLUMNS = ("bench", "config", "flops", "dram_bytes", "ai", "gflops", "gbs",
+           "peak_gflops", "peak_gbs", "nominal_gflops", "nominal_gbs", "ridge", "bound", "roof_pct")
+
+
+def flop_weight(op_class, lanes):
+    if op_class in FLOP_OPS:
+        return FLOP_OPS[op_class]
+    return SIMD_FLOP_OPS.get(op_class, 0) * lanes
+
+
+def sum_stats(runs, select):
+    # Per run, sum of weight * stat over the store's stats select(name) weighs (NaN if none)
+    total = np.zeros(len(runs))
+    found = False
+    for name in runs.store.names:
+        weight = select(name)
+        if weight:
+            total += weight * np.nan_to_num(runs.stat(name))
+            found = True
+    return total if found else np.full(len(runs), np.nan)
+
+
+def run_flops(runs, lanes):
+    def select(name):
+        m = OP_CLASS_RE.match(name)
+        return flop_weight(m.group(1), lanes) if m else 0
+    return sum_stats(runs, select)
+
+
+def run_dram_bytes(runs):
+    def select(name):
+        m = MEM_STAT_RE.match(name)
+        return 1 if m and m.group(3) in DRAM_BYTE_STATS else 0
+    return sum_stats(runs, select)
+
+
+def read_config_ini(outdir):
+    # {section: {key: value}} of a run's config.ini ({} if missing)
+    sections = {}
+    current = None
+    try:
+        with open(os.path.join(outdir, "config.ini")) as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("[") and line.endswith("]"):
+                    current = sections.setdefault(line[1:-1], {})
+                elif current is not None and "=" in line:
+                    key, _, value = line.partition("=")
+                    current[key] = value
+    except OSError:
+        pass
+    return sections
+
+
+def nominal_peaks(outdir, lanes):
+    # (flops/s, DRAM bytes/s) the configuration can reach at most, from config.ini
+    ini = read_config_ini(outdir)
+    flops = bw = math.nan
+    cpus = [s for s in ini if re.fullmatch(r"system\.cpu\d*", s) and "issueWidth" in ini[s]]
+    clock = ini.get("system.cpu_clk_domain", ini.get("system.clk_domain", {})).get("clock")
+    if cpus and clock:
+        cpu = cpus[0]
+        # one op per cycle per pipelined unit; issue width bounds the units used
+        units = []
+        for fu in ini[cpu].get("fuPool", "").split():
+            for fu_list in ini.get(fu, {}).get("FUList", "").split():
+                desc = ini.get(fu_list, {})
+                ops = [ini.get(o, {}).get("opClass", "") for o in desc.get("opList", "").split()]
+                weight = max([flop_weight(op, lanes) for op in ops] or [0])
+                units += [weight] * int(desc.get("count", 0))
+        width = int(ini[cpu]["issueWidth"])
+        per_cycle = sum(sorted(units, reverse=True)[:width])
+        flops = per_cycle * len(cpus) * 1e12 / float(clock.split()[0])
+    rates = []
+    for name, section in ini.items():
+        if not re.fullmatch(r"system\.mem_ctrl\d*(\.dram)?", name):
+            continue
+        if section.get("type") == "SimpleMemory" and section.get("bandwidth"):
+            # ticks per byte
+            rates.append(1e12 / float(section["bandwidth"]))
+        elif "tBURST" in section:
+            burst = (int(section["burst_length"]) * int(section["device_bus_width"])
+                     * int(section["devices_per_rank"]) / 8)
+            rates.append(burst * 1e12 / float(section["tBURST"]))
+    if rates:
+        bw = sum(rates)
+    return flops, bw
+
+
+def probe_kind(bench):
+    # "flops" / "stream" for the probe binaries, else None
+    name = os.path.basename(str(bench))
+    for kind in DEFAULT_PROBES:
+        if name == kind or name.startswith(kind + "-"):
+            return kind
+    return None
+
+
+def roofline(runs, sweep_dir, lanes):
+    # One row per run, with the ceilings of its configuration
+    seconds = runs.stat("simSeconds", "sim_seconds")
+    flops = run_flops(runs, lanes)
+    dram = run_dram_bytes(runs)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ai = flops / dram
+        flop_rate = flops / seconds
+        byte_rate = dram / seconds
+    benches = runs.params.get("bench", np.array([""] * len(runs)))
+    kinds = np.array([probe_kind(b) or "" for b in benches])
+    group = runs.groups({"bench"})
+    n_groups = group.max() + 1 if len(group) else 0
+    peak_flops = np.full(n_groups, np.nan)
+    peak_bw = np.full(n_groups, np.nan)
+    np.fmax.at(peak_flops, group[kinds == "flops"], flop_rate[kinds == "flops"])
+    np.fmax.at(peak_bw, group[kinds == "stream"], byte_rate[kinds == "stream"])
+
+    config_keys = [k for k in runs.params if k != "bench"]
+    rows = []
+    for i in range(len(runs)):
+        g = group[i]
+        nominal = nominal_peaks(os.path.join(sweep_dir, runs.points[i]), lanes)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ridge = peak_flops[g] / peak_bw[g]
+            roof = min(peak_flops[g], ai[i] * peak_bw[g])
+        if math.isnan(ridge) or math.isnan(ai[i]):
+            bound = "-"
+        else:
+            bound = "memory" if ai[i] < ridge else "compute"
+        rows.append({
+            "point": runs.points[i],
+            "bench": os.path.basename(benches[i]),
+            "probe": kinds[i],
+            "group": int(g),
+            "config": ",".join(f"{k}={runs.params[k][i]}" for k in config_keys) or "-",
+            "flops": flops[i],
+            "dram_bytes": dram[i],
+            "ai": ai[i],
+            "gflops": flop_rate[i] / 1e9,
+            "gbs": byte_rate[i] / 1e9,
+            "peak_gflops": peak_flops[g] / 1e9,
+            "peak_gbs": peak_bw[g] / 1e9,
+            "nominal_gflops": nominal[0] / 1e9,
+            "nominal_gbs": nominal[1] / 1e9,
+            "ridge": ridge,
+            "bound": bound,
+            "roof_pct": 100 * flop_rate[i] / roof if roof > 0 else math.nan,
+        })
+    return rows
+
+
+def plot_rooflines(rows, outdir):
+    # One log-log figure per configuration: measured roofs, nominal roofs, runs
+    os.makedirs(outdir, exist_ok=True)
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("Warning: matplotlib not installed; no plots (see roofline.csv)", file=sys.stderr)
+        return []
+    paths = []
+    for g in sorted({r["group"] for r in rows}):
+        group = [r for r in rows if r["group"] == g]
+        points = [r for r in group if not r["probe"] and r["ai"] > 0 and r["gflops"] > 0]
+        ais = [r["ai"] for r in points]
+        lo = min(ais + [0.01]) / 4
+        hi = max(ais + [100.0]) * 4
+        x = np.logspace(math.log10(lo), math.log10(hi), 200)
+        fig, ax = plt.subplots(figsize=(6, 4))
+        for prefix, style, label in (("peak", "-", "probes"), ("nominal", "--", "nominal")):
+            flops, bw = group[0][prefix + "_gflops"], group[0][prefix + "_gbs"]
+            if not (math.isnan(flops) or math.isnan(bw)):
+                ax.plot(x, np.minimum(flops, x * bw), style, color="black",
+                        label=f"{label}: {flops:.2f} GFLOP/s, {bw:.2f} GB/s")
+        for r in points:
+            ax.plot(r["ai"], r["gflops"], "o")
+            ax.annotate(r["bench"], (r["ai"], r["gflops"]), fontsize="x-small",
+                        xytext=(3, 3), textcoords="offset points")
+        ax.set_xscale("log")
+        ax.set_yscale("log")
+        ax.set_xlabel("arithmetic intensity (flop / DRAM byte)")
+        ax.set_ylabel("GFLOP/s")
+        ax.set_title(group[0]["config"], fontsize="small")
+        ax.grid(True, which="both", alpha=0.3)
+        if ax.get_legend_handles_labels()[0]:
+            ax.legend(fontsize="x-small")
+        name = re.sub(r"[^A-Za-z0-9_.=,+-]", "_", group[0]["config"])
+        path = os.path.join(outdir, f"roofline-{name}.png")
+        fig.savefig(path, dpi=120, bbox_inches="tight")
+        plt.close(fig)
+        paths.append(path)
+    return paths
+
+
+def report(sweep_dir, cache_dir, lanes, plot_dir):
+    runs = analysis.load(sweep_dir, cache_dir=cache_dir)
+    rows = roofline(runs, sweep_dir, lanes)
+    if not any(r["probe"] == "flops" for r in rows) or not any(r["probe"] == "stream" for r in rows):
+        print("Warning: the sweep has no flops/stream probe runs; measured ceilings are missing "
+              "(use 'roofline.py run' or add --bench=suite:flops --bench=suite:stream)", file=sys.stderr)
+    shown = [r for r in rows if not r["probe"]]
+    analysis.print_rows(shown, ["bench", "config", "ai", "gflops", "gbs", "peak_gflops", "peak_gbs",
+                                "nominal_gflops", "nominal_gbs", "bound", "roof_pct"])
+    analysis.write_csv(os.path.join(sweep_dir, "roofline.csv"), rows, ["point", "probe"] + list(COLUMNS))
+    if plot_dir:
+        for path in plot_rooflines(rows, plot_dir):
+            print(f"Wrote {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roofline report of simulated runs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rep = sub.add_parser("report", help="Roofline of a finished sweep")
+    rep.add_argument("path", help="Sweep directory (with sweep.json)")
+    run = sub.add_parser("run", help="Sweep benchmarks and probes, then report")
+    run.add_argument("--gem5", type=str, default="build/X86/gem5.opt", help="gem5 binary")
+    run.add_argument("--script", type=str, default=sweep.DEFAULT_SCRIPT, help="Config script")
+    run.add_argument("--bench", action="append", required=True,
+                     help="Benchmark binary or suite:<variant> (repeatable)")
+    run.add_argument("--probe-flops", type=str, default=DEFAULT_PROBES["flops"],
+                     help="Compute probe (a suite:flops variant)")
+    run.add_argument("--probe-stream", type=str, default=DEFAULT_PROBES["stream"],
+                     help="Bandwidth probe (a suite:stream variant)")
+    run.add_argument("--grid", action="append", default=[],
+                     help="Parameter grid as key=v1,v2,... (repeatable, as sweep.py)")
+    run.add_argument("--outdir", type=str, default="out/roofline", help="Base output directory")
+    run.add_argument("--jobs", type=int, default=None,
+                     help="Concurrent simulations (default: bounded by cores and RAM)")
+    run.add_argument("--cache-max-size", type=str, default="10GB",
+                     help="Evict least recently used cache entries beyond this size")
+    run.add_argument("script_args", nargs="*", help="Extra arguments passed to the script (after --)")
+    for cmd in (rep, run):
+        cmd.add_argument("--cache-dir", type=str, default=None,
+                         help="Result cache directory (cached points are not re-simulated)")
+        cmd.add_argument("--simd-lanes", type=int, default=2,
+                         help="Flops per SIMD float micro-op (default 2: 64-bit x86 micro-ops, floats)")
+        cmd.add_argument("--plot-dir", type=str, default=None, help="Write one roofline plot per configuration here")
+    args = parser.parse_args()
+
+    if args.command == "report":
+        report(args.path, args.cache_dir, args.simd_lanes, args.plot_dir)
+        return
+
+    for kind, spec in (("flops", args.probe_flops), ("stream", args.probe_stream)):
+        if probe_kind(resolve_benches([spec])[0]) != kind:
+            parser.error(f"--probe-{kind} must be a suite:{kind} variant")
+    benches = resolve_benches(args.bench + [args.probe_flops, args.probe_stream])
+    try:
+        grid = sweep.parse_grid(args.grid)
+        cache_max = sweep.parse_size(args.cache_max_size)
+    except ValueError as e:
+        parser.error(str(e))
+    # sweep.run_sweep() options this report does not expose
+    args.monitor = False
+
+    points = sweep.expand_points(list(dict.fromkeys(benches)), grid)
+    jobs = args.jobs or sweep.default_jobs(points)
+    print(f"Roofline of {len(args.bench)} benchmarks (+2 probes): {len(points)} points, "
+          f"{jobs} concurrent jobs -> {args.outdir}")
+    os.makedirs(args.outdir, exist_ok=True)
+    start = time.time()
+    cache = ResultCache(args.cache_dir, cache_max) if args.cache_dir else None
+    results = sweep.run_sweep(points, args, jobs, cache)
+    results.sort(key=lambda r: r["outdir"])
+    with open(os.path.join(args.outdir, "sweep.json"), "w") as f:
+        json.dump({"script": args.script, "gem5": args.gem5, "results": results}, f, indent=2)
+    failed = sum(1 for r in results if r["returncode"] != 0)
+    print(f"Sweep finished in {time.time() - start:.1f}s, {failed} failed")
+    print()
+    report(args.outdir, args.cache_dir, args.simd_lanes, args.plot_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+se_multicore.py
+
+Multi-core SE-mode config for multi-threaded (OpenMP, pthreads) programs:
+N cores sharing one process, each with private L1I/L1D, a shared L2 behind
+a coherent crossbar (L2XBar, snooping) and MemCtrl + DRAM. The program's
+threads are spread over the cores by the SE clone() emulation, so there
+must be at least as many cores as threads (main thread included).
+
+Build the benchmark statically (bench_suite.py builds and caches the suite's), e.g.
+  python3 experiments/configs/bench_suite.py build --bench=vector_add --opt=O2 --isa=sse --omp=on
+then
+  build/X86/gem5.opt --outdir=out/omp4 experiments/configs/se_multicore.py \
+    --bench=suite:vector_add:omp --num-cpus=4 --caches --l2cache
+OMP_NUM_THREADS defaults to --num-cpus (--threads to change it). A 1-16
+core scaling sweep with speedup, coherence and DRAM report: omp_scaling.py.
+
+Parallel simulation: --sim-quantum=TICKS puts every core and its L1s on
+its own event queue and host thread, synchronized every TICKS ticks.
+Quanta above the smallest cross-queue latency (the L1 -> L2 crossbar hop)
+can change the timing; compare against the single-queue run with
+parallel_check.py.
+"""
+
+import argparse
+import sys
+import m5
+
+from bench_suite import resolve_benches
+from progress import Progress, add_progress_options
+from system_builder import (
+    SystemConfig, add_cache_options, add_fast_forward_options, add_memory_options, build_system,
+    cache_fields, cpu_list, fast_forward, fast_forward_fields, make_root, memory_fields,
+)
+
+def make_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bench", type=str, required=True, help="Path to a statically linked binary, or suite:<variant>")
+    parser.add_argument("--bench-args", type=str, default="", help="Arguments of the benchmark")
+    parser.add_argument("--num-cpus", type=int, default=4, help="Number of cores")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="OMP_NUM_THREADS for the guest (default: --num-cpus)")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="Extra guest environment variable (repeatable)")
+    parser.add_argument("--cpu-type", type=str, default="DerivO3CPU",
+                        help="Core model (e.g. DerivO3CPU, TimingSimpleCPU)")
+    parser.add_argument("--width", type=int, default=None, help="Issue width of the O3 cores")
+    parser.add_argument("--rob-entries", type=int, default=None, help="Reorder buffer entries")
+    parser.add_argument("--memsize", type=str, default="512MB", help="Physical memory size")
+    parser.add_argument("--sim-quantum", type=int, default=None, metavar="TICKS",
+                        help="One event queue (host thread) per core, synchronized every TICKS ticks")
+    add_memory_options(parser)
+    add_cache_options(parser)
+    add_fast_forward_options(parser)
+    add_progress_options(parser)
+    return parser
+
+def parse_args(argv=None):
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    if args.num_cpus < 1:
+        parser.error("--num-cpus must be at least 1")
+    if (args.threads or args.num_cpus) > args.num_cpus:
+        parser.error("--threads cannot exceed --num-cpus (one thread context per core)")
+    return args
+
+def config_from_args(args):
+    return SystemConfig(
+        cpu_type=args.cpu_type,
+        num_cpus=args.num_cpus,
+        mem_size=args.memsize,
+        width=args.width,
+        rob_entries=args.rob_entries,
+        sim_quantum=args.sim_quantum,
+        **memory_fields(args),
+        **cache_fields(args),
+        **fast_forward_fields(args),
+    )
+
+def run(args, base=None):
+    cmd = resolve_benches([args.bench]) + args.bench_args.split()
+    env = [f"OMP_NUM_THREADS={args.threads or args.num_cpus}"] + args.env
+    config = config_from_args(args)
+    try:
+        system = build_system(config, cmd, base, env)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    root = make_root(config, system)
+    m5.instantiate()
+
+    if args.fast_forward:
+        print(f"Fast-forwarding {args.fast_forward} instructions: cpu={config.ff_cpu_type}")
+        if not fast_forward(system, args.fast_forward):
+            print("Error: program finished during the fast-forward.", file=sys.stderr)
+            sys.exit(1)
+
+    progress = Progress.from_args(args, cpu_list(system.cpu))
+    queues = f" event_queues={args.num_cpus + 1} quantum={args.sim_quantum}" if args.sim_quantum else ""
+    print(f"Starting simulation: bench={cmd} cores={args.num_cpus} env={env}{queues}")
+    exit_event = progress.simulate() if progress else m5.simulate()
+    if progress:
+        progress.finish(exit_event.getCause())
+    print("Exited @ tick", m5.curTick(), "because", exit_event.getCause())
+    m5.stats.dump()
+
+def main():
+    run(parse_args())
+
+# gem5 runs config scripts with __name__ set to "__m5_main__"
+if __name__ in ("__main__", "__m5_main__"):
+    main()
@@ -3,7 +3,12 @@
 
 import argparse
 import m5
-from m5.objects import *
+from m5.objects import Root
+
+from system_builder import (
+    SystemConfig, add_cache_options, add_fast_forward_options, build_system, cache_fields,
+    fast_forward, fast_forward_fields,
+)
 
 # -----------------------------
 # Arguments
@@ -15,66 +20,31 @@ parser.add_argument("--width", type=int, default=1,
                     help="Issue width for fetch/decode/rename/issue/commit")
 parser.add_argument("--stats-file", type=str, default="stats.txt",
                     help="Stats output file")
+add_cache_options(parser)
+add_fast_forward_options(parser)
 args = parser.parse_args()
 
 # -----------------------------
 # System setup
 # -----------------------------
-system = System()
-system.clk_domain = SrcClockDomain()
-system.clk_domain.clock = "3GHz"
-system.clk_domain.voltage_domain = VoltageDomain()
-
-system.mem_mode = "timing"
-system.mem_ranges = [AddrRange("512MB")]
-system.membus = SystemXBar()
-
-# -----------------------------
-# CPU (DerivO3CPU with tunable widths)
-# -----------------------------
+# CPU (DerivO3CPU with tunable widths), optional caches, DDR3 memory controller
 width = args.width
-cpu = DerivO3CPU()
-cpu.fetchWidth = width
-cpu.decodeWidth = width
-cpu.renameWidth = width
-cpu.issueWidth = width
-cpu.commitWidth = width
-
-# Increase ROB and queues
-cpu.numROBEntries = 192
-cpu.numIQEntries = 64
-cpu.LQEntries = 64
-cpu.SQEntries = 64
-
-system.cpu = cpu
-
-
-# -----------------------------
-# Memory controller
-# -----------------------------
-system.mem_ctrl = MemCtrl()
-system.mem_ctrl.dram = DDR3_1600_8x8(range=system.mem_ranges[0])  # remove size parameter
-system.mem_ctrl.port = system.membus.mem_side_ports
-
-
-system.system_port = system.membus.cpu_side_ports
-cpu.icache_port = system.membus.cpu_side_ports
-cpu.dcache_port = system.membus.cpu_side_ports
+config = SystemConfig(
+    width=width,
+    # Increase ROB and queues
+    rob_entries=192,
+    iq_entries=64,
+    lq_entries=64,
+    sq_entries=64,
+    **cache_fields(args),
+    **fast_forward_fields(args),
+)
 
 # -----------------------------
 # Workload
 # -----------------------------
-process = Process()
-process.cmd = [args.bench] if args.bench else ["/bin/ls"]
-
-system.workload = SEWorkload.init_compatible(process.cmd[0])
-system.cpu.workload = process
-system.cpu.createThreads()
-cpu.createInterruptController()
-
-cpu.interrupts[0].pio = system.membus.mem_side_ports
-cpu.interrupts[0].int_requestor = system.membus.cpu_side_ports
-cpu.interrupts[0].int_responder = system.membus.mem_side_ports
+cmd = [args.bench] if args.bench else ["/bin/ls"]
+system = build_system(config, cmd)
 
 # -----------------------------
 # Root & simulate
@@ -82,7 +52,11 @@ cpu.interrupts[0].int_responder = system.membus.mem_side_ports
 root = Root(full_system=False, system=system)
 m5.instantiate()
 
-print(f"Running {process.cmd} with issue width = {width}")
+# Optional warm-up on the fast CPU, then switchCpus() to the O3 core
+if args.fast_forward and not fast_forward(system, args.fast_forward):
+    raise SystemExit("Program finished during the fast-forward")
+
+print(f"Running {cmd} with issue width = {width}")
 exit_event = m5.simulate()
 print('Exit @ tick', m5.curTick(), 'because', exit_event.getCause())
 
@@ -91,4 +65,3 @@ print('Exit @ tick', m5.curTick(), 'because', exit_event.getCause())
 # -----------------------------
 m5.stats.dump()
 print(f"Stats dumped to {args.stats_file}")
-
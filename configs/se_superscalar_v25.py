@@ -6,202 +6,216 @@ SE-mode superscalar example for gem5 v25 (DerivO3CPU).
 Usage example:
   build/X86/gem5.opt --outdir=out/ss1 experiments/configs/se_superscalar_v25.py \
     --bench=tests/test-progs/hello/bin/x86/linux/hello --width=1
+
+--bench also takes a variant of the benchmark suite (bench_suite.py),
+built once and cached: --bench=suite:vector:O3,avx2
+
+L1/L2 caches (CacheConfig.config_cache, as in se.py):
+  ... se_superscalar_v25.py --bench=vector --width=4 --caches --l2cache \
+    --l1d-size=32kB --l2-size=1MB --l1-mshrs=16 --l1d-hwp-type=stride
+
+Checkpoint once at the region of interest, then restore for every variant:
+  build/X86/gem5.opt --outdir=out/ckpt experiments/configs/se_superscalar_v25.py \
+    --bench=vector --take-checkpoint=ckpt/vector --roi-insts=20000000
+  build/X86/gem5.opt --outdir=out/ss4 experiments/configs/se_superscalar_v25.py \
+    --bench=vector --restore-checkpoint=ckpt/vector --width=4
+
+Fast-forward 50M instructions on KVM (AtomicSimpleCPU where KVM is
+unavailable), then switch to the O3 core (stats cover the O3 part only):
+  ... se_superscalar_v25.py --bench=vector --width=4 --fast-forward=50000000 --ff-cpu=kvm
+
+Memory backend (SimpleMemory, DDR3/4/5, LPDDR5, HBM, N interleaved
+channels); compare them with memory_report.py:
+  ... se_superscalar_v25.py --bench=vector --width=4 --mem-type=ddr4 --mem-channels=2
+
+Per-interval stats (every 1M instructions, or --interval-ticks /
+--interval-work-items) into out/<run>/intervals.npz; see intervals.py:
+  ... se_superscalar_v25.py --bench=vector --width=4 --interval-insts=1000000
+Top-down CPI stack (frontend / bad speculation / backend memory / core,
+and which of ROB/IQ/LQ/SQ blocks rename), per interval or for the run:
+  python3 experiments/configs/topdown.py intervals out/ss4/intervals.npz
+  python3 experiments/configs/topdown.py run out/ss4
+
+Live progress (JSON lines with insts, KIPS, RSS, ETA; see progress.py):
+  ... se_superscalar_v25.py --bench=vector --progress-file=out/ss4/progress.jsonl
 """
 
 import argparse
 import sys
 import m5
-from m5.objects import (
-    System, SrcClockDomain, VoltageDomain, AddrRange, SystemXBar,
-    DerivO3CPU, MemCtrl, DDR3_1600_8x8, Process, SEWorkload, Root
+from m5.objects import Root
+
+from bench_suite import resolve_benches
+from intervals import add_interval_options, interval_mode, run_intervals
+from progress import Progress, add_progress_options
+from system_builder import (
+    SystemConfig, add_cache_options, add_fast_forward_options, add_memory_options, build_system,
+    cache_fields, fast_forward, fast_forward_cpu_type, fast_forward_fields, memory_fields,
+    parse_bp_params,
 )
 
-def connect_cpu_bus_ports(cpu, membus):
-    # Connect cpu cache ports to the membus. API names vary; try modern names first.
-    try:
-        cpu.icache_port = membus.cpu_side_ports
-        cpu.dcache_port = membus.cpu_side_ports
-    except Exception:
-        # fallback to deprecated names if needed
-        try:
-            cpu.icache_port = membus.slave
-            cpu.dcache_port = membus.slave
-        except Exception:
-            print("Warning: couldn't attach icache/dcache ports using known names.", file=sys.stderr)
-
-def connect_system_port(system, membus):
-    # Connect system.system_port to the bus (try mem_side_ports / cpu_side_ports fallback)
-    try:
-        system.system_port = membus.cpu_side_ports
-    except Exception:
-        try:
-            system.system_port = membus.slave
-        except Exception:
-            print("Warning: couldn't attach system_port using known names.", file=sys.stderr)
-
-def connect_memctrl(mem_ctrl, membus):
-    # attach MemCtrl to membus (port name may be 'port')
-    try:
-        mem_ctrl.port = membus.mem_side_ports
-    except Exception:
-        try:
-            mem_ctrl.port = membus.master
-        except Exception:
-            print("Warning: couldn't attach mem_ctrl port using known names.", file=sys.stderr)
-
-def connect_interrupts(cpu, membus):
-    # Ensure interrupt controller created already.
-    # Try a couple of possible attribute name patterns for interrupt port wiring.
-    try:
-        cpu.interrupts[0].pio = membus.mem_side_ports
-    except Exception:
-        try:
-            cpu.interrupts[0].pio = membus.master
-        except Exception:
-            pass
-
-    # Now try to wire the interrupt request/respond ports (names vary by build)
-    wired = False
-    try:
-        cpu.interrupts[0].int_master = membus.cpu_side_ports
-        cpu.interrupts[0].int_slave = membus.mem_side_ports
-        wired = True
-    except Exception:
-        pass
-
-    if not wired:
-        try:
-            cpu.interrupts[0].int_requestor = membus.cpu_side_ports
-            cpu.interrupts[0].int_responder = membus.mem_side_ports
-            wired = True
-        except Exception:
-            pass
-
-    if not wired:
-        # Last-ditch fallback to deprecated names
-        try:
-            cpu.interrupts[0].int_master = membus.master
-            cpu.interrupts[0].int_slave = membus.slave
-            wired = True
-        except Exception:
-            pass
-
-    if not wired:
-        print("Warning: couldn't wire CPU interrupt ports with known attribute names.", file=sys.stderr)
-
-def main():
+MAX_INSTS_CAUSE = "a thread reached the max instruction count"
+
+def run_to_roi(system, roi_work_begin, simulate=m5.simulate):
+    # Simulate until the region of interest starts; False if the program exits first
+    while True:
+        exit_event = simulate()
+        cause = exit_event.getCause()
+        print("Fast-forward stopped @ tick", m5.curTick(), "because", cause)
+        if roi_work_begin:
+            if cause == "workbegin":
+                return True
+            if cause == "workend":
+                continue
+        return cause == MAX_INSTS_CAUSE
+
+def make_parser():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--bench", type=str, help="Path to binary to run (ELF)", required=False)
+    parser.add_argument("--bench", type=str, help="Path to binary to run (ELF), or suite:<variant>", required=False)
     parser.add_argument("--width", type=int, default=1, help="Issue width (fetch/decode/rename/issue/commit)")
     parser.add_argument("--memsize", type=str, default="512MB", help="Physical memory size (e.g. 512MB, 2GB)")
-    args = parser.parse_args()
-
-    # ----------------------------------------------------------------
-    # Basic system
-    # ----------------------------------------------------------------
-    system = System()
-    system.clk_domain = SrcClockDomain()
-    system.clk_domain.clock = "3GHz"
-    system.clk_domain.voltage_domain = VoltageDomain()
-
-    system.mem_mode = "timing"
-    system.mem_ranges = [AddrRange(args.memsize)]
-    system.membus = SystemXBar()
+    parser.add_argument("--rob-entries", type=int, default=256, help="Reorder buffer entries")
+    parser.add_argument("--iq-entries", type=int, default=64, help="Instruction queue entries")
+    parser.add_argument("--lq-entries", type=int, default=64, help="Load queue entries")
+    parser.add_argument("--sq-entries", type=int, default=64, help="Store queue entries")
+    parser.add_argument("--phys-int-regs", type=int, default=256, help="Physical integer registers")
+    parser.add_argument("--phys-float-regs", type=int, default=256, help="Physical float registers")
+    parser.add_argument("--bp-type", type=str, default=None,
+                        help="Branch predictor SimObject name (e.g. LocalBP, TournamentBP); default keeps the CPU's own")
+    parser.add_argument("--bp-param", action="append", default=[], metavar="NAME=VALUE",
+                        help="Branch predictor parameter (repeatable), e.g. localPredictorSize=4096")
+    parser.add_argument("--take-checkpoint", type=str, default=None, metavar="DIR",
+                        help="Fast-forward to the region of interest, write a checkpoint to DIR and exit")
+    parser.add_argument("--restore-checkpoint", type=str, default=None, metavar="DIR",
+                        help="Start the detailed run from a checkpoint written by --take-checkpoint")
+    parser.add_argument("--max-insts", type=int, default=None,
+                        help="Stop the detailed run after this many instructions (after any restore/fast-forward)")
+    parser.add_argument("--roi-insts", type=int, default=None,
+                        help="Region of interest starts after this many instructions")
+    parser.add_argument("--roi-work-begin", action="store_true",
+                        help="Region of interest starts at the first m5_work_begin op")
+    add_memory_options(parser)
+    add_cache_options(parser)
+    add_fast_forward_options(parser)
+    add_progress_options(parser)
+    add_interval_options(parser)
+    return parser
+
+def parse_args(argv=None):
+    parser = make_parser()
+    args = parser.parse_args(argv)
+    if args.take_checkpoint and args.restore_checkpoint:
+        parser.error("--take-checkpoint and --restore-checkpoint are exclusive")
+    if args.take_checkpoint and not (args.roi_insts or args.roi_work_begin):
+        parser.error("--take-checkpoint needs --roi-insts or --roi-work-begin")
+    if args.fast_forward and (args.take_checkpoint or args.restore_checkpoint):
+        parser.error("--fast-forward cannot be combined with checkpoints")
+    try:
+        args.bp_params = parse_bp_params(args.bp_param)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
 
+def config_from_args(args):
     # ----------------------------------------------------------------
-    # CPU (DerivO3 with tunable widths)
+    # System: DerivO3 with tunable widths, back-end resources sized for
+    # wider issue, MemCtrl + DDR3 (gem5 v25 pattern) unless --mem-type
     # ----------------------------------------------------------------
-    cpu = DerivO3CPU()
+    if args.take_checkpoint:
+        # checkpointing run: the detailed core is only built on restore
+        # (same memory system and caches as the restoring runs)
+        return SystemConfig(cpu_type=fast_forward_cpu_type(args.ff_cpu), mem_size=args.memsize,
+                            **memory_fields(args), **cache_fields(args))
+    return SystemConfig(
+        mem_size=args.memsize,
+        width=args.width,
+        rob_entries=args.rob_entries,
+        iq_entries=args.iq_entries,
+        lq_entries=args.lq_entries,
+        sq_entries=args.sq_entries,
+        phys_int_regs=args.phys_int_regs,
+        phys_float_regs=args.phys_float_regs,
+        bp_type=args.bp_type,
+        bp_params=args.bp_params,
+        **memory_fields(args),
+        **cache_fields(args),
+        **fast_forward_fields(args),
+    )
+
+def run(args, base=None):
+    # base: optional pre-built system_builder.build_base() (batch mode)
+    # fallback: run /bin/ls from host (must be compatible)
+    cmd = resolve_benches([args.bench]) if args.bench else ["/bin/ls"]
     w = args.width
-    cpu.fetchWidth = w
-    cpu.decodeWidth = w
-    cpu.renameWidth = w
-    cpu.issueWidth = w
-    cpu.commitWidth = w
-
-    # back-end resources sized for wider issue
-    cpu.numROBEntries = 256
-    cpu.numIQEntries = 64
-    cpu.numPhysIntRegs = 256
-    cpu.numPhysFloatRegs = 256
-    cpu.LQEntries = 64
-    cpu.SQEntries = 64
-
-    system.cpu = cpu
-
-    # ----------------------------------------------------------------
-    # Memory controller + DRAM device (gem5 v25 pattern)
-    # ----------------------------------------------------------------
-    system.mem_ctrl = MemCtrl()
-    system.mem_ctrl.dram = DDR3_1600_8x8(range=system.mem_ranges[0])
-    # connect memctrl to membus (use helper that handles name variants)
-    connect_memctrl(system.mem_ctrl, system.membus)
-
-    # Connect system and cpu cache ports to membus (helpers handle name differences)
-    connect_system_port(system, system.membus)
-    connect_cpu_bus_ports(cpu, system.membus)
-
-    # ----------------------------------------------------------------
-    # Workload (SE mode) — use SEWorkload to init compatible binary
-    # ----------------------------------------------------------------
-    if args.bench:
-        # Init SEWorkload (ensures loader/ELF info is set up)
-        try:
-            system.workload = SEWorkload.init_compatible(args.bench)
-        except Exception as e:
-            print("Warning: SEWorkload.init_compatible failed:", e, file=sys.stderr)
-            # still continue - some builds accept system.workload = SEWorkload([...])
-            try:
-                system.workload = SEWorkload()
-            except Exception:
-                pass
-
-        process = Process()
-        process.cmd = [args.bench]
-    else:
-        # fallback: run /bin/ls from host (must be compatible)
-        process = Process()
-        process.cmd = ["/bin/ls"]
-
-    # attach to cpu
+    config = config_from_args(args)
     try:
-        system.cpu.workload = process
-    except Exception:
-        # fallback (older configs did cpu.workload = process)
-        cpu.workload = process
-
-    # create thread contexts
-    cpu.createThreads()
-
-    # ----------------------------------------------------------------
-    # Interrupt controller (required for x86 O3 CPU in SE)
-    # ----------------------------------------------------------------
-    cpu.createInterruptController()
-    connect_interrupts(cpu, system.membus)
+        system = build_system(config, cmd, base)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    if args.take_checkpoint:
+        if args.roi_insts:
+            system.cpu.max_insts_any_thread = args.roi_insts
+        if args.roi_work_begin:
+            system.exit_on_work_items = True
+    elif args.interval_work_items:
+        system.exit_on_work_items = True
 
     # ----------------------------------------------------------------
     # Root and start simulation
     # ----------------------------------------------------------------
     root = Root(full_system=False, system=system)
-    m5.instantiate()
 
-    print(f"Starting simulation: bench={process.cmd} width={w} memsize={args.memsize}")
-    exit_event = m5.simulate()
+    if args.take_checkpoint:
+        m5.instantiate()
+        progress = Progress.from_args(args, [system.cpu], args.roi_insts)
+        print(f"Fast-forwarding to ROI: bench={cmd} cpu={config.cpu_type}")
+        reached = run_to_roi(system, args.roi_work_begin, progress.simulate if progress else m5.simulate)
+        if progress:
+            progress.finish("region of interest" if reached else "program finished before the ROI")
+        if not reached:
+            print("Error: program finished before the region of interest.", file=sys.stderr)
+            sys.exit(1)
+        m5.checkpoint(args.take_checkpoint)
+        print("Checkpoint written to", args.take_checkpoint, "@ tick", m5.curTick())
+        return
+
+    if args.restore_checkpoint:
+        m5.instantiate(args.restore_checkpoint)
+        print("Restored checkpoint", args.restore_checkpoint, "@ tick", m5.curTick())
+    else:
+        m5.instantiate()
+
+    if args.fast_forward:
+        print(f"Fast-forwarding {args.fast_forward} instructions: cpu={config.ff_cpu_type}")
+        if not fast_forward(system, args.fast_forward):
+            print("Error: program finished during the fast-forward.", file=sys.stderr)
+            sys.exit(1)
+
+    if args.max_insts:
+        # relative to the current count, so restored and fast-forwarded runs measure the same length
+        system.cpu.scheduleInstStop(0, args.max_insts, MAX_INSTS_CAUSE)
+
+    progress = Progress.from_args(args, [system.cpu], args.max_insts)
+    print(f"Starting simulation: bench={cmd} width={w} memsize={args.memsize}")
+    simulate = progress.simulate if progress else m5.simulate
+    if interval_mode(args):
+        exit_event = run_intervals(args, system, simulate)
+    else:
+        exit_event = simulate()
+    if progress:
+        progress.finish(exit_event.getCause())
     print("Exited @ tick", m5.curTick(), "because", exit_event.getCause())
 
-if __name__ == "__main__":
-    main()
-
-import m5
-from m5 import stats
-
-
-print("Beginning simulation!")
-exit_event = m5.simulate()
+    # Dump and finalize stats (in interval mode the last interval was already recorded)
+    if not interval_mode(args):
+        m5.stats.dump()
+        m5.stats.reset()
 
-print("Exiting @ tick {} because {}"
-      .format(m5.curTick(), exit_event.getCause()))
+def main():
+    run(parse_args())
 
-# Dump and finalize stats
-m5.stats.dump()
-m5.stats.reset()
+# gem5 runs config scripts with __name__ set to "__m5_main__"
+if __name__ in ("__main__", "__m5_main__"):
+    main()
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+shared_queue.py
+
+Multi-node sweep execution over a queue directory on a shared filesystem
+(NFS, Lustre, ...). There is no central service: every node runs workers
+that pull jobs straight from the directory, and all state lives in small
+files whose updates are atomic on a shared filesystem:
+
+  jobs/<name>.json         job spec, written once by submit
+  leases/<name>.lease      claim; created with O_EXCL, kept alive by
+                           touching it (heartbeat)
+  leases/<name>.spec       claim of a speculative second copy
+  failures/<name>.json     attempts, backoff and last failure signature
+  done/<name>.json         result record; hard-linked into place, so the
+                           first copy to finish wins
+  quarantined/<name>.json  deterministic failures, no longer retried
+  nodes/<worker>.alive     worker liveness, also the worker's clock
+
+Each worker visits the jobs in its own hashed order, so workers rarely
+race for the same lease and throughput grows with the number of nodes.
+Leases not touched for --lease-timeout seconds belong to dead workers and
+are stolen. Lease ages are measured against the mtime of the worker's own
+freshly touched alive file, i.e. against the file server's clock, so
+node clocks need not agree. Once no job is left to claim, idle workers
+re-dispatch stragglers (running --speculate-factor times longer than the
+median finished job) as a speculative copy into <outdir>.spec; whichever
+copy finishes first publishes the result and the other is killed.
+Crashes are retried with exponential backoff and repeated failures are
+quarantined as in job_queue.py. With a shared --cache-dir, finished
+points also land in one result cache.
+
+`local` starts several worker processes as separate nodes on this host
+against a local directory, a stand-in for a cluster when testing.
+
+Run with the host python (not gem5), e.g. from the gem5 root:
+  python3 experiments/configs/sweep.py --gem5=build/X86/gem5.opt \
+    --bench=suite:stride --grid bp=LocalBP,TournamentBP,LTAGE \
+    --grid width=1,2,4,8 --outdir=/shared/out/grid --shared-queue=/shared/queue/grid
+  # on every other node:
+  python3 experiments/configs/shared_queue.py work --queue-dir=/shared/queue/grid --jobs=16
+  python3 experiments/configs/shared_queue.py status --queue-dir=/shared/queue/grid
+  python3 experiments/configs/shared_queue.py collect --queue-dir=/shared/queue/grid \
+    --output=/shared/out/grid/sweep.json
+  python3 experiments/configs/shared_queue.py local --queue-dir=/tmp/grid --nodes=3 --jobs=2
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from job_queue import HOST, failure_signature, job_warnings, make_jobs, run_job
+from result_cache import ResultCache
+from sweep import parse_exit_cause, read_selfcheck
+
+DIRS = ["jobs", "leases", "failures", "done", "quarantined", "nodes"]
+
+
+def write_json(path, data):
+    # Atomic replace through a private temporary file
+    tmp = f"{path}.tmp.{HOST}.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def publish_json(path, data):
+    # Write path only if it does not exist yet; False if another copy got there first
+    tmp = f"{path}.tmp.{HOST}.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    try:
+        os.link(tmp, path)
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        os.remove(tmp)
+
+
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def create_exclusive(path, data):
+    # O_EXCL create: exactly one worker wins a lease
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    return True
+
+
+class SharedQueue:
+    def __init__(self, root):
+        self.root = root
+        for name in DIRS:
+            os.makedirs(os.path.join(root, name), exist_ok=True)
+
+    def path(self, kind, name, suffix=".json"):
+        return os.path.join(self.root, kind, name + suffix)
+
+    def names(self):
+        return sorted(f[:-5] for f in os.listdir(os.path.join(self.root, "jobs")) if f.endswith(".json"))
+
+    def job(self, name):
+        return read_json(self.path("jobs", name))
+
+    def finished(self, name):
+        return (os.path.exists(self.path("done", name))
+                or os.path.exists(self.path("quarantined", name)))
+
+    def submit(self, jobs, cached=()):
+        # Job specs are immutable; a changed config hash clears the old outcome
+        added = reset = 0
+        for job in jobs:
+            old = self.job(job["name"])
+            if old is not None and old["config_hash"] == job["config_hash"]:
+                continue
+            if old is not None:
+                for kind in ("done", "quarantined", "failures"):
+                    try:
+                        os.remove(self.path(kind, job["name"]))
+                    except FileNotFoundError:
+                        pass
+                reset += 1
+            else:
+                added += 1
+            write_json(self.path("jobs", job["name"]), job)
+        for name, exit_cause, selfcheck in cached:
+            job = self.job(name)
+            publish_json(self.path("done", name), result_record(job, job["outdir"], 0, 0.0, None, exit_cause,
+                                                                cached=True, selfcheck=selfcheck))
+        return added, reset
+
+    def counts(self):
+        counts = {"done": 0, "quarantined": 0, "running": 0, "pending": 0}
+        for name in self.names():
+            if os.path.exists(self.path("done", name)):
+                counts["done"] += 1
+            elif os.path.exists(self.path("quarantined", name)):
+                counts["quarantined"] += 1
+            elif os.path.exists(self.path("leases", name, ".lease")):
+                counts["running"] += 1
+            else:
+                counts["pending"] += 1
+        return counts
+
+    def records(self, names=None):
+        # One sweep.py result per job; unfinished jobs have returncode None
+        results = []
+        for name in names or self.names():
+            record = (read_json(self.path("done", name))
+                      or read_json(self.path("quarantined", name)))
+            if record is None:
+                job = self.job(name)
+                record = result_record(job, job["outdir"], None, 0.0, None, None, state="pending")
+            results.append(record)
+        return results
+
+
+def result_record(job, outdir, returncode, wall_seconds, peak_rss_kb, exit_cause, state="done",
+                  worker=None, attempts=0, speculative=False, cached=False, selfcheck=None):
+    # Same fields as job_queue.job_result; cached records carry the verdict from the cache entry
+    if returncode is not None and not cached:
+        selfcheck = read_selfcheck(os.path.join(outdir, "simout"))
+    return {
+        "point": job["point"],
+        "outdir": outdir,
+        "command": job["command"],
+        "returncode": returncode,
+        "wall_seconds": round(wall_seconds, 3),
+        "exit_cause": exit_cause,
+        "selfcheck": selfcheck,
+        "kips": None,
+        "cached": cached,
+        "cache_key": job["config_hash"] if job["cache_dir"] else None,
+        "state": state,
+        "attempts": attempts,
+        "host": worker_node(worker) if worker else None,
+        "worker": worker,
+        "peak_rss_kb": peak_rss_kb,
+        "warnings": job_warnings(outdir) if returncode is not None else [],
+        "speculative": speculative,
+    }
+
+
+def worker_node(worker):
+    # Worker ids are <node>-<pid>-<index>
+    return worker.rsplit("-", 2)[0]
+
+
+def spec_command(command, outdir):
+    # The job's command with its --outdir moved to the speculative copy's directory
+    return [f"--outdir={outdir}" if arg.startswith("--outdir=") else arg for arg in command]
+
+
+class Worker:
+    def __init__(self, queue, worker_id, max_attempts=4, backoff=30.0, lease_timeout=300.0,
+                 heartbeat=30.0, speculate_factor=2.0, timeout=None, report=print):
+        self.queue = queue
+        self.id = worker_id
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.lease_timeout = lease_timeout
+        self.heartbeat = heartbeat
+        self.speculate_factor = speculate_factor
+        self.timeout = timeout
+        self.report = report
+        self.alive = queue.path("nodes", worker_id, ".alive")
+        self.caches = {}
+
+    def now(self):
+        # Touch our alive file and read back its mtime: the file server's clock
+        with open(self.alive, "a"):
+            pass
+        os.utime(self.alive)
+        return os.stat(self.alive).st_mtime
+
+    def order(self, names):
+        # Every worker walks the jobs in its own order, so claims rarely collide
+        return sorted(names, key=lambda n: hashlib.sha1(f"{self.id}/{n}".encode()).hexdigest())
+
+    def runnable(self, name, now):
+        failures = read_json(self.queue.path("failures", name))
+        return failures is None or failures["next_try"] <= now
+
+    def claim(self, name, now, suffix=".lease"):
+        lease = self.queue.path("leases", name, suffix)
+        data = {"worker": self.id, "pid": os.getpid(), "started": now}
+        if create_exclusive(lease, data):
+            if self.queue.finished(name):
+                os.remove(lease)
+                return None
+            return lease
+        try:
+            age = now - os.stat(lease).st_mtime
+        except FileNotFoundError:
+            return None
+        if age <= self.lease_timeout:
+            return None
+        # Steal a dead worker's lease: the rename succeeds for exactly one stealer
+        stale = f"{lease}.stale.{self.id}"
+        try:
+            os.rename(lease, stale)
+        except FileNotFoundError:
+            return None
+        if now - os.stat(stale).st_mtime <= self.lease_timeout:
+            # The owner heartbeat in between: give the lease back
+            os.rename(stale, lease)
+            return None
+        os.remove(stale)
+        self.report(f"{name}: stole lease of a dead worker ({age:.0f}s without heartbeat)")
+        return self.claim(name, now, suffix)
+
+    def stragglers(self, names, outstanding, now):
+        # Leased jobs running speculate_factor times longer than the median finished job
+        walls = [r["wall_seconds"] for r in (read_json(self.queue.path("done", n)) for n in names)
+                 if r and not r["cached"]]
+        if not walls or not self.speculate_factor:
+            return []
+        limit = self.speculate_factor * statistics.median(walls)
+        slow = []
+        for name in outstanding:
+            lease = read_json(self.queue.path("leases", name, ".lease"))
+            if lease and lease["worker"] != self.id and not self.queue.finished(name) \
+                    and now - lease["started"] > limit:
+                slow.append(name)
+        return slow
+
+    def next_job(self):
+        # (name, lease path, speculative); None when all jobs are finished, "wait" while
+        # the outstanding ones are leased or backing off
+        names = self.queue.names()
+        now = self.now()
+        outstanding = [n for n in names if not self.queue.finished(n)]
+        if not outstanding:
+            return None
+        for name in self.order(outstanding):
+            if self.runnable(name, now):
+                lease = self.claim(name, now)
+                if lease:
+                    return name, lease, False
+        for name in self.stragglers(names, outstanding, now):
+            lease = self.claim(name, now, ".spec")
+            if lease:
+                return name, lease, True
+        return "wait"
+
+    def run(self, name, lease, speculative):
+        job = self.queue.job(name)
+        outdir = job["outdir"] + ".spec" if speculative else job["outdir"]
+        command = spec_command(job["command"], outdir) if speculative else job["command"]
+        done_path = self.queue.path("done", name)
+        lost = []
+
+        def beat():
+            self.now()
+            # Another worker stole the lease (we looked dead): stop and leave the job to it
+            if (read_json(lease) or {}).get("worker") != self.id:
+                lost.append(True)
+                return True
+            try:
+                os.utime(lease)
+            except FileNotFoundError:
+                pass
+            # The other copy finished first
+            return os.path.exists(done_path)
+
+        returncode, wall, rss = run_job(name, command, outdir, self.timeout, beat, self.heartbeat)
+        try:
+            if lost:
+                self.report(f"{name}: lease taken over by another worker; killed this copy")
+            elif os.path.exists(done_path):
+                self.report(f"{name}: {'speculative' if speculative else 'primary'} copy lost the race")
+            elif returncode == 0:
+                self.succeed(job, name, outdir, wall, rss, speculative)
+            elif speculative:
+                self.report(f"{name}: speculative copy failed (rc={returncode}); primary keeps running")
+            else:
+                self.fail(job, name, outdir, returncode, wall, rss)
+        finally:
+            # Only our own lease: a stolen one now belongs to another worker
+            if (read_json(lease) or {}).get("worker") == self.id:
+                os.remove(lease)
+
+    def succeed(self, job, name, outdir, wall, rss, speculative):
+        exit_cause = parse_exit_cause(os.path.join(outdir, "simout"))
+        failures = read_json(self.queue.path("failures", name)) or {"attempts": 0}
+        record = result_record(job, outdir, 0, wall, rss, exit_cause, worker=self.id,
+                               attempts=failures["attempts"] + 1, speculative=speculative)
+        if not publish_json(self.queue.path("done", name), record):
+            return
+        if job["cache_dir"] and job["config"]:
+            if job["cache_dir"] not in self.caches:
+                self.caches[job["cache_dir"]] = ResultCache(job["cache_dir"])
+            self.caches[job["cache_dir"]].put_outdir(job["config_hash"], job["config"], exit_cause, outdir)
+        self.report(f"{name}: ok ({wall:.1f}s, {rss / 1024:.0f}MB peak, {self.id}"
+                    f"{', speculative copy' if speculative else ''}, {exit_cause})")
+
+    def fail(self, job, name, outdir, returncode, wall, rss):
+        exit_cause = parse_exit_cause(os.path.join(outdir, "simout"))
+        failure = failure_signature(returncode, exit_cause, outdir)
+        previous = read_json(self.queue.path("failures", name)) or {"attempts": 0, "failure": None}
+        attempts = previous["attempts"] + 1
+        if failure == previous["failure"] or attempts >= self.max_attempts:
+            record = result_record(job, outdir, returncode, wall, rss, exit_cause, state="quarantined",
+                                   worker=self.id, attempts=attempts)
+            record["failure"] = failure
+            publish_json(self.queue.path("quarantined", name), record)
+            self.report(f"{name}: quarantined after {attempts} attempts ({failure})")
+            return
+        delay = self.backoff * 2 ** (attempts - 1)
+        write_json(self.queue.path("failures", name),
+                   {"attempts": attempts, "failure": failure, "next_try": self.now() + delay})
+        self.report(f"{name}: failed ({failure}); retry in {delay:.0f}s")
+
+    def loop(self, poll=None):
+        poll = poll or min(5.0, self.heartbeat)
+        try:
+            while True:
+                job = self.next_job()
+                if job is None:
+                    return
+                if job == "wait":
+                    time.sleep(poll)
+                    continue
+                self.run(*job)
+        finally:
+            os.remove(self.alive)
+
+
+def work(queue, node, jobs, **options):
+    # Runs `jobs` workers of this node until every job is done or quarantined
+    workers = [Worker(queue, f"{node}-{os.getpid()}-{i}", **options) for i in range(jobs)]
+    threads = [threading.Thread(target=w.loop) for w in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def worker_options(args):
+    return {"max_attempts": args.max_attempts, "backoff": args.backoff,
+            "lease_timeout": args.lease_timeout, "heartbeat": args.heartbeat,
+            "speculate_factor": args.speculate_factor, "timeout": args.timeout}
+
+
+def run_shared(points, args, jobs, cache=None):
+    # sweep.py --shared-queue: submit the points, work on them here and collect the results
+    queue = SharedQueue(args.shared_queue)
+    specs, cached = make_jobs(points, args, cache)
+    added, reset = queue.submit(specs, cached)
+    counts = queue.counts()
+    print(f"Shared queue {args.shared_queue}: {added} new, {reset} changed; {counts['done']} done, "
+          f"{counts['pending'] + counts['running']} outstanding, {counts['quarantined']} quarantined")
+    work(queue, HOST, jobs, max_attempts=args.max_attempts, backoff=args.backoff,
+         lease_timeout=args.stale_timeout, heartbeat=args.heartbeat,
+         speculate_factor=args.speculate_factor, timeout=args.timeout)
+    return queue.records([spec["name"] for spec in specs])
+
+
+def print_status(queue, lease_timeout):
+    counts = queue.counts()
+    print(", ".join(f"{n} {state}" for state, n in counts.items()))
+    # Throughput per node from the finished records
+    by_node = {}
+    for record in queue.records():
+        if record["state"] == "done" and not record["cached"]:
+            by_node.setdefault(worker_node(record["worker"]), []).append(record["wall_seconds"])
+    now = time.time()
+    nodes_dir = os.path.join(queue.root, "nodes")
+    alive = {}
+    for f in os.listdir(nodes_dir):
+        if now - os.stat(os.path.join(nodes_dir, f)).st_mtime <= lease_timeout:
+            node = worker_node(f[:-len(".alive")])
+            alive[node] = alive.get(node, 0) + 1
+    for node in sorted(set(by_node) | set(alive)):
+        walls = by_node.get(node, [])
+        print(f"  {node:<24} {alive.get(node, 0)} live workers, {len(walls)} jobs done, "
+              f"{sum(walls):.0f} simulation seconds")
+    for record in queue.records():
+        if record["state"] == "quarantined":
+            print(f"  quarantined {os.path.basename(record['outdir'])}: {record['failure']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-filesystem work-stealing queue for sweep points")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    work_parser = sub.add_parser("work", help="Run jobs on this node until none is left")
+    local_parser = sub.add_parser("local", help="Run several nodes as processes on this host")
+    local_parser.add_argument("--nodes", type=int, default=2, help="Simulated nodes")
+    for p in (work_parser, local_parser):
+        p.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                       help="Concurrent simulations per node")
+        p.add_argument("--node", type=str, default=HOST, help="Node name (default: host name)")
+        p.add_argument("--max-attempts", type=int, default=4,
+                       help="Quarantine a job after this many failed attempts")
+        p.add_argument("--backoff", type=float, default=30.0,
+                       help="Seconds before the first retry; doubles with every attempt")
+        p.add_argument("--lease-timeout", type=float, default=300.0,
+                       help="Steal leases without a heartbeat for this many seconds")
+        p.add_argument("--heartbeat", type=float, default=30.0, help="Seconds between lease heartbeats")
+        p.add_argument("--speculate-factor", type=float, default=2.0,
+                       help="Re-dispatch jobs running this many times the median job time (0: never)")
+        p.add_argument("--timeout", type=float, default=None,
+                       help="Kill a simulation after this many host seconds")
+
+    status_parser = sub.add_parser("status", help="Job states and per-node progress")
+    status_parser.add_argument("--lease-timeout", type=float, default=300.0,
+                               help="Nodes silent for longer are not counted as live")
+    retry_parser = sub.add_parser("retry", help="Requeue quarantined jobs with fresh attempts")
+    retry_parser.add_argument("names", nargs="*", help="Only these jobs (default: all quarantined)")
+    collect_parser = sub.add_parser("collect", help="Write every job's result as one sweep.json")
+    collect_parser.add_argument("--output", type=str, required=True, help="sweep.json to write")
+    for p in (work_parser, local_parser, status_parser, retry_parser, collect_parser):
+        p.add_argument("--queue-dir", type=str, required=True, help="Queue directory on the shared filesystem")
+    args = parser.parse_args()
+
+    queue = SharedQueue(args.queue_dir)
+    if args.command == "work":
+        work(queue, args.node, args.jobs, **worker_options(args))
+        print_status(queue, args.lease_timeout)
+    elif args.command == "local":
+        # One `work` process per node, as on a real cluster
+        argv = [sys.executable, os.path.abspath(__file__), "work", f"--queue-dir={args.queue_dir}",
+                f"--jobs={args.jobs}"]
+        argv += [f"--{k.replace('_', '-')}={v}" for k, v in worker_options(args).items() if v is not None]
+        procs = [subprocess.Popen(argv + [f"--node={args.node}.{i}"]) for i in range(args.nodes)]
+        for proc in procs:
+            proc.wait()
+    elif args.command == "status":
+        print_status(queue, args.lease_timeout)
+    elif args.command == "retry":
+        names = args.names or [n for n in queue.names() if os.path.exists(queue.path("quarantined", n))]
+        for name in names:
+            for kind in ("quarantined", "failures"):
+                try:
+                    os.remove(queue.path(kind, name))
+                except FileNotFoundError:
+                    pass
+        print(f"Requeued {len(names)} jobs")
+    elif args.command == "collect":
+        results = queue.records()
+        with open(args.output, "w") as f:
+            json.dump({"script": results[0]["command"][3] if results else None,
+                       "gem5": results[0]["command"][0] if results else None,
+                       "results": results}, f, indent=2)
+        print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
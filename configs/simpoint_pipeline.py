@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+simpoint_pipeline.py
+
+SimPoint-driven sampled simulation built on se.py's SimPoint support.
+
+Stages (run all of them with "all", or one at a time):
+  profile     se.py --simpoint-profile on AtomicSimpleCPU -> simpoint.bb.gz
+  cluster     random-project the BBVs and k-means them (k picked by BIC, as
+              in SimPoint 3) -> simpoints / weights files
+  checkpoint  se.py --take-simpoint-checkpoint at every selected interval
+  detail      restore every checkpoint on the detailed CPU, in parallel
+  combine     weight the per-simpoint CPIs into a whole-program CPI/IPC with
+              a 95% confidence interval (stratified over clusters)
+
+More than one interval is sampled per cluster (--samples-per-cluster,
+default 2) so the within-cluster CPI variance, and hence the error bound,
+can be estimated.
+
+Run with the host python from the gem5 root, e.g.:
+  python3 experiments/configs/simpoint_pipeline.py all --gem5=build/X86/gem5.opt \
+    --bench=vector --workdir=out/simpoint/vector --interval=10000000
+"""
+
+import argparse
+import concurrent.futures
+import gzip
+import json
+import math
+import os
+import random
+import re
+import shlex
+import subprocess
+import sys
+
+import numpy as np
+
+from gem5stats import get_stat, read_stats
+from sweep import default_jobs, parse_exit_cause
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PROJECTION_DIMS = 15
+CPT_PATTERN = re.compile(r"cpt\.simpoint_(\d+)_inst_(\d+)_weight_([\d.e-]+)_interval_(\d+)_warmup_(\d+)")
+
+
+def run_gem5(args, outdir, se_args):
+    cmd = [args.gem5, "-re", f"--outdir={outdir}", args.se_script, f"--cmd={args.bench}"]
+    if args.bench_args:
+        cmd.append(f"--options={args.bench_args}")
+    cmd += se_args
+    os.makedirs(outdir, exist_ok=True)
+    proc = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL)
+    return proc.returncode, cmd
+
+
+def workpath(args, *parts):
+    return os.path.join(args.workdir, *parts)
+
+
+# ----------------------------------------------------------------
+# profile
+# ----------------------------------------------------------------
+def stage_profile(args):
+    outdir = workpath(args, "profile")
+    rc, cmd = run_gem5(args, outdir, ["--cpu-type=AtomicSimpleCPU", "--simpoint-profile",
+                                      f"--simpoint-interval={args.interval}"])
+    bbv = os.path.join(outdir, "simpoint.bb.gz")
+    if rc != 0 or not os.path.exists(bbv):
+        sys.exit(f"Profiling failed (rc={rc}): {' '.join(cmd)}")
+    print(f"BBV profile written to {bbv}")
+
+
+# ----------------------------------------------------------------
+# cluster
+# ----------------------------------------------------------------
+def read_bbv(path):
+    # Each "T:bb:count :bb:count ..." line is one interval's basic block vector
+    intervals = []
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            if not line.startswith("T"):
+                continue
+            vector = {}
+            for token in line[1:].split():
+                _, bb, count = token.split(":")
+                vector[int(bb)] = int(count)
+            intervals.append(vector)
+    return intervals
+
+
+def project(intervals, dims=PROJECTION_DIMS, seed=1):
+    # Random linear projection of the normalized BBVs (one random row per block)
+    rows = {}
+    data = np.zeros((len(intervals), dims))
+    for i, vector in enumerate(intervals):
+        total = sum(vector.values()) or 1
+        for bb, count in vector.items():
+            row = rows.get(bb)
+            if row is None:
+                row = rows[bb] = np.random.default_rng((seed, bb)).uniform(-1.0, 1.0, dims)
+            data[i] += row * (count / total)
+    return data
+
+
+def kmeans(data, k, rng, iterations=100):
+    # k-means++ seeding followed by Lloyd iterations
+    centers = [data[rng.integers(len(data))]]
+    for _ in range(1, k):
+        d2 = np.min([((data - c) ** 2).sum(axis=1) for c in centers], axis=0)
+        if d2.sum() == 0:
+            break
+        centers.append(data[rng.choice(len(data), p=d2 / d2.sum())])
+    centers = np.array(centers)
+    labels = None
+    for _ in range(iterations):
+        dist = ((data[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        new_labels = dist.argmin(axis=1)
+        if labels is not None and np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+        for c in range(len(centers)):
+            members = data[labels == c]
+            if len(members):
+                centers[c] = members.mean(axis=0)
+    return labels, centers
+
+
+def bic(data, labels, centers):
+    # Bayesian information criterion of a spherical Gaussian mixture (X-means)
+    r, m = data.shape
+    k = len(centers)
+    sse = ((data - centers[labels]) ** 2).sum()
+    if r <= k or sse == 0:
+        return math.inf
+    variance = sse / (m * (r - k))
+    loglik = 0.0
+    for c in range(k):
+        rn = int((labels == c).sum())
+        if rn == 0:
+            continue
+        loglik += (rn * math.log(rn) - rn * math.log(r)
+                   - rn * m / 2 * math.log(2 * math.pi * variance)
+                   - (rn - 1) * m / 2)
+    params = (k - 1) + m * k + 1
+    return loglik - params / 2 * math.log(r)
+
+
+def choose_clustering(data, max_k, seeds, rng):
+    # Smallest k whose BIC reaches 90% of the observed BIC range (SimPoint's rule)
+    candidates = []
+    for k in range(1, min(max_k, len(data)) + 1):
+        best = None
+        for _ in range(seeds):
+            labels, centers = kmeans(data, k, rng)
+            score = bic(data, labels, centers)
+            if best is None or score > best[0]:
+                best = (score, labels, centers)
+        candidates.append((k,) + best)
+    finite = [c[1] for c in candidates if math.isfinite(c[1])]
+    if not finite:
+        return candidates[0]
+    lo, hi = min(finite), max(finite)
+    for candidate in candidates:
+        if not math.isfinite(candidate[1]) or candidate[1] >= lo + 0.9 * (hi - lo):
+            return candidate
+    return candidates[-1]
+
+
+def stage_cluster(args):
+    intervals = read_bbv(workpath(args, "profile", "simpoint.bb.gz"))
+    if not intervals:
+        sys.exit("Empty BBV profile")
+    data = project(intervals)
+    rng = np.random.default_rng(args.seed)
+    k, score, labels, centers = choose_clustering(data, args.max_k, args.kmeans_seeds, rng)
+
+    # The interval closest to each centroid, plus random extra members per cluster
+    pick = random.Random(args.seed)
+    samples = []
+    for c in range(len(centers)):
+        members = np.flatnonzero(labels == c)
+        if len(members) == 0:
+            continue
+        dist = ((data[members] - centers[c]) ** 2).sum(axis=1)
+        chosen = [int(members[dist.argmin()])]
+        others = [int(m) for m in members if m != chosen[0]]
+        chosen += pick.sample(others, min(len(others), args.samples_per_cluster - 1))
+        weight = len(members) / len(intervals)
+        for interval in chosen:
+            samples.append({"cluster": c, "interval": interval,
+                            "cluster_weight": weight, "weight": weight / len(chosen),
+                            "cluster_size": int(len(members))})
+    # takeSimpointCheckpoints numbers checkpoints in interval order; keep ids in that order too
+    samples.sort(key=lambda s: s["interval"])
+    for i, s in enumerate(samples):
+        s["id"] = i
+
+    with open(workpath(args, "simpoints"), "w") as sp, open(workpath(args, "weights"), "w") as wt:
+        for s in samples:
+            sp.write(f"{s['interval']} {s['id']}\n")
+            wt.write(f"{s['weight']:.6f} {s['id']}\n")
+    with open(workpath(args, "clusters.json"), "w") as f:
+        json.dump({"k": k, "bic": score, "intervals": len(intervals),
+                   "interval_insts": args.interval, "samples": samples}, f, indent=2)
+    print(f"{len(intervals)} intervals -> k={k} clusters, {len(samples)} simpoints")
+
+
+# ----------------------------------------------------------------
+# checkpoint
+# ----------------------------------------------------------------
+def stage_checkpoint(args):
+    spec = ",".join([workpath(args, "simpoints"), workpath(args, "weights"),
+                     str(args.interval), str(args.warmup)])
+    rc, cmd = run_gem5(args, workpath(args, "checkpoint"), [
+        "--cpu-type=AtomicSimpleCPU", f"--take-simpoint-checkpoint={spec}",
+        f"--checkpoint-dir={workpath(args, 'checkpoints')}"])
+    if rc != 0 or not list_checkpoints(args):
+        sys.exit(f"Checkpointing failed (rc={rc}): {' '.join(cmd)}")
+    print(f"{len(list_checkpoints(args))} checkpoints in {workpath(args, 'checkpoints')}")
+
+
+def list_checkpoints(args):
+    # Sorted like Simulation.findCptDir, so position i is restored by -r i+1
+    cptdir = workpath(args, "checkpoints")
+    if not os.path.isdir(cptdir):
+        return []
+    return sorted(d for d in os.listdir(cptdir) if CPT_PATTERN.match(d))
+
+
+# ----------------------------------------------------------------
+# detail
+# ----------------------------------------------------------------
+def stage_detail(args):
+    cpts = list_checkpoints(args)
+    if not cpts:
+        sys.exit("No SimPoint checkpoints; run the checkpoint stage first")
+    extra = shlex.split(args.detail_args)
+
+    def detail(index, cpt):
+        outdir = workpath(args, "detail", cpt)
+        rc, _ = run_gem5(args, outdir, [
+            "--restore-simpoint-checkpoint", f"-r{index + 1}",
+            f"--checkpoint-dir={workpath(args, 'checkpoints')}",
+            f"--cpu-type={args.detail_cpu}", f"--restore-with-cpu={args.detail_cpu}"] + extra)
+        return cpt, rc, parse_exit_cause(os.path.join(outdir, "simout"))
+
+    jobs = args.jobs or default_jobs([{}] * len(cpts))
+    failed = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(detail, i, cpt) for i, cpt in enumerate(cpts)]
+        for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            cpt, rc, cause = future.result()
+            failed += rc != 0
+            print(f"[{done}/{len(cpts)}] {cpt}: {'ok' if rc == 0 else f'FAILED rc={rc}'} ({cause})")
+    if failed:
+        sys.exit(f"{failed} detailed simpoint runs failed")
+
+
+# ----------------------------------------------------------------
+# combine
+# ----------------------------------------------------------------
+INST_STATS = ("system.cpu.commitStats0.numInsts", "system.cpu.committedInsts",
+              "system.cpu.committedInsts::total", "simInsts")
+
+
+def simpoint_cpi(stats_file):
+    # CPI of the measured interval: the last dump, after the warmup reset
+    dumps = read_stats(stats_file, select=INST_STATS + ("system.cpu.numCycles",))
+    if not dumps:
+        return math.nan
+    last = dumps[-1]
+    insts = get_stat(last, *INST_STATS)
+    cycles = get_stat(last, "system.cpu.numCycles")
+    return cycles / insts if insts else math.nan
+
+
+def checkpoint_interval(cpt):
+    # The sampled interval of a checkpoint: its start instruction plus the warmup it
+    # was taken ahead by, in interval lengths
+    _, inst, _, length, warmup = CPT_PATTERN.match(cpt).groups()
+    return (int(inst) + int(warmup)) // int(length)
+
+
+def stage_combine(args):
+    with open(workpath(args, "clusters.json")) as f:
+        clusters = json.load(f)
+    by_interval = {s["interval"]: s for s in clusters["samples"]}
+    cluster_weight = {s["cluster"]: s["cluster_weight"] for s in clusters["samples"]}
+    cluster_size = {s["cluster"]: s["cluster_size"] for s in clusters["samples"]}
+
+    per_cluster = {}
+    for cpt in list_checkpoints(args):
+        sample = by_interval[checkpoint_interval(cpt)]
+        stats_file = workpath(args, "detail", cpt, "stats.txt")
+        cpi = simpoint_cpi(stats_file) if os.path.exists(stats_file) else math.nan
+        sample["cpi"] = cpi
+        if math.isfinite(cpi):
+            per_cluster.setdefault(sample["cluster"], []).append(cpi)
+
+    if not per_cluster:
+        sys.exit("No detailed simpoint results to combine")
+
+    # Stratified estimate: CPI = sum_h W_h * mean_h, Var = sum_h W_h^2 s_h^2 / n_h * fpc_h
+    # (clusters whose runs all failed are left out and the weights renormalized)
+    covered = sum(cluster_weight[c] for c in per_cluster)
+    cpi = variance = 0.0
+    for c, cpis in per_cluster.items():
+        weight = cluster_weight[c] / covered
+        mean = sum(cpis) / len(cpis)
+        cpi += weight * mean
+        if len(cpis) > 1:
+            s2 = sum((x - mean) ** 2 for x in cpis) / (len(cpis) - 1)
+            fpc = 1 - len(cpis) / cluster_size[c]
+            variance += weight ** 2 * s2 / len(cpis) * fpc
+    ci = 1.96 * math.sqrt(variance)
+    ipc = 1 / cpi
+    result = {
+        "cpi": cpi, "cpi_ci95": ci, "ipc": ipc,
+        "ipc_ci95": ipc * ipc * ci,
+        "weight_covered": covered,
+        "clusters": len(per_cluster), "samples": clusters["samples"],
+    }
+    with open(workpath(args, "simpoint_results.json"), "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Whole-program CPI = {cpi:.4f} +/- {ci:.4f}  IPC = {ipc:.4f} +/- {result['ipc_ci95']:.4f} "
+          f"(95% CI, {len(per_cluster)} clusters, {covered:.1%} of execution covered)")
+
+
+STAGES = {
+    "profile": stage_profile,
+    "cluster": stage_cluster,
+    "checkpoint": stage_checkpoint,
+    "detail": stage_detail,
+    "combine": stage_combine,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SimPoint sampled simulation pipeline")
+    parser.add_argument("stage", choices=list(STAGES) + ["all"])
+    parser.add_argument("--gem5", type=str, default="build/X86/gem5.opt", help="gem5 binary")
+    parser.add_argument("--se-script", type=str, default=os.path.join(HERE, "se.py"), help="se.py to drive")
+    parser.add_argument("--bench", type=str, required=True, help="Benchmark binary")
+    parser.add_argument("--bench-args", type=str, default="", help="Benchmark arguments")
+    parser.add_argument("--workdir", type=str, required=True, help="Directory for all stage outputs")
+    parser.add_argument("--interval", type=int, default=10000000, help="SimPoint interval in instructions")
+    parser.add_argument("--warmup", type=int, default=1000000, help="Detailed warmup before each simpoint")
+    parser.add_argument("--max-k", type=int, default=30, help="Largest number of clusters tried")
+    parser.add_argument("--kmeans-seeds", type=int, default=5, help="k-means restarts per k")
+    parser.add_argument("--samples-per-cluster", type=int, default=2,
+                        help="Intervals simulated per cluster (>1 gives an error bound)")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for clustering and sampling")
+    parser.add_argument("--detail-cpu", type=str, default="DerivO3CPU", help="CPU for the detailed runs")
+    parser.add_argument("--detail-args", type=str, default="--caches --l2cache",
+                        help="Extra se.py arguments for the detailed runs")
+    parser.add_argument("--jobs", type=int, default=None, help="Concurrent detailed runs")
+    args = parser.parse_args()
+
+    if args.samples_per_cluster < 1:
+        parser.error("--samples-per-cluster must be at least 1")
+    os.makedirs(args.workdir, exist_ok=True)
+    stages = list(STAGES) if args.stage == "all" else [args.stage]
+    for stage in stages:
+        print(f"== {stage}")
+        STAGES[stage](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+size_search.py
+
+Bottleneck-guided successive-halving search for the O3 back-end sizes
+(ROB, IQ, physical registers, LQ/SQ) of each issue width. Finds the
+cheapest configuration (fewest total entries) whose IPC is within
+--tolerance of the largest configuration's, at a fraction of the
+simulations a full grid would need.
+
+Every width starts from a random sample of the grid plus the largest
+configuration (the IPC reference) and the se_superscalar_v25.py defaults.
+Rung r runs all candidates for --min-insts * eta^r instructions
+(se_superscalar_v25.py --max-insts) and keeps the best 1/eta: first the
+cheapest candidates within tolerance (loosened by --slack on short runs),
+then the fastest of the rest. The survivors' top-down stall shares
+(topdown.py) propose new candidates: a feasible one shrinks the structure
+that blocked rename least, an infeasible one grows the one that blocked it
+most. The last rung runs --max-insts instructions.
+
+Run with the host python from the gem5 root, e.g.:
+  python3 experiments/configs/size_search.py --gem5=build/X86/gem5.opt \
+    --bench=vector --widths=2,4,8 --tolerance=0.02 --roi-insts=20000000 \
+    --outdir=out/size_search
+
+Several --bench are scored by the geometric mean of their IPCs. The
+simulated-instruction budget used is reported against the full grid at
+--max-insts; results also go to <outdir>/size_search.json.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+
+import sweep
+from bench_suite import resolve_benches
+from bp_compare import result_stats
+from gem5stats import get_stat
+from result_cache import ResultCache
+from topdown import RESOURCES as TOPDOWN_RESOURCES, topdown
+
+# Searched values per structure; "regs" sets int and float registers, "lsq" LQ and SQ
+DEFAULT_SPACE = {
+    "rob": "64,96,128,192,256,384",
+    "iq": "16,32,48,64,96,128",
+    "regs": "128,192,256,384",
+    "lsq": "16,32,48,64,96",
+}
+# se_superscalar_v25.py defaults, reported for comparison
+BASELINE = {"rob": 256, "iq": 64, "regs": 256, "lsq": 64}
+# topdown.py stall resource -> searched structure
+STALL_RESOURCE = {"rob": "rob", "iq": "iq", "regs": "regs", "lq": "lsq", "sq": "lsq"}
+
+
+def cost(config):
+    # Total entries, counting both register files and both queues
+    return config["rob"] + config["iq"] + 2 * config["regs"] + 2 * config["lsq"]
+
+
+def config_key(config):
+    return tuple(config[k] for k in sorted(config))
+
+
+def config_label(config):
+    return " ".join(f"{k}={config[k]}" for k in DEFAULT_SPACE)
+
+
+def neighbour(config, space, resource, direction):
+    # The next smaller (-1) or larger (+1) value of one structure, or None
+    values = space[resource]
+    i = values.index(config[resource]) + direction
+    if not 0 <= i < len(values):
+        return None
+    return dict(config, **{resource: values[i]})
+
+
+def snap(config, space):
+    # Nearest searched values, e.g. for the baseline
+    return {k: min(space[k], key=lambda v: abs(v - config[k])) for k in space}
+
+
+def make_point(bench, width, config, insts):
+    return {"bench": bench, "width": str(width), "rob": str(config["rob"]), "iq": str(config["iq"]),
+            "int_regs": str(config["regs"]), "float_regs": str(config["regs"]),
+            "lq": str(config["lsq"]), "sq": str(config["lsq"]), "max_insts": str(insts)}
+
+
+class Search:
+    def __init__(self, args, space, cache):
+        self.args = args
+        self.space = space
+        self.cache = cache
+        self.spent_insts = 0
+        self.simulations = 0
+        self.log = []
+
+    def evaluate(self, width, configs, insts):
+        # Runs every config on every benchmark; returns one row per config
+        points = {}
+        for config in configs:
+            for bench in self.args.bench:
+                point = make_point(bench, width, config, insts)
+                points[sweep.point_name(point)] = (config_key(config), point)
+        todo = [point for _, point in points.values()]
+        jobs = self.args.jobs or sweep.default_jobs(todo)
+        results = sweep.run_sweep(todo, self.args, jobs, self.cache)
+        self.simulations += sum(1 for r in results if not r["cached"])
+        self.spent_insts += insts * sum(1 for r in results if not r["cached"])
+
+        per_config = {config_key(c): {"config": c, "ipcs": [], "stalls": {}} for c in configs}
+        for result in results:
+            key, _ = points[os.path.basename(result["outdir"])]
+            row = per_config[key]
+            stats = result_stats(result, self.cache) if result["returncode"] == 0 else {}
+            ipc = get_stat(stats, "system.cpu.ipc")
+            row["ipcs"].append(ipc)
+            if stats:
+                td = topdown(lambda *names: get_stat(stats, *names), width)
+                for resource in TOPDOWN_RESOURCES:
+                    share = td["stall_" + resource]
+                    if not math.isnan(share):
+                        name = STALL_RESOURCE[resource]
+                        row["stalls"][name] = row["stalls"].get(name, 0.0) + share
+        rows = []
+        for row in per_config.values():
+            ipcs = row["ipcs"]
+            ok = ipcs and all(i > 0 for i in ipcs)
+            row["ipc"] = math.exp(sum(math.log(i) for i in ipcs) / len(ipcs)) if ok else math.nan
+            row["cost"] = cost(row["config"])
+            rows.append(row)
+        return rows
+
+    def run(self, width):
+        args, space = self.args, self.space
+        rng = random.Random(f"{args.seed}-{width}")
+        grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+        largest = {k: max(v) for k, v in space.items()}
+        configs = {config_key(c): c for c in rng.sample(grid, min(args.initial, len(grid)))}
+        for config in (largest, snap(BASELINE, space)):
+            configs[config_key(config)] = config
+
+        insts, rung = args.min_insts, 0
+        while True:
+            final = insts >= args.max_insts
+            insts = min(insts, args.max_insts)
+            rows = self.evaluate(width, list(configs.values()), insts)
+            reference = next(r for r in rows if r["config"] == largest)["ipc"]
+            best = max((r["ipc"] for r in rows if not math.isnan(r["ipc"])), default=math.nan)
+            top = max(reference, best) if not math.isnan(reference) else best
+            tolerance = args.tolerance if final else args.tolerance * args.slack
+            for row in rows:
+                row["feasible"] = not math.isnan(row["ipc"]) and row["ipc"] >= top * (1 - tolerance)
+            ranked = sorted(rows, key=lambda r: (not r["feasible"], r["cost"] if r["feasible"] else 0,
+                                                 -r["ipc"] if not math.isnan(r["ipc"]) else math.inf))
+            self.log.append({"width": width, "rung": rung, "insts": insts, "candidates": len(rows),
+                             "max_ipc": top, "feasible": sum(r["feasible"] for r in rows)})
+            print(f"width {width} rung {rung}: {len(rows)} candidates x {insts} insts, "
+                  f"max IPC {top:.3f}, {sum(r['feasible'] for r in rows)} within {tolerance:.1%}")
+            if final:
+                return ranked, top, len(grid)
+
+            keep = ranked[:max(1, math.ceil(len(ranked) / args.eta))]
+            survivors = {config_key(r["config"]): r["config"] for r in keep}
+            survivors[config_key(largest)] = largest
+            # bottleneck guidance: shrink what never blocks, grow what blocks most
+            for row in keep[:args.guided]:
+                if not row["stalls"]:
+                    continue
+                if row["feasible"]:
+                    resource = min(space, key=lambda k: row["stalls"].get(k, 0.0))
+                    proposal = neighbour(row["config"], space, resource, -1)
+                else:
+                    resource = max(space, key=lambda k: row["stalls"].get(k, 0.0))
+                    proposal = neighbour(row["config"], space, resource, +1)
+                if proposal is not None:
+                    survivors.setdefault(config_key(proposal), proposal)
+            configs = survivors
+            insts *= args.eta
+            rung += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Successive-halving search for O3 resource sizes")
+    parser.add_argument("--gem5", type=str, default="build/X86/gem5.opt", help="gem5 binary")
+    parser.add_argument("--script", type=str, default=sweep.DEFAULT_SCRIPT,
+                        help="Config script (must take --max-insts and the O3 size flags)")
+    parser.add_argument("--bench", action="append", required=True, help="Benchmark binary or suite:<variant> (repeatable)")
+    parser.add_argument("--widths", type=str, default="1,2,4,8", help="Issue widths to size")
+    for name, values in DEFAULT_SPACE.items():
+        parser.add_argument(f"--{name}", type=str, default=values, help=f"Searched {name} sizes")
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="Accepted IPC loss against the largest configuration (0.02 = 2%%)")
+    parser.add_argument("--slack", type=float, default=2.0,
+                        help="Tolerance multiplier on the shorter rungs")
+    parser.add_argument("--initial", type=int, default=48, help="Randomly sampled starting candidates per width")
+    parser.add_argument("--eta", type=int, default=3, help="Keep 1/eta per rung; runs grow eta times longer")
+    parser.add_argument("--guided", type=int, default=8, help="Survivors that propose a neighbour per rung")
+    parser.add_argument("--min-insts", type=int, default=1000000, help="Instructions of the first rung")
+    parser.add_argument("--max-insts", type=int, default=100000000, help="Instructions of the final rung")
+    parser.add_argument("--seed", type=int, default=0, help="Sampling seed")
+    parser.add_argument("--outdir", type=str, default="out/size_search", help="Base output directory")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Concurrent simulations (default: bounded by cores and RAM)")
+    parser.add_argument("--cache-dir", type=str, default=None, help="Result cache directory")
+    parser.add_argument("--cache-max-size", type=str, default="10GB",
+                        help="Evict least recently used cache entries beyond this size")
+    parser.add_argument("--roi-insts", type=int, default=None,
+                        help="Checkpoint each benchmark after this many instructions; all runs start there")
+    parser.add_argument("--roi-work-begin", action="store_true",
+                        help="Checkpoint each benchmark at its first m5_work_begin op (suite:<variant>,m5ops)")
+    parser.add_argument("--ff-cpu", choices=["atomic", "kvm"], default="atomic",
+                        help="CPU model used to fast-forward to the ROI")
+    parser.add_argument("--checkpoint-dir", type=str, default=None,
+                        help="Where ROI checkpoints are kept (default: <outdir>/checkpoints)")
+    parser.add_argument("script_args", nargs="*", help="Extra arguments passed to the script (after --)")
+    args = parser.parse_args()
+    args.bench = resolve_benches(args.bench)
+
+    try:
+        widths = [int(w) for w in args.widths.split(",") if w.strip()]
+        space = {name: sorted({int(v) for v in getattr(args, name).split(",") if v.strip()})
+                 for name in DEFAULT_SPACE}
+        cache_max = sweep.parse_size(args.cache_max_size)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.eta < 2:
+        parser.error("--eta must be at least 2")
+    if args.min_insts > args.max_insts:
+        parser.error("--min-insts exceeds --max-insts")
+    # sweep.run_sweep() options this search does not expose
+    args.monitor = False
+    args.checkpoint_dir = args.checkpoint_dir or os.path.join(args.outdir, "checkpoints")
+    os.makedirs(args.outdir, exist_ok=True)
+    if args.roi_insts is not None or args.roi_work_begin:
+        points = [{"bench": b} for b in args.bench]
+        args.checkpoints = sweep.take_checkpoints(points, args, args.jobs or sweep.default_jobs(points))
+    cache = ResultCache(args.cache_dir, cache_max) if args.cache_dir else None
+
+    search = Search(args, space, cache)
+    chosen = []
+    grid_insts = 0
+    for width in widths:
+        ranked, top, grid_size = search.run(width)
+        grid_insts += grid_size * len(args.bench) * args.max_insts
+        feasible = [r for r in ranked if r["feasible"]]
+        pick = feasible[0] if feasible else ranked[0]
+        baseline = next((r for r in ranked if r["config"] == snap(BASELINE, space)), None)
+        chosen.append({"width": width, "config": pick["config"], "ipc": pick["ipc"], "max_ipc": top,
+                       "cost": pick["cost"], "feasible": pick["feasible"], "stalls": pick["stalls"],
+                       "baseline_ipc": baseline["ipc"] if baseline else None,
+                       "baseline_cost": cost(snap(BASELINE, space))})
+
+    print()
+    print(f"{'width':>5}  {'configuration':<36} {'IPC':>7} {'of max':>7} {'entries':>8} {'v25 default':>12}")
+    for row in chosen:
+        rel = row["ipc"] / row["max_ipc"] if row["max_ipc"] else math.nan
+        base = f"{row['baseline_cost']}" + (f" @{row['baseline_ipc']:.3f}" if row["baseline_ipc"] else "")
+        note = "" if row["feasible"] else "  (none within tolerance)"
+        print(f"{row['width']:>5}  {config_label(row['config']):<36} {row['ipc']:>7.3f} {rel:>7.1%} "
+              f"{row['cost']:>8} {base:>12}{note}")
+    budget = search.spent_insts / grid_insts if grid_insts else math.nan
+    print(f"{search.simulations} simulations, {search.spent_insts:.3g} instructions: "
+          f"{budget:.1%} of the full grid at --max-insts")
+
+    with open(os.path.join(args.outdir, "size_search.json"), "w") as f:
+        json.dump({"space": space, "chosen": chosen, "rungs": search.log,
+                   "spent_insts": search.spent_insts, "grid_insts": grid_insts}, f, indent=2)
+    if not all(row["feasible"] for row in chosen):
+        print("Some widths have no configuration within tolerance of the largest one", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
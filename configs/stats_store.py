@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+stats_store.py
+
+Columnar store for gem5 stats of a whole sweep.
+
+Every dump block of every sweep point becomes one row; every stat becomes
+one float64 column (NaN where a run lacks it). The store is a compressed
+NumPy .npz archive, whose members load lazily, so pulling IPC/CPI/mispredict
+columns for thousands of runs reads a few arrays instead of re-parsing text.
+
+Build from a sweep directory (uses sweep.json written by sweep.py):
+  python3 experiments/configs/stats_store.py build out/width_sweep \
+    --cache-dir=out/cache --out=out/width_sweep/stats.npz
+Query:
+  python3 experiments/configs/stats_store.py show out/width_sweep/stats.npz \
+    system.cpu.ipc system.cpu.cpi system.cpu.branchPred.condIncorrect
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+from array import array
+
+import numpy as np
+
+from gem5stats import iter_dumps, stat_selector
+
+POINT_COLUMN = "__point__"
+DUMP_COLUMN = "__dump__"
+META_COLUMN = "__meta__"
+
+
+class StatsStoreBuilder:
+    # Accumulates rows column-wise without knowing the stat names up front
+    def __init__(self, select=None):
+        self.select = select
+        self.points = []
+        self.meta = {}
+        self.dump_index = array("i")
+        self.columns = {}
+        self.rows = 0
+
+    def add_dump(self, point_id, index, stats):
+        for name, value in stats.items():
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = array("d", [math.nan]) * self.rows
+            column.append(float(value))
+        self.rows += 1
+        for column in self.columns.values():
+            if len(column) < self.rows:
+                column.append(math.nan)
+        self.points.append(point_id)
+        self.dump_index.append(index)
+
+    def add_run(self, point_id, dumps, meta=None):
+        # dumps: iterable of stat dicts, e.g. iter_dumps(stats.txt)
+        for index, stats in enumerate(dumps):
+            self.add_dump(point_id, index, stats)
+        if meta is not None:
+            self.meta[point_id] = meta
+
+    def add_stats_file(self, point_id, path, meta=None):
+        self.add_run(point_id, iter_dumps(path, self.select), meta)
+
+    def save(self, path):
+        arrays = {name: np.frombuffer(col, dtype=np.float64) for name, col in self.columns.items()}
+        arrays[POINT_COLUMN] = np.array(self.points, dtype=str)
+        arrays[DUMP_COLUMN] = np.frombuffer(self.dump_index, dtype=np.int32)
+        arrays[META_COLUMN] = np.array(json.dumps(self.meta))
+        np.savez_compressed(path, **arrays)
+
+
+class StatsStore:
+    # Read side: columns are only decompressed when asked for
+    def __init__(self, path):
+        self._npz = np.load(path, allow_pickle=False)
+        self.points = self._npz[POINT_COLUMN]
+        self.dump_index = self._npz[DUMP_COLUMN]
+        self._meta = None
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            self._meta = json.loads(str(self._npz[META_COLUMN]))
+        return self._meta
+
+    @property
+    def names(self):
+        return [n for n in self._npz.files if not n.startswith("__")]
+
+    def column(self, name):
+        if name not in self._npz.files:
+            return np.full(len(self.points), np.nan)
+        return self._npz[name]
+
+    def columns(self, names):
+        return {name: self.column(name) for name in names}
+
+    def last_dump_mask(self):
+        # Rows holding the final dump of each run (the whole-run aggregate)
+        last = np.ones(len(self.points), dtype=bool)
+        last[:-1] = self.points[1:] != self.points[:-1]
+        return last
+
+
+def build_from_sweep(sweep_dir, out, cache_dir=None, select=None):
+    with open(os.path.join(sweep_dir, "sweep.json")) as f:
+        sweep = json.load(f)
+    cache = None
+    if cache_dir:
+        from result_cache import ResultCache
+        cache = ResultCache(cache_dir)
+
+    builder = StatsStoreBuilder(select)
+    missing = 0
+    for result in sweep["results"]:
+        point_id = os.path.basename(result["outdir"])
+        meta = dict(result["point"], exit_cause=result.get("exit_cause"))
+        stats_file = os.path.join(result["outdir"], "stats.txt")
+        if os.path.exists(stats_file):
+            builder.add_stats_file(point_id, stats_file, meta)
+            continue
+        entry = cache.get(result["cache_key"]) if cache and result.get("cache_key") else None
+        if entry is None:
+            missing += 1
+            continue
+        keep = stat_selector(select)
+        dumps = ({k: v for k, v in d.items() if keep is None or keep(k)} for d in entry["stats"])
+        builder.add_run(point_id, dumps, meta)
+    builder.save(out)
+    return builder.rows, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar gem5 stats store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Parse a sweep's stats into a .npz store")
+    build.add_argument("sweep_dir", help="Sweep output directory (contains sweep.json)")
+    build.add_argument("--out", type=str, default=None, help="Output .npz (default: <sweep_dir>/stats.npz)")
+    build.add_argument("--cache-dir", type=str, default=None, help="Result cache for cached points")
+    build.add_argument("--select", action="append", default=None,
+                       help="Only keep this stat (repeatable; a trailing '.' selects a prefix)")
+
+    show = sub.add_parser("show", help="Print columns of a store")
+    show.add_argument("store", help=".npz store")
+    show.add_argument("stats", nargs="*", help="Stat names (default: list available names)")
+    show.add_argument("--all-dumps", action="store_true", help="Print every dump, not only the last per run")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        out = args.out or os.path.join(args.sweep_dir, "stats.npz")
+        rows, missing = build_from_sweep(args.sweep_dir, out, args.cache_dir, args.select)
+        print(f"Wrote {rows} dumps to {out}" + (f" ({missing} runs without stats)" if missing else ""))
+        return
+
+    store = StatsStore(args.store)
+    if not args.stats:
+        print("\n".join(store.names))
+        return
+    mask = slice(None) if args.all_dumps else store.last_dump_mask()
+    columns = [store.column(name)[mask] for name in args.stats]
+    writer = sys.stdout
+    writer.write("\t".join(["point", "dump"] + args.stats) + "\n")
+    for i, (point, dump) in enumerate(zip(store.points[mask], store.dump_index[mask])):
+        writer.write("\t".join([str(point), str(dump)] + [f"{c[i]:g}" for c in columns]) + "\n")
+
+
+if __name__ == "__main__":
+    main()
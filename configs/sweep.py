@@ -0,0 +1,590 @@
+#!/usr/bin/env python3
+"""
+sweep.py
+
+Parallel design-space sweep driver for the superscalar configs.
+Expands a parameter grid into sweep points and runs every point as its own
+gem5 process with an isolated --outdir. Concurrency is bounded by host cores
+and available RAM.
+
+Run with the host python (not gem5), e.g. from the gem5 root:
+  python3 experiments/configs/sweep.py --gem5=build/X86/gem5.opt \
+    --bench=scalar_add --bench=vector --bench=vector_add_avx \
+    --grid width=1,2,4,8 --grid rob=128,256 --outdir=out/width_sweep
+
+With --roi-insts (or --roi-work-begin) every benchmark is first
+fast-forwarded to its region of interest once and checkpointed; all
+points then restore that checkpoint instead of simulating the prefix.
+
+With --monitor every point writes progress.jsonl (see progress.py); points
+that stop reporting for --hang-timeout seconds are killed as hung, and
+points running --straggler-factor times slower (KIPS) than the finished
+ones are reported as stragglers. Each result records the point's KIPS.
+
+With --queue=jobs.db the points go through a persistent SQLite job queue
+(see job_queue.py): re-running the same command after a crash or reboot
+resumes only unfinished points, crashed points are retried with backoff
+and deterministic failures are quarantined. With --shared-queue=DIR on a
+shared filesystem, workers on other nodes (shared_queue.py work) pull
+points from the same directory and the results are collected into one
+sweep.json.
+"""
+
+import argparse
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from bench_suite import parse_selfcheck, resolve_benches
+from result_cache import ResultCache, config_key
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCRIPT = os.path.join(HERE, "se_superscalar_v25.py")
+
+# Grid key -> command line flag of the config script
+PARAM_FLAGS = {
+    "width": "--width",
+    "rob": "--rob-entries",
+    "iq": "--iq-entries",
+    "lq": "--lq-entries",
+    "sq": "--sq-entries",
+    "int_regs": "--phys-int-regs",
+    "float_regs": "--phys-float-regs",
+    "bp": "--bp-type",
+    "memsize": "--memsize",
+    "l1i_size": "--l1i-size",
+    "l1d_size": "--l1d-size",
+    "l2_size": "--l2-size",
+    "l1_mshrs": "--l1-mshrs",
+    "l2_mshrs": "--l2-mshrs",
+    "l1d_hwp": "--l1d-hwp-type",
+    "l2_hwp": "--l2-hwp-type",
+    "cores": "--num-cpus",
+    "threads": "--threads",
+    "mem_type": "--mem-type",
+    "mem_channels": "--mem-channels",
+    "sim_quantum": "--sim-quantum",
+    "max_insts": "--max-insts",
+}
+
+# "bp.<name>" grid keys set a branch predictor parameter (--bp-param=<name>=v)
+BP_PARAM_PREFIX = "bp."
+
+# Grid keys that set several script parameters to the same value
+PARAM_ALIASES = {
+    "lsq": ("lq", "sq"),
+    "regs": ("int_regs", "float_regs"),
+}
+
+# gem5 maps the whole guest memory, plus the simulator's own footprint
+JOB_OVERHEAD = 512 * 1024 ** 2
+DEFAULT_MEMSIZE = "512MB"
+PROGRESS_FILE = "progress.jsonl"
+
+SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3, "TB": 1024 ** 4}
+
+
+def parse_size(text):
+    # "512MB" / "2GB" / "4096" -> bytes
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?B?)\s*", str(text), re.IGNORECASE)
+    if not m:
+        raise ValueError(f"Invalid size: {text!r}")
+    return int(float(m.group(1)) * SIZE_UNITS[m.group(2).upper()])
+
+
+def parse_grid(specs):
+    # ["width=1,2,4", "bp=LocalBP,TournamentBP"] -> {"width": [...], "bp": [...]}
+    grid = {}
+    for spec in specs:
+        key, sep, values = spec.partition("=")
+        key = key.strip().replace("-", "_")
+        if not sep or not values:
+            raise ValueError(f"Invalid grid spec {spec!r} (expected key=v1,v2,...)")
+        if key not in PARAM_FLAGS and key not in PARAM_ALIASES and not key.startswith(BP_PARAM_PREFIX):
+            known = ", ".join(sorted(list(PARAM_FLAGS) + list(PARAM_ALIASES)))
+            raise ValueError(f"Unknown grid key {key!r} (known: {known})")
+        grid[key] = [v.strip() for v in values.split(",") if v.strip()]
+    return grid
+
+
+def expand_points(benches, grid):
+    # Cartesian product of benches and grid values, aliases resolved
+    keys = list(grid)
+    points = []
+    for bench in benches:
+        for values in itertools.product(*(grid[k] for k in keys)):
+            point = {"bench": bench}
+            for key, value in zip(keys, values):
+                for name in PARAM_ALIASES.get(key, (key,)):
+                    point[name] = value
+            points.append(point)
+    return points
+
+
+def point_name(point):
+    # Human readable, filesystem safe and unique per point
+    bench = os.path.splitext(os.path.basename(point["bench"]))[0]
+    parts = [bench] + [f"{k}{v}" for k, v in point.items() if k != "bench"]
+    name = re.sub(r"[^A-Za-z0-9_.+-]", "_", "-".join(parts))
+    digest = hashlib.sha1(json.dumps(point, sort_keys=True).encode()).hexdigest()[:8]
+    return f"{name}-{digest}"
+
+
+def checkpoint_memory(point):
+    # The grid parameters a checkpoint's memory system depends on: (memsize, mem_type,
+    # mem_channels), None for the script's default
+    return (point.get("memsize", DEFAULT_MEMSIZE), point.get("mem_type"), point.get("mem_channels"))
+
+
+def point_checkpoint(point, args):
+    checkpoints = getattr(args, "checkpoints", None) or {}
+    return checkpoints.get((point["bench"],) + checkpoint_memory(point))
+
+
+def point_params(point, args=None):
+    # Sweep point -> {argparse dest of the script: value}
+    params = {PARAM_FLAGS[k].lstrip("-").replace("-", "_"): v
+              for k, v in point.items() if k in PARAM_FLAGS}
+    bp_params = sorted(f"{k[len(BP_PARAM_PREFIX):]}={v}" for k, v in point.items()
+                       if k.startswith(BP_PARAM_PREFIX))
+    if bp_params:
+        params["bp_param"] = bp_params
+    checkpoint = point_checkpoint(point, args) if args is not None else None
+    if checkpoint:
+        # the name pins bench hash, memsize and ROI; its location is irrelevant
+        params["restore_checkpoint"] = os.path.basename(checkpoint)
+    return params
+
+
+def point_script_args(point, args):
+    # The config script's own arguments for a point
+    argv = [f"--bench={point['bench']}"]
+    for key, value in point.items():
+        if key.startswith(BP_PARAM_PREFIX):
+            argv.append(f"--bp-param={key[len(BP_PARAM_PREFIX):]}={value}")
+        elif key != "bench":
+            argv.append(f"{PARAM_FLAGS[key]}={value}")
+    checkpoint = point_checkpoint(point, args)
+    if checkpoint:
+        argv.append(f"--restore-checkpoint={checkpoint}")
+    if getattr(args, "monitor", False):
+        # telemetry only; not part of the cache key
+        outdir = os.path.abspath(os.path.join(args.outdir, point_name(point)))
+        argv += [f"--progress-file={os.path.join(outdir, PROGRESS_FILE)}",
+                 f"--progress-interval={args.progress_interval}"]
+    return argv + list(args.script_args)
+
+
+def point_command(point, args, outdir):
+    return [args.gem5, "-re", f"--outdir={outdir}", args.script] + point_script_args(point, args)
+
+
+def checkpoint_dir(bench, memory, args):
+    # One checkpoint per benchmark binary, memory system, script arguments (--caches,
+    # --mem-type, ...) and ROI definition
+    memsize, mem_type, mem_channels = memory
+    with open(bench, "rb") as f:
+        digest = hashlib.sha1(f.read())
+    digest.update(json.dumps(list(args.script_args)).encode())
+    roi = "workbegin" if args.roi_work_begin else f"insts{args.roi_insts}"
+    name = os.path.splitext(os.path.basename(bench))[0]
+    parts = [name, memsize] + [v for v in (mem_type, mem_channels and f"{mem_channels}ch") if v]
+    parts += [roi, digest.hexdigest()[:8]]
+    return os.path.abspath(os.path.join(args.checkpoint_dir, "-".join(parts)))
+
+
+def take_checkpoint(bench, memory, ckpt, args):
+    # Fast-forward once to the ROI; an existing checkpoint is reused. The checkpointing
+    # run gets the memory system and script arguments of the points that restore it.
+    if os.path.exists(os.path.join(ckpt, "m5.cpt")):
+        return True
+    memsize, mem_type, mem_channels = memory
+    outdir = ckpt + ".m5out"
+    cmd = [args.gem5, "-re", f"--outdir={outdir}", args.script, f"--bench={bench}",
+           f"--memsize={memsize}", f"--take-checkpoint={ckpt}", f"--ff-cpu={args.ff_cpu}"]
+    if mem_type:
+        cmd.append(f"--mem-type={mem_type}")
+    if mem_channels:
+        cmd.append(f"--mem-channels={mem_channels}")
+    cmd.append("--roi-work-begin" if args.roi_work_begin else f"--roi-insts={args.roi_insts}")
+    cmd += list(args.script_args)
+    proc = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL)
+    return proc.returncode == 0 and os.path.exists(os.path.join(ckpt, "m5.cpt"))
+
+
+def take_checkpoints(points, args, jobs):
+    # {(bench, memsize, mem_type, mem_channels): checkpoint dir} for every combination
+    # the points need
+    needed = {(p["bench"], checkpoint_memory(p)) for p in points}
+    checkpoints = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {}
+        for bench, memory in sorted(needed, key=str):
+            ckpt = checkpoint_dir(bench, memory, args)
+            futures[pool.submit(take_checkpoint, bench, memory, ckpt, args)] = (bench, memory, ckpt)
+        for future in concurrent.futures.as_completed(futures):
+            bench, memory, ckpt = futures[future]
+            if future.result():
+                print(f"Checkpoint ready: {ckpt}")
+                checkpoints[(bench,) + memory] = ckpt
+            else:
+                print(f"Warning: checkpointing {bench} failed (see {ckpt}.m5out); "
+                      f"its points simulate from the start", file=sys.stderr)
+    return checkpoints
+
+
+def parse_exit_cause(simout):
+    # se_superscalar*.py print "Exit(ed) @ tick N because <cause>"
+    try:
+        with open(simout) as f:
+            text = f.read()
+    except OSError:
+        return None
+    causes = re.findall(r"@ tick \d+ because (.*)", text)
+    return causes[-1].strip() if causes else None
+
+
+def read_selfcheck(simout):
+    # The benchmark's SELFCHECK verdict (bench_suite.py binaries), or None
+    try:
+        with open(simout) as f:
+            return parse_selfcheck(f.read())
+    except OSError:
+        return None
+
+
+def last_progress(path):
+    # Last complete JSON line of a progress file, or None
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 4096))
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        try:
+            return json.loads(line)
+        except ValueError:
+            continue
+    return None
+
+
+class Monitor:
+    # Watches the progress files of running points for hangs and stragglers
+    def __init__(self, hang_timeout, straggler_factor, poll=1.0):
+        self.hang_timeout = hang_timeout
+        self.straggler_factor = straggler_factor
+        self.poll = poll
+        self.lock = threading.Lock()
+        self.finished_kips = []
+
+    def watch(self, name, proc, path):
+        # Waits for proc; returns (returncode, hung)
+        start = time.time()
+        warned = False
+        while proc.poll() is None:
+            time.sleep(self.poll)
+            try:
+                last_update = os.path.getmtime(path)
+            except OSError:
+                last_update = start
+            if time.time() - last_update > self.hang_timeout:
+                print(f"Warning: {name} made no progress for {self.hang_timeout:.0f}s; killing it",
+                      file=sys.stderr)
+                proc.kill()
+                proc.wait()
+                return proc.returncode, True
+            record = last_progress(path)
+            with self.lock:
+                median = statistics.median(self.finished_kips) if self.finished_kips else None
+            if not warned and record and median and record["kips"] * self.straggler_factor < median:
+                print(f"Warning: {name} is a straggler: {record['kips']:.1f} KIPS vs "
+                      f"median {median:.1f} KIPS of finished points", file=sys.stderr)
+                warned = True
+        record = last_progress(path)
+        if record and record.get("kips"):
+            with self.lock:
+                self.finished_kips.append(record["kips"])
+        return proc.returncode, False
+
+
+def cache_lookup(point, args, cache):
+    # (key, resolved config, cached result or None); key is None when not cacheable
+    if cache is None:
+        return None, None, None
+    outdir = os.path.join(args.outdir, point_name(point))
+    try:
+        config = cache.resolve(args.script, args.gem5, point["bench"],
+                               point_params(point, args), args.script_args)
+    except OSError as e:
+        print(f"Warning: not caching {os.path.basename(outdir)}: {e}", file=sys.stderr)
+        return None, None, None
+    key = config_key(config)
+    entry = cache.get(key)
+    if entry is None:
+        return key, config, None
+    return key, config, {
+        "point": point,
+        "outdir": outdir,
+        "command": point_command(point, args, outdir),
+        "returncode": 0,
+        "wall_seconds": 0.0,
+        "exit_cause": entry["exit_cause"],
+        "selfcheck": entry.get("selfcheck"),
+        "kips": None,
+        "cached": True,
+        "cache_key": key,
+    }
+
+
+def finish_point(point, args, cache, key, config, returncode, wall_seconds):
+    outdir = os.path.join(args.outdir, point_name(point))
+    exit_cause = parse_exit_cause(os.path.join(outdir, "simout"))
+    progress = last_progress(os.path.join(outdir, PROGRESS_FILE))
+    if key is not None and returncode == 0:
+        cache.put_outdir(key, config, exit_cause, outdir)
+    return {
+        "point": point,
+        "outdir": outdir,
+        "command": point_command(point, args, outdir),
+        "returncode": returncode,
+        "wall_seconds": round(wall_seconds, 3),
+        "exit_cause": exit_cause,
+        "selfcheck": read_selfcheck(os.path.join(outdir, "simout")),
+        "kips": progress["kips"] if progress else None,
+        "cached": False,
+        "cache_key": key,
+    }
+
+
+def run_point(point, args, cache=None, monitor=None):
+    key, config, cached = cache_lookup(point, args, cache)
+    if cached is not None:
+        return cached
+    outdir = os.path.join(args.outdir, point_name(point))
+    os.makedirs(outdir, exist_ok=True)
+    progress_file = os.path.join(outdir, PROGRESS_FILE)
+    if os.path.exists(progress_file):
+        os.remove(progress_file)
+    start = time.time()
+    proc = subprocess.Popen(point_command(point, args, outdir), stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    hung = False
+    if monitor is None:
+        proc.wait()
+    else:
+        _, hung = monitor.watch(point_name(point), proc, progress_file)
+    result = finish_point(point, args, cache, key, config, proc.returncode, time.time() - start)
+    if hung:
+        result["exit_cause"] = "hung"
+    return result
+
+
+def run_batch(points, args, jobs, cache=None):
+    # All uncached points in one gem5 process (batch_runner.py forks per point)
+    results = []
+    pending = []
+    for point in points:
+        key, config, cached = cache_lookup(point, args, cache)
+        if cached is not None:
+            results.append(cached)
+        else:
+            pending.append((point, key, config))
+    if not pending:
+        return results
+
+    batch_dir = os.path.join(args.outdir, "batch")
+    os.makedirs(batch_dir, exist_ok=True)
+    batch_points = [{"name": point_name(p), "outdir": os.path.abspath(os.path.join(args.outdir, point_name(p))),
+                     "argv": point_script_args(p, args)} for p, _, _ in pending]
+    points_file = os.path.join(batch_dir, "points.json")
+    with open(points_file, "w") as f:
+        json.dump(batch_points, f, indent=2)
+    cmd = [args.gem5, "-re", f"--outdir={batch_dir}", os.path.join(HERE, "batch_runner.py"),
+           f"--script={args.script}", f"--points={points_file}", f"--jobs={jobs}"]
+    print(f"Running {len(pending)} points in one gem5 batch process ({jobs} concurrent children)")
+    subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    for point, key, config in pending:
+        try:
+            with open(os.path.join(args.outdir, point_name(point), "result.json")) as f:
+                child = json.load(f)
+        except (OSError, ValueError):
+            child = {"returncode": -1, "host_seconds": 0.0}
+        results.append(finish_point(point, args, cache, key, config,
+                                    child["returncode"], child["host_seconds"]))
+    return results
+
+
+def available_memory():
+    # MemAvailable from /proc/meminfo, falling back to total physical memory
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+
+
+def default_jobs(points, mem_per_job=None):
+    # Bound concurrency by host cores and by RAM per simulation
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    if mem_per_job is None:
+        memsizes = [parse_size(p.get("memsize", DEFAULT_MEMSIZE)) for p in points] or [0]
+        mem_per_job = max(memsizes) + JOB_OVERHEAD
+    by_mem = max(1, available_memory() // mem_per_job)
+    return max(1, min(cores or 1, by_mem, len(points) or 1))
+
+
+def run_sweep(points, args, jobs, cache=None):
+    results = []
+    monitor = Monitor(args.hang_timeout, args.straggler_factor) if args.monitor else None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(run_point, p, args, cache, monitor): p for p in points}
+        for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            result = future.result()
+            if result["cached"]:
+                status = "cached"
+            elif result["returncode"] == 0:
+                status = "ok"
+            else:
+                status = f"FAILED rc={result['returncode']}"
+            kips = f", {result['kips']:.1f} KIPS" if result["kips"] else ""
+            print(f"[{done}/{len(points)}] {os.path.basename(result['outdir'])}: {status} "
+                  f"({result['wall_seconds']:.1f}s{kips}, {result['exit_cause']})")
+            results.append(result)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a parallel gem5 parameter sweep")
+    parser.add_argument("--gem5", type=str, default="build/X86/gem5.opt", help="gem5 binary")
+    parser.add_argument("--script", type=str, default=DEFAULT_SCRIPT, help="Config script run for every point")
+    parser.add_argument("--bench", action="append", required=True,
+                        help="Benchmark binary or suite:<variant> (bench_suite.py; repeat for several)")
+    parser.add_argument("--grid", action="append", default=[],
+                        help="Parameter grid as key=v1,v2,... (repeatable); keys: "
+                             + ", ".join(list(PARAM_FLAGS) + list(PARAM_ALIASES))
+                             + ", bp.<predictor parameter>")
+    parser.add_argument("--outdir", type=str, default="out/sweep", help="Base output directory")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Concurrent simulations (default: bounded by cores and RAM)")
+    parser.add_argument("--mem-per-job", type=str, default=None,
+                        help="Host RAM reserved per simulation (default: memsize + 512MB)")
+    parser.add_argument("--cache-dir", type=str, default=None,
+                        help="Result cache directory; points already in it are not re-simulated")
+    parser.add_argument("--cache-max-size", type=str, default="10GB",
+                        help="Evict least recently used cache entries beyond this size")
+    parser.add_argument("--roi-insts", type=int, default=None,
+                        help="Checkpoint each benchmark after this many instructions and restore it for all points")
+    parser.add_argument("--roi-work-begin", action="store_true",
+                        help="Checkpoint each benchmark at its first m5_work_begin op")
+    parser.add_argument("--ff-cpu", choices=["atomic", "kvm"], default="atomic",
+                        help="CPU model used to fast-forward to the ROI")
+    parser.add_argument("--checkpoint-dir", type=str, default=None,
+                        help="Where ROI checkpoints are kept and reused (default: <outdir>/checkpoints)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Run all points in one gem5 process that forks a child per point "
+                             "(amortizes start-up; the script must support batch_runner.py)")
+    parser.add_argument("--monitor", action="store_true",
+                        help="Collect progress telemetry and detect hung and straggling points "
+                             "(the script must support --progress-file)")
+    parser.add_argument("--progress-interval", type=float, default=10.0,
+                        help="Host seconds between progress records with --monitor")
+    parser.add_argument("--hang-timeout", type=float, default=600.0,
+                        help="Kill a point after this many seconds without progress (--monitor)")
+    parser.add_argument("--straggler-factor", type=float, default=3.0,
+                        help="Report points this many times slower than the median finished one")
+    parser.add_argument("--queue", type=str, default=None,
+                        help="Persistent job database; re-running resumes unfinished points (job_queue.py)")
+    parser.add_argument("--shared-queue", type=str, default=None,
+                        help="Queue directory on a shared filesystem that workers on other nodes "
+                             "pull points from (shared_queue.py)")
+    parser.add_argument("--max-attempts", type=int, default=4,
+                        help="Quarantine a point after this many failed attempts (--queue, --shared-queue)")
+    parser.add_argument("--backoff", type=float, default=30.0,
+                        help="Seconds before the first retry of a crashed point, doubling per attempt (--queue)")
+    parser.add_argument("--stale-timeout", type=float, default=300.0,
+                        help="Requeue points whose worker stopped heartbeating for this long "
+                             "(--queue, --shared-queue)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Kill a point after this many host seconds, counted as a failed attempt "
+                             "(--queue, --shared-queue)")
+    parser.add_argument("--heartbeat", type=float, default=30.0,
+                        help="Seconds between lease heartbeats (--shared-queue)")
+    parser.add_argument("--speculate-factor", type=float, default=2.0,
+                        help="Re-dispatch points running this many times the median point time "
+                             "(--shared-queue; 0: never)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the commands and exit")
+    parser.add_argument("script_args", nargs="*", help="Extra arguments passed to the script (after --)")
+    args = parser.parse_args()
+
+    try:
+        grid = parse_grid(args.grid)
+        mem_per_job = parse_size(args.mem_per_job) if args.mem_per_job else None
+        cache_max = parse_size(args.cache_max_size)
+    except ValueError as e:
+        parser.error(str(e))
+    if (args.queue or args.shared_queue) and args.batch:
+        parser.error(f"{'--queue' if args.queue else '--shared-queue'} runs every point "
+                     f"as its own process; drop --batch")
+    if args.queue and args.shared_queue:
+        parser.error("--queue and --shared-queue are exclusive")
+    args.bench = resolve_benches(args.bench)
+    points = expand_points(args.bench, grid)
+    args.checkpoint_dir = args.checkpoint_dir or os.path.join(args.outdir, "checkpoints")
+    use_checkpoints = args.roi_insts is not None or args.roi_work_begin
+
+    if args.dry_run:
+        for point in points:
+            outdir = os.path.join(args.outdir, point_name(point))
+            print(" ".join(point_command(point, args, outdir)))
+        return
+
+    jobs = args.jobs or default_jobs(points, mem_per_job)
+    print(f"Sweeping {len(points)} points with {jobs} concurrent jobs -> {args.outdir}")
+    os.makedirs(args.outdir, exist_ok=True)
+    start = time.time()
+    if use_checkpoints:
+        args.checkpoints = take_checkpoints(points, args, jobs)
+    cache = ResultCache(args.cache_dir, cache_max) if args.cache_dir else None
+    if args.queue:
+        # job_queue imports this module
+        from job_queue import run_queued
+        results = run_queued(points, args, jobs, cache)
+    elif args.shared_queue:
+        from shared_queue import run_shared
+        results = run_shared(points, args, jobs, cache)
+    elif args.batch:
+        results = run_batch(points, args, jobs, cache)
+    else:
+        results = run_sweep(points, args, jobs, cache)
+
+    results.sort(key=lambda r: r["outdir"])
+    with open(os.path.join(args.outdir, "sweep.json"), "w") as f:
+        json.dump({"script": args.script, "gem5": args.gem5, "results": results}, f, indent=2)
+    failed = sum(1 for r in results if r["returncode"] != 0)
+    cached = sum(1 for r in results if r["cached"])
+    print(f"Sweep finished in {time.time() - start:.1f}s: {len(results) - failed} ok "
+          f"({cached} cached), {failed} failed")
+    bad = [r for r in results if r["selfcheck"] == "FAIL"]
+    if bad:
+        print(f"Warning: {len(bad)} points failed the benchmark self-check: "
+              + ", ".join(os.path.basename(r["outdir"]) for r in bad), file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,598 @@
+"""
+system_builder.py
+
+Declarative SE-mode system construction shared by the experiment configs.
+
+A SystemConfig describes the system (CPU model, widths and back-end sizes,
+branch predictor, memory) and build_system() turns it into a System ready
+for Root/m5.instantiate(). Port names differ between gem5 versions
+(cpu_side_ports/slave, int_requestor/int_master, ...); they are resolved
+once per SimObject class here instead of with try/except at every call site.
+
+m5 is only imported inside the build functions, so SystemConfig can also be
+used from host-side tools (sweeps, caches) that run outside gem5.
+
+Caches reuse CacheConfig.config_cache from gem5's configs/common (found via
+$GEM5_CONFIGS, default <gem5>/configs when this directory is
+<gem5>/experiments/configs), the same path se.py uses.
+
+Usage from a config script:
+  from system_builder import SystemConfig, build_root
+  root = build_root(SystemConfig(width=4, rob_entries=192), ["vector"])
+  m5.instantiate()
+"""
+
+import argparse
+import dataclasses
+import math
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+# DerivO3CPU parameters settable from SystemConfig, by field name
+O3_PARAMS = {
+    "rob_entries": "numROBEntries",
+    "iq_entries": "numIQEntries",
+    "lq_entries": "LQEntries",
+    "sq_entries": "SQEntries",
+    "phys_int_regs": "numPhysIntRegs",
+    "phys_float_regs": "numPhysFloatRegs",
+}
+WIDTH_PARAMS = ("fetchWidth", "decodeWidth", "renameWidth", "issueWidth", "commitWidth")
+
+# Candidate port names, modern first
+CPU_SIDE_PORTS = ("cpu_side_ports", "slave")
+MEM_SIDE_PORTS = ("mem_side_ports", "master")
+INT_PORT_PAIRS = (("int_requestor", "int_responder"), ("int_master", "int_slave"))
+
+# Short prefetcher names accepted by the --*-hwp-type options
+PREFETCHERS = {
+    "stride": "StridePrefetcher",
+    "tagged": "TaggedPrefetcher",
+    "ampm": "AMPMPrefetcher",
+    "bop": "BOPPrefetcher",
+}
+
+# Short memory backend names accepted by --mem-type
+MEMORY_TYPES = {
+    "simple": "SimpleMemory",
+    "ddr3": "DDR3_1600_8x8",
+    "ddr4": "DDR4_2400_8x8",
+    "ddr5": "DDR5_4400_4x8",
+    "lpddr5": "LPDDR5_6400_1x16_BG_BL32",
+    "hbm": "HBM_1000_4H_1x128",
+}
+# Channel bits are XOR-hashed with the bits from here up, as in gem5's MemConfig
+MEM_XOR_LOW_BIT = 20
+
+FAST_FORWARD_CAUSE = "fast-forward done"
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GEM5_CONFIGS = os.environ.get("GEM5_CONFIGS", os.path.join(HERE, "..", "..", "configs"))
+
+
+@dataclass
+class SystemConfig:
+    cpu_type: str = "DerivO3CPU"
+    # Cores; above 1 system.cpu is a vector (stats system.cpu0, cpu1, ... or
+    # cpu00.. from 11 cores on) sharing one SE process, so the workload's
+    # threads (clone) land on the idle cores
+    num_cpus: int = 1
+    # Parallel simulation: each core with its caches gets event queue i + 1
+    # (one host thread each) and the queues synchronize every sim_quantum
+    # ticks. None keeps the single event queue.
+    sim_quantum: Optional[int] = None
+    # Fast-forward CPU (system.ff_cpu) that runs first and is switched to
+    # cpu_type (system.cpu, built switched out) by fast_forward()
+    ff_cpu_type: Optional[str] = None
+    clock: str = "3GHz"
+    mem_size: str = "512MB"
+    # "SimpleMemory" or a DRAM interface class driven by a MemCtrl
+    mem_type: str = "DDR3_1600_8x8"
+    # Memory channels (a power of two); above 1 system.mem_ctrl is a vector
+    # (stats system.mem_ctrl0, ...) with the address range interleaved
+    mem_channels: int = 1
+    # None keeps the CPU model's default
+    width: Optional[int] = None
+    rob_entries: Optional[int] = None
+    iq_entries: Optional[int] = None
+    lq_entries: Optional[int] = None
+    sq_entries: Optional[int] = None
+    phys_int_regs: Optional[int] = None
+    phys_float_regs: Optional[int] = None
+    bp_type: Optional[str] = None
+    # Predictor parameters; dotted names reach into sub-objects ("tage.minHist")
+    bp_params: Dict[str, object] = field(default_factory=dict)
+    # Cache hierarchy (CacheConfig.config_cache); without caches the CPU
+    # ports go straight to the membus
+    caches: bool = False
+    l2cache: bool = False
+    cacheline_size: int = 64
+    l1i_size: str = "32kB"
+    l1i_assoc: int = 2
+    l1d_size: str = "64kB"
+    l1d_assoc: int = 2
+    l2_size: str = "2MB"
+    l2_assoc: int = 8
+    # None keeps the cache class defaults
+    l1_mshrs: Optional[int] = None
+    l2_mshrs: Optional[int] = None
+    l1_hit_latency: Optional[int] = None
+    l2_hit_latency: Optional[int] = None
+    # Prefetcher: short name (see PREFETCHERS) or SimObject name, e.g. "StridePrefetcher"
+    l1i_hwp_type: Optional[str] = None
+    l1d_hwp_type: Optional[str] = None
+    l2_hwp_type: Optional[str] = None
+
+    def replace(self, **changes):
+        return dataclasses.replace(self, **changes)
+
+    def to_dict(self):
+        return dataclasses.asdict(self)
+
+
+# ----------------------------------------------------------------
+# Port name resolution
+# ----------------------------------------------------------------
+_port_names = {}
+
+
+def _resolve(obj, candidates):
+    # First candidate the object's class knows, memoized per class
+    key = (type(obj).__name__, candidates)
+    if key not in _port_names:
+        _port_names[key] = None
+        for name in candidates:
+            try:
+                getattr(obj, name)
+            except AttributeError:
+                continue
+            _port_names[key] = name
+            break
+    return _port_names[key]
+
+
+def cpu_side(bus):
+    name = _resolve(bus, CPU_SIDE_PORTS)
+    return getattr(bus, name) if name else None
+
+
+def mem_side(bus):
+    name = _resolve(bus, MEM_SIDE_PORTS)
+    return getattr(bus, name) if name else None
+
+
+def connect_cpu_bus_ports(cpu, membus):
+    port = cpu_side(membus)
+    if port is None:
+        print("Warning: couldn't attach icache/dcache ports using known names.", file=sys.stderr)
+        return
+    cpu.icache_port = port
+    cpu.dcache_port = port
+
+
+def connect_system_port(system, membus):
+    port = cpu_side(membus)
+    if port is None:
+        print("Warning: couldn't attach system_port using known names.", file=sys.stderr)
+        return
+    system.system_port = port
+
+
+def connect_memctrl(mem_ctrl, membus):
+    port = mem_side(membus)
+    if port is None:
+        print("Warning: couldn't attach mem_ctrl port using known names.", file=sys.stderr)
+        return
+    mem_ctrl.port = port
+
+
+def connect_interrupts(cpu, membus):
+    # Only x86 interrupt controllers have pio/int ports; others need nothing
+    for intr in cpu.interrupts:
+        if _resolve(intr, ("pio",)) is None:
+            continue
+        intr.pio = mem_side(membus)
+        pair = next((p for p in INT_PORT_PAIRS if _resolve(intr, p[:1])), None)
+        if pair is None:
+            print("Warning: couldn't wire CPU interrupt ports with known attribute names.", file=sys.stderr)
+            continue
+        setattr(intr, pair[0], cpu_side(membus))
+        setattr(intr, pair[1], mem_side(membus))
+
+
+# ----------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------
+def prefetcher_type(name):
+    # "stride" -> "StridePrefetcher"; "none"/"" -> no prefetcher
+    if not name or name.lower() == "none":
+        return None
+    return PREFETCHERS.get(name.lower(), name)
+
+
+def add_cache_options(parser):
+    defaults = SystemConfig()
+    group = parser.add_argument_group("caches")
+    group.add_argument("--caches", action="store_true", help="Private L1 instruction and data caches")
+    group.add_argument("--l2cache", action="store_true", help="Shared L2 cache")
+    group.add_argument("--cacheline-size", type=int, default=defaults.cacheline_size)
+    group.add_argument("--l1i-size", type=str, default=defaults.l1i_size)
+    group.add_argument("--l1i-assoc", type=int, default=defaults.l1i_assoc)
+    group.add_argument("--l1d-size", type=str, default=defaults.l1d_size)
+    group.add_argument("--l1d-assoc", type=int, default=defaults.l1d_assoc)
+    group.add_argument("--l2-size", type=str, default=defaults.l2_size)
+    group.add_argument("--l2-assoc", type=int, default=defaults.l2_assoc)
+    group.add_argument("--l1-mshrs", type=int, default=None, help="MSHRs per L1 cache")
+    group.add_argument("--l2-mshrs", type=int, default=None, help="MSHRs of the L2")
+    group.add_argument("--l1-hit-latency", type=int, default=None, help="L1 tag/data/response latency (cycles)")
+    group.add_argument("--l2-hit-latency", type=int, default=None, help="L2 tag/data/response latency (cycles)")
+    pf_help = f"prefetcher: {', '.join(PREFETCHERS)}, none or a SimObject name"
+    group.add_argument("--l1i-hwp-type", type=prefetcher_type, default=None, help="L1I " + pf_help)
+    group.add_argument("--l1d-hwp-type", type=prefetcher_type, default=None, help="L1D " + pf_help)
+    group.add_argument("--l2-hwp-type", type=prefetcher_type, default=None, help="L2 " + pf_help)
+    return group
+
+
+CACHE_FIELDS = (
+    "caches", "l2cache", "cacheline_size", "l1i_size", "l1i_assoc", "l1d_size", "l1d_assoc",
+    "l2_size", "l2_assoc", "l1_mshrs", "l2_mshrs", "l1_hit_latency", "l2_hit_latency",
+    "l1i_hwp_type", "l1d_hwp_type", "l2_hwp_type",
+)
+
+
+def cache_fields(args):
+    # SystemConfig keyword arguments from add_cache_options() results
+    return {name: getattr(args, name) for name in CACHE_FIELDS}
+
+
+def memory_type(name):
+    # "ddr4" -> "DDR4_2400_8x8"; class names pass through
+    return MEMORY_TYPES.get(name.lower(), name)
+
+
+def add_memory_options(parser, mem_type=None):
+    # mem_type: the script's default backend (default: SystemConfig's)
+    group = parser.add_argument_group("memory")
+    group.add_argument("--mem-type", type=memory_type, default=mem_type or SystemConfig().mem_type,
+                       help=f"Memory backend: {', '.join(MEMORY_TYPES)} or a DRAM interface class")
+    group.add_argument("--mem-channels", type=int, default=1,
+                       help="Memory channels, interleaved (power of two)")
+    return group
+
+
+def memory_fields(args):
+    # SystemConfig keyword arguments from add_memory_options() results
+    return {"mem_type": args.mem_type, "mem_channels": args.mem_channels}
+
+
+def add_fast_forward_options(parser):
+    group = parser.add_argument_group("fast-forward")
+    group.add_argument("--fast-forward", type=int, default=None, metavar="N",
+                       help="Run N instructions on the --ff-cpu model, then switch to the detailed core")
+    group.add_argument("--ff-cpu", choices=["atomic", "kvm"], default="atomic",
+                       help="CPU model used to fast-forward (kvm falls back to atomic)")
+    return group
+
+
+def fast_forward_fields(args):
+    # SystemConfig keyword arguments from add_fast_forward_options() results
+    return {"ff_cpu_type": fast_forward_cpu_type(args.ff_cpu) if args.fast_forward else None}
+
+
+# ----------------------------------------------------------------
+# Builders
+# ----------------------------------------------------------------
+def sim_object_class(name):
+    import m5.objects
+    cls = getattr(m5.objects, name, None)
+    if cls is None:
+        raise ValueError(f"Unknown SimObject class '{name}'")
+    return cls
+
+
+def kvm_available():
+    # KvmCPU needs a gem5 build with KVM support and access to /dev/kvm
+    import m5.objects
+    return hasattr(m5.objects, "X86KvmCPU") and os.access("/dev/kvm", os.R_OK | os.W_OK)
+
+
+def fast_forward_cpu_type(kind):
+    # CPU model name for fast-forwarding; KVM falls back to atomic
+    if kind == "kvm":
+        if kvm_available():
+            return "X86KvmCPU"
+        print("Warning: KVM unavailable, fast-forwarding with AtomicSimpleCPU.", file=sys.stderr)
+    return "AtomicSimpleCPU"
+
+
+def is_kvm_cpu(cpu_type):
+    return "Kvm" in cpu_type
+
+
+def mem_mode_for(cpu_type):
+    if is_kvm_cpu(cpu_type):
+        return "atomic_noncaching"
+    if cpu_type.startswith("Atomic"):
+        return "atomic"
+    return "timing"
+
+
+def cpu_list(cpus):
+    # system.cpu / system.ff_cpu as a list, whether a vector or a single CPU
+    return list(cpus) if isinstance(cpus, (list, tuple)) else [cpus]
+
+
+def make_cpu(config, cpu_id=0):
+    cpu = sim_object_class(config.cpu_type)(cpu_id=cpu_id)
+    if config.width is not None:
+        for param in WIDTH_PARAMS:
+            setattr(cpu, param, config.width)
+    for name, param in O3_PARAMS.items():
+        value = getattr(config, name)
+        if value is not None:
+            setattr(cpu, param, value)
+    if config.bp_type:
+        cpu.branchPred = make_branch_predictor(config.bp_type, config.bp_params)
+    return cpu
+
+
+def make_branch_predictor(bp_type, bp_params):
+    import m5.objects
+    predictor = sim_object_class(bp_type)()
+    for name, value in bp_params.items():
+        *path, param = name.split(".")
+        target = predictor
+        for part in path:
+            target = getattr(target, part)
+        setattr(target, param, value)
+    # Since gem5 v24.1 direction predictors (ConditionalPredictor) sit inside
+    # the CPU's BranchPredictor unit instead of replacing it
+    conditional = getattr(m5.objects, "ConditionalPredictor", None)
+    if conditional is not None and isinstance(predictor, conditional):
+        return m5.objects.BranchPredictor(conditionalBranchPred=predictor)
+    return predictor
+
+
+def parse_bp_params(specs):
+    # ["name=value", ...] -> {name: value}; numbers become ints/floats
+    params = {}
+    for spec in specs or []:
+        name, sep, value = spec.partition("=")
+        if not sep or not name:
+            raise ValueError(f"Invalid predictor parameter {spec!r} (expected name=value)")
+        for convert in (int, float):
+            try:
+                value = convert(value)
+                break
+            except ValueError:
+                continue
+        params[name.strip()] = value
+    return params
+
+
+def interleave_low_bit(config, mem):
+    # Lowest channel-select address bit: whole DRAM rows with the RoRaBaChCo
+    # mapping, cache lines otherwise (as gem5's MemConfig)
+    try:
+        mapping = mem.addr_mapping.value
+    except AttributeError:
+        mapping = None
+    if mapping == "RoRaBaChCo":
+        return int(math.log2(mem.device_rowbuffer_size.value * mem.devices_per_rank.value))
+    return int(math.log2(config.cacheline_size))
+
+
+def make_memory(config, system):
+    # One memory (SimpleMemory or MemCtrl + DRAM interface) per channel
+    from m5.objects import AddrRange, MemCtrl, SimpleMemory
+    channels = config.mem_channels
+    if channels < 1 or channels & (channels - 1):
+        raise ValueError(f"mem_channels must be a power of two, got {channels}")
+    whole = system.mem_ranges[0]
+    bits = int(math.log2(channels))
+    mems = []
+    for channel in range(channels):
+        if config.mem_type == "SimpleMemory":
+            mem = intf = SimpleMemory()
+        else:
+            mem = MemCtrl()
+            mem.dram = intf = sim_object_class(config.mem_type)()
+        if channels == 1:
+            intf.range = whole
+        else:
+            low = interleave_low_bit(config, intf)
+            intf.range = AddrRange(whole.start, size=whole.size(), intlvHighBit=low + bits - 1,
+                                   xorHighBit=MEM_XOR_LOW_BIT + bits - 1, intlvBits=bits,
+                                   intlvMatch=channel)
+        mems.append(mem)
+    return mems
+
+
+def make_process(cmd, env=None):
+    # env: ["NAME=value", ...] for the guest, e.g. OMP_NUM_THREADS
+    from m5.objects import Process
+    process = Process()
+    process.cmd = list(cmd)
+    if env:
+        process.env = list(env)
+    return process
+
+
+def import_common():
+    # gem5's configs/common package (CacheConfig, MemConfig, ...)
+    from m5.util import addToPath
+    addToPath(os.path.realpath(GEM5_CONFIGS))
+    import common
+    return common
+
+
+class _SystemView:
+    # The system as CacheConfig sees it, with system.cpu replaced by `cpu`
+    def __init__(self, system, cpu):
+        object.__setattr__(self, "_system", system)
+        object.__setattr__(self, "cpu", cpu)
+
+    def __getattr__(self, name):
+        return getattr(self._system, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._system, name, value)
+
+
+def config_caches(config, system, cpu=None):
+    # CacheConfig.config_cache also creates the interrupt controllers and wires the CPU ports;
+    # with several cores each gets private L1s and the L2 is shared over a coherent L2XBar.
+    # cpu: the CPU (or vector of CPUs) the caches attach to (default system.cpu)
+    import_common()
+    from common import CacheConfig
+    from m5.objects import SrcClockDomain
+
+    if config.l2cache:
+        system.cpu_clk_domain = SrcClockDomain(
+            clock=config.clock, voltage_domain=system.clk_domain.voltage_domain)
+    options = argparse.Namespace(
+        cpu_type=config.cpu_type, num_cpus=config.num_cpus, external_memory_system=None,
+        memchecker=False, elastic_trace_en=False,
+        **{name: getattr(config, name) for name in CACHE_FIELDS})
+    for name in ("l1i_hwp_type", "l1d_hwp_type", "l2_hwp_type"):
+        setattr(options, name, prefetcher_type(getattr(options, name)))
+    cpu = cpu if cpu is not None else system.cpu
+    CacheConfig.config_cache(options, _SystemView(system, cpu))
+
+    l1s = [l1 for c in cpu_list(cpu) for l1 in (c.icache, c.dcache)] if config.caches else []
+    l2s = [system.l2] if config.l2cache else []
+    for caches, mshrs, latency in ((l1s, config.l1_mshrs, config.l1_hit_latency),
+                                   (l2s, config.l2_mshrs, config.l2_hit_latency)):
+        for cache in caches:
+            if mshrs is not None:
+                cache.mshrs = mshrs
+            if latency is not None:
+                cache.tag_latency = latency
+                cache.data_latency = latency
+                cache.response_latency = latency
+
+
+def setup_kvm_se(system, process, mem_size):
+    # KVM-in-SE plumbing, as in se.py
+    from m5.objects import Addr, KvmVM
+    system.kvm_vm = KvmVM()
+    system.m5ops_base = max(0xFFFF0000, Addr(mem_size).getValue())
+    process.useArchPT = True
+    process.kvmInSE = True
+
+
+def base_key(config):
+    # Configs with equal keys can share one build_base() result
+    return (config.clock, config.mem_size, config.mem_type, config.mem_channels)
+
+
+def build_base(config):
+    # The CPU-independent part: clock, bus, memory and system port
+    from m5.objects import AddrRange, SrcClockDomain, System, SystemXBar, VoltageDomain
+
+    system = System()
+    system.clk_domain = SrcClockDomain(clock=config.clock, voltage_domain=VoltageDomain())
+    system.mem_ranges = [AddrRange(config.mem_size)]
+    system.membus = SystemXBar()
+
+    mems = make_memory(config, system)
+    system.mem_ctrl = mems if len(mems) > 1 else mems[0]
+    for mem in mems:
+        connect_memctrl(mem, system.membus)
+    connect_system_port(system, system.membus)
+    return system
+
+
+def build_system(config, cmd, base=None, env=None):
+    # cmd: benchmark command line, e.g. ["vector"] or ["hello", "arg"]
+    # base: an unused build_base() result with the same base_key(), if any
+    # env: guest environment, e.g. ["OMP_NUM_THREADS=4"]
+    from m5.objects import SEWorkload
+
+    system = base if base is not None else build_base(config)
+    active_type = config.ff_cpu_type or config.cpu_type
+    system.mem_mode = mem_mode_for(active_type)
+
+    def vector(cpus):
+        return cpus if config.num_cpus > 1 else cpus[0]
+
+    cpus = [make_cpu(config, i) for i in range(config.num_cpus)]
+    system.cpu = vector(cpus)
+    if config.ff_cpu_type:
+        # the fast-forward CPUs own the ports and interrupts until the switch
+        for cpu in cpus:
+            cpu.switched_out = True
+        active = [sim_object_class(config.ff_cpu_type)(cpu_id=i) for i in range(config.num_cpus)]
+        system.ff_cpu = vector(active)
+    else:
+        active = cpus
+    use_caches = config.caches or config.l2cache
+    if not use_caches:
+        for cpu in active:
+            connect_cpu_bus_ports(cpu, system.membus)
+
+    process = make_process(cmd, env)
+    system.workload = SEWorkload.init_compatible(process.cmd[0])
+    if is_kvm_cpu(active_type):
+        setup_kvm_se(system, process, config.mem_size)
+    for cpu in cpus + (active if active is not cpus else []):
+        cpu.workload = process
+        cpu.createThreads()
+
+    if use_caches:
+        config_caches(config, system, system.ff_cpu if config.ff_cpu_type else system.cpu)
+    else:
+        for cpu in active:
+            cpu.createInterruptController()
+            connect_interrupts(cpu, system.membus)
+    if config.sim_quantum:
+        assign_event_queues(system)
+    return system
+
+
+def assign_event_queues(system):
+    # Core i, its fast-forward twin and their children (L1s, TLBs, predictor,
+    # interrupts) run on event queue i + 1; buses, L2 and memory stay on 0.
+    # Call after the caches exist, children inherit nothing afterwards.
+    cores = [cpu_list(system.cpu)]
+    if hasattr(system, "ff_cpu"):
+        cores.append(cpu_list(system.ff_cpu))
+    for cpus in cores:
+        for i, cpu in enumerate(cpus):
+            for obj in cpu.descendants():
+                obj.eventq_index = i + 1
+
+
+def make_root(config, system):
+    from m5.objects import Root
+    root = Root(full_system=False, system=system)
+    if config.sim_quantum:
+        root.sim_quantum = config.sim_quantum
+    return root
+
+
+def fast_forward(system, insts, simulate=None):
+    # Run system.ff_cpu for `insts` instructions after m5.instantiate(), then
+    # switchCpus() to system.cpu (memory mode included) and reset the stats.
+    # False if the program exits first. With several cores, insts counts the
+    # first core's (the main thread's) instructions.
+    import m5
+    cpu_list(system.ff_cpu)[0].scheduleInstStop(0, insts, FAST_FORWARD_CAUSE)
+    while True:
+        cause = (simulate or m5.simulate)().getCause()
+        # work items (exit_on_work_items) only matter in the detailed part
+        if cause not in ("workbegin", "workend"):
+            break
+    print("Fast-forward stopped @ tick", m5.curTick(), "because", cause)
+    if cause != FAST_FORWARD_CAUSE:
+        return False
+    m5.switchCpus(system, list(zip(cpu_list(system.ff_cpu), cpu_list(system.cpu))))
+    m5.stats.reset()
+    print(f"Switched to {type(cpu_list(system.cpu)[0]).__name__} after {insts} instructions")
+    return True
+
+
+def build_root(config, cmd):
+    return make_root(config, build_system(config, cmd))
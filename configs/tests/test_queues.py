@@ -0,0 +1,221 @@
+"""
+Tests of job_queue.py and shared_queue.py, with a fake gem5 shell script
+standing in for the simulator and a local directory for the shared
+filesystem.
+"""
+
+import os
+import subprocess
+import threading
+import time
+
+import pytest
+
+import job_queue
+import shared_queue
+
+FAKE_GEM5 = """#!/bin/sh
+for a; do
+  case $a in
+    --outdir=*) out=${a#--outdir=} ;;
+    --mode=*) mode=${a#--mode=} ;;
+  esac
+done
+mkdir -p "$out"
+case $mode in
+  slow)
+    case $out in *.spec) ;; *) sleep 30 ;; esac ;;
+  crash-once)
+    if [ ! -e "$out/crashed" ]; then
+      touch "$out/crashed"; echo "segfault in pid $$" > "$out/simerr"; exit 139
+    fi ;;
+  fail)
+    echo "panic: bad config" > "$out/simerr"; exit 1 ;;
+esac
+echo "Exited @ tick 1 because exiting with last active thread context" > "$out/simout"
+"""
+
+
+@pytest.fixture
+def gem5(tmp_path):
+    path = tmp_path / "gem5.opt"
+    path.write_text(FAKE_GEM5)
+    path.chmod(0o755)
+    return str(path)
+
+
+def make_job(gem5, outroot, name, mode="ok"):
+    outdir = str(outroot / name)
+    return {"name": name, "point": {"bench": name}, "command": [gem5, f"--outdir={outdir}", f"--mode={mode}"],
+            "outdir": outdir, "config_hash": f"hash-{name}-{mode}", "config": None, "cache_dir": None}
+
+
+def dead_pid():
+    proc = subprocess.Popen(["true"])
+    proc.wait()
+    return proc.pid
+
+
+# ----------------------------------------------------------------
+# job_queue.py
+# ----------------------------------------------------------------
+@pytest.fixture
+def queue(tmp_path):
+    return job_queue.JobQueue(str(tmp_path / "jobs.db"))
+
+
+def states(queue):
+    return {row["name"]: (row["state"], row["attempts"]) for row in queue.jobs()}
+
+
+def test_claim_is_atomic(queue, gem5, tmp_path):
+    queue.submit([make_job(gem5, tmp_path, "a"), make_job(gem5, tmp_path, "b")])
+    first, second = queue.claim("w1"), queue.claim("w2")
+    assert {first["name"], second["name"]} == {"a", "b"}
+    assert queue.claim("w3") is None
+    assert queue.counts()["running"] == 2
+
+
+def test_work_retries_and_quarantines(queue, gem5, tmp_path):
+    queue.submit([make_job(gem5, tmp_path, "ok"), make_job(gem5, tmp_path, "flaky", "crash-once"),
+                  make_job(gem5, tmp_path, "broken", "fail")])
+    job_queue.work(queue, 2, max_attempts=4, backoff=0.0, report=lambda line: None)
+    assert states(queue) == {"ok": ("done", 1), "flaky": ("done", 2), "broken": ("quarantined", 2)}
+    broken = next(row for row in queue.jobs() if row["name"] == "broken")
+    assert broken["failure"] == "rc=1 cause=None err=panic: bad config"
+    assert broken["peak_rss_kb"] > 0
+
+
+def test_resume_runs_only_unfinished_jobs(queue, gem5, tmp_path):
+    jobs = [make_job(gem5, tmp_path, "done"), make_job(gem5, tmp_path, "interrupted")]
+    queue.submit(jobs)
+    job_queue.work(queue, 1, report=lambda line: None)
+    # A worker that died mid-run, as after a reboot
+    queue.requeue(["interrupted"], states=("done",))
+    row = queue.claim("lost-worker")
+    assert row["name"] == "interrupted"
+    with queue.connect() as db:
+        db.execute("UPDATE jobs SET worker_pid = ? WHERE name = 'interrupted'", (dead_pid(),))
+
+    assert queue.submit(jobs) == (0, 0)
+    ran = []
+    job_queue.work(queue, 1, report=ran.append)
+    assert [line.split(":")[0] for line in ran] == ["interrupted"]
+    assert states(queue) == {"done": ("done", 1), "interrupted": ("done", 1)}
+
+
+def test_heartbeat_reports_lost_job(queue, gem5, tmp_path):
+    queue.submit([make_job(gem5, tmp_path, "a")])
+    row = queue.claim("w1")
+    assert queue.heartbeat(row["id"], "w1") is False
+    with queue.connect() as db:
+        db.execute("UPDATE jobs SET worker = 'w2'")
+    assert queue.heartbeat(row["id"], "w1") is True
+
+
+def test_config_change_disowns_running_copy(queue, gem5, tmp_path):
+    queue.submit([make_job(gem5, tmp_path, "a")])
+    row = queue.claim("w1")
+    assert queue.submit([make_job(gem5, tmp_path, "a", "crash-once")]) == (0, 1)
+    assert queue.heartbeat(row["id"], "w1") is True
+    # The old copy's outcome is dropped; the job waits for a run of the new config
+    queue.finish(row, "w1", 0, 1.0, 1024, max_attempts=4, backoff=0.0)
+    assert states(queue) == {"a": ("pending", 0)}
+
+
+# ----------------------------------------------------------------
+# shared_queue.py
+# ----------------------------------------------------------------
+@pytest.fixture
+def shared(tmp_path):
+    return shared_queue.SharedQueue(str(tmp_path / "queue"))
+
+
+def worker(shared, name, **options):
+    options.setdefault("backoff", 0.0)
+    options.setdefault("heartbeat", 0.1)
+    return shared_queue.Worker(shared, f"{name}-1-0", report=lambda line: None, **options)
+
+
+def test_lease_is_exclusive(shared, gem5, tmp_path):
+    shared.submit([make_job(gem5, tmp_path, "a")])
+    a, b = worker(shared, "node-a"), worker(shared, "node-b")
+    assert a.claim("a", a.now())
+    assert b.claim("a", b.now()) is None
+
+
+def test_stale_lease_is_stolen(shared, gem5, tmp_path):
+    shared.submit([make_job(gem5, tmp_path, "a")])
+    dead, live = worker(shared, "node-a"), worker(shared, "node-b", lease_timeout=5.0)
+    lease = dead.claim("a", dead.now())
+    assert live.claim("a", live.now()) is None
+    old = time.time() - 60
+    os.utime(lease, (old, old))
+    assert live.claim("a", live.now()) == lease
+    assert shared_queue.read_json(lease)["worker"] == live.id
+
+
+def test_displaced_owner_stops(shared, gem5, tmp_path):
+    shared.submit([make_job(gem5, tmp_path, "slow", "slow")])
+    slow, thief = worker(shared, "node-a"), worker(shared, "node-b", lease_timeout=5.0)
+    lease = slow.claim("slow", slow.now())
+    start = time.time()
+    thread = threading.Thread(target=slow.run, args=("slow", lease, False))
+    thread.start()
+    # The owner stalled long enough to look dead, then resumed
+    old = time.time() - 60
+    os.utime(lease, (old, old))
+    assert thief.claim("slow", thief.now()) == lease
+    thread.join(10)
+    assert not thread.is_alive() and time.time() - start < 10
+    # The displaced copy neither released the thief's lease nor recorded a failure
+    assert shared_queue.read_json(lease)["worker"] == thief.id
+    assert not os.path.exists(shared.path("failures", "slow"))
+
+
+def test_nodes_finish_every_job_once(shared, gem5, tmp_path):
+    names = [f"p{i}" for i in range(8)]
+    shared.submit([make_job(gem5, tmp_path, n) for n in names])
+    threads = [threading.Thread(target=shared_queue.work,
+                                args=(shared, f"node{i}", 2), kwargs={"heartbeat": 0.1})
+               for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    records = shared.records()
+    assert [r["state"] for r in records] == ["done"] * len(names)
+    assert all(r["attempts"] == 1 and not r["speculative"] for r in records)
+    assert os.listdir(os.path.join(shared.root, "leases")) == []
+
+
+def test_retry_and_quarantine(shared, gem5, tmp_path):
+    shared.submit([make_job(gem5, tmp_path, "flaky", "crash-once"), make_job(gem5, tmp_path, "broken", "fail")])
+    worker(shared, "node-a").loop(poll=0.05)
+    by_name = {os.path.basename(r["outdir"]): r for r in shared.records()}
+    assert (by_name["flaky"]["state"], by_name["flaky"]["attempts"]) == ("done", 2)
+    assert (by_name["broken"]["state"], by_name["broken"]["attempts"]) == ("quarantined", 2)
+    assert by_name["broken"]["failure"] == "rc=1 cause=None err=panic: bad config"
+
+
+def test_straggler_is_speculated(shared, gem5, tmp_path):
+    shared.submit([make_job(gem5, tmp_path, "fast1"), make_job(gem5, tmp_path, "fast2"),
+                   make_job(gem5, tmp_path, "slow", "slow")])
+    primary, idle = worker(shared, "node-a"), worker(shared, "node-b", speculate_factor=2.0)
+    for name in ("fast1", "fast2"):
+        idle.run(name, idle.claim(name, idle.now()), False)
+    lease = primary.claim("slow", primary.now())
+    start = time.time()
+    thread = threading.Thread(target=primary.run, args=("slow", lease, False))
+    thread.start()
+    time.sleep(0.3)
+
+    name, spec_lease, speculative = idle.next_job()
+    assert (name, speculative) == ("slow", True)
+    idle.run(name, spec_lease, speculative)
+    thread.join(10)
+    # The primary copy was killed once the speculative one published the result
+    assert not thread.is_alive() and time.time() - start < 10
+    record = shared_queue.read_json(shared.path("done", "slow"))
+    assert record["speculative"] and record["outdir"].endswith(".spec")
+    assert idle.next_job() is None
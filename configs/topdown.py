@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+topdown.py
+
+Top-down CPI stack for DerivO3CPU runs, from the O3 stage stats gem5
+already collects. Issue slots are width x cycles and every slot is
+attributed to one of
+
+  retiring        committed ops
+  bad_spec        ops renamed but squashed, plus rename squash cycles
+  frontend        rename idle: decode delivered nothing (fetch/icache/BTB)
+  backend_mem     rename blocked by LQ/SQ full, and by ROB full in
+                  proportion to the time an L1D demand miss is outstanding
+  backend_core    the rest of the backend stalls (IQ, registers, ROB)
+
+Backend stalls are further split by the resource that blocked rename
+(rob, iq, lq, sq, regs, from the rename *FullEvents counters); the largest
+share is the structure to grow. The fractions multiplied by CPI give the
+CPI stack (cpi_retiring, ...). This is a cycle-level approximation of the
+slot-level method: gem5 has no per-slot delivery counters.
+
+Run with the host python:
+  python3 experiments/configs/topdown.py run out/ss8            # whole run
+  python3 experiments/configs/topdown.py intervals out/ss8/intervals.npz
+  python3 experiments/configs/topdown.py sweep out/width_sweep   # every run of a sweep
+The width is read from the run's config.ini (--width overrides it).
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from gem5stats import get_stat, iter_dumps
+
+CYCLE_STATS = ("system.cpu.numCycles",)
+INST_STATS = ("system.cpu.commitStats0.numInsts", "system.cpu.committedInsts", "simInsts")
+OP_STATS = ("system.cpu.commitStats0.numOps", "system.cpu.commit.committedOps",
+            "system.cpu.committedOps", "simOps")
+RENAMED_STATS = ("system.cpu.rename.renamedInsts",)
+SQUASH_STATS = ("system.cpu.rename.squashCycles",)
+IDLE_STATS = ("system.cpu.rename.idleCycles",)
+MISS_LATENCY_STATS = ("system.cpu.dcache.demandMshrMissLatency::total",
+                      "system.ff_cpu.dcache.demandMshrMissLatency::total")
+TICK_STATS = ("simTicks",)
+# Rename blocked because this structure was full (counted per blocked cycle)
+RESOURCE_STATS = {
+    "rob": ("system.cpu.rename.ROBFullEvents",),
+    "iq": ("system.cpu.rename.IQFullEvents",),
+    "lq": ("system.cpu.rename.LQFullEvents",),
+    "sq": ("system.cpu.rename.SQFullEvents",),
+    "regs": ("system.cpu.rename.fullRegistersEvents",),
+}
+MEMORY_RESOURCES = ("lq", "sq")
+
+# Everything topdown() reads, e.g. for the interval recorder's selection
+TOPDOWN_STATS = tuple(dict.fromkeys(
+    CYCLE_STATS + INST_STATS + OP_STATS + RENAMED_STATS + SQUASH_STATS + IDLE_STATS
+    + MISS_LATENCY_STATS + TICK_STATS + sum(RESOURCE_STATS.values(), ())))
+
+CATEGORIES = ("retiring", "bad_spec", "frontend", "backend_mem", "backend_core")
+RESOURCES = tuple(RESOURCE_STATS)
+
+
+def topdown(get, width):
+    # get(*names): the first stat present, a number or an array (NaN if missing);
+    # width: commit width, a number or an array. Returns {name: value or array}.
+    width = np.asarray(width, dtype=float)
+    cycles = np.asarray(get(*CYCLE_STATS), dtype=float)
+    insts = np.asarray(get(*INST_STATS), dtype=float)
+    ops = np.asarray(get(*OP_STATS), dtype=float)
+    ops = np.where(np.isnan(ops), insts, ops)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slots = width * cycles
+        retiring = ops / slots
+        wasted = np.maximum(np.asarray(get(*RENAMED_STATS), dtype=float) - ops, 0)
+        bad_spec = (wasted + width * np.asarray(get(*SQUASH_STATS), dtype=float)) / slots
+        frontend = width * np.asarray(get(*IDLE_STATS), dtype=float) / slots
+        # overlapping approximations may exceed the slots; scale them back
+        total = retiring + bad_spec + frontend
+        scale = np.where(total > 1, 1 / total, 1.0)
+        retiring, bad_spec, frontend = retiring * scale, bad_spec * scale, frontend * scale
+        backend = 1 - retiring - bad_spec - frontend
+
+        stalls = {r: np.nan_to_num(np.asarray(get(*names), dtype=float))
+                  for r, names in RESOURCE_STATS.items()}
+        stall_total = sum(stalls.values())
+        shares = {r: np.where(stall_total > 0, s / stall_total, np.nan) for r, s in stalls.items()}
+        ticks = np.asarray(get(*TICK_STATS), dtype=float)
+        miss_time = np.minimum(1, np.nan_to_num(get(*MISS_LATENCY_STATS)) / ticks)
+        # LQ/SQ full is memory-bound; ROB full as often as a miss is outstanding
+        mem_share = (sum(np.nan_to_num(shares[r]) for r in MEMORY_RESOURCES)
+                     + np.nan_to_num(shares["rob"]) * miss_time)
+        mem_share = np.where(stall_total > 0, mem_share, np.nan_to_num(miss_time))
+        result = {
+            "cpi": cycles / insts,
+            "retiring": retiring,
+            "bad_spec": bad_spec,
+            "frontend": frontend,
+            "backend_mem": backend * mem_share,
+            "backend_core": backend * (1 - mem_share),
+        }
+    for category in CATEGORIES:
+        result["cpi_" + category] = result["cpi"] * result[category]
+    for resource in RESOURCES:
+        result["stall_" + resource] = shares[resource]
+    stacked = np.stack([np.nan_to_num(shares[r], nan=-1) for r in RESOURCES])
+    result["grow"] = np.where(stall_total > 0, np.array(RESOURCES)[np.argmax(stacked, axis=0)], "-")
+    if result["grow"].ndim == 0:
+        return {k: (str(v) if k == "grow" else float(v)) for k, v in result.items()}
+    return result
+
+
+def coalesce(columns, n):
+    # First non-NaN value per row across columns (stat names differ between runs)
+    out = np.full(n, np.nan)
+    for column in columns:
+        out = np.where(np.isnan(out), column, out)
+    return out
+
+
+def config_width(outdir, cpu="system.cpu"):
+    # commitWidth of the detailed CPU from a run's config.ini, or None
+    section = f"[{cpu}]"
+    current = None
+    try:
+        with open(os.path.join(outdir, "config.ini")) as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    current = line
+                elif current == section and line.startswith("commitWidth="):
+                    return int(line.split("=", 1)[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+COLUMNS = ("cpi",) + CATEGORIES + tuple("stall_" + r for r in RESOURCES) + ("grow",)
+
+
+def fmt(value):
+    if isinstance(value, str):
+        return value
+    return "-" if np.isnan(value) else f"{value:.3f}"
+
+
+def print_table(labels, label_header, rows):
+    print("\t".join([label_header] + list(COLUMNS)))
+    for label, row in zip(labels, rows):
+        print("\t".join([str(label)] + [fmt(row[c]) for c in COLUMNS]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Top-down CPI stack of O3 runs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Whole run (last stats dump)")
+    run.add_argument("path", help="Run output directory or stats.txt")
+    run.add_argument("--all-dumps", action="store_true", help="One row per stats dump")
+    ivl = sub.add_parser("intervals", help="Every interval of an intervals.py store")
+    ivl.add_argument("path", help="Interval .npz")
+    swp = sub.add_parser("sweep", help="Every run of a sweep")
+    swp.add_argument("path", help="Sweep directory (with sweep.json) or stats store")
+    swp.add_argument("--cache-dir", type=str, default=None, help="Result cache for cached points")
+    for cmd in (run, ivl):
+        cmd.add_argument("--width", type=int, default=None, help="Commit width (default: from config.ini)")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        stats_file = os.path.join(args.path, "stats.txt") if os.path.isdir(args.path) else args.path
+        width = args.width or config_width(os.path.dirname(os.path.abspath(stats_file)))
+        if width is None:
+            sys.exit("No config.ini next to the stats; give --width")
+        dumps = list(iter_dumps(stats_file, TOPDOWN_STATS))
+        if not dumps:
+            sys.exit(f"No stats in {stats_file}")
+        dumps = dumps if args.all_dumps else dumps[-1:]
+        rows = [topdown(lambda *names, s=s: get_stat(s, *names), width) for s in dumps]
+        print_table(range(len(rows)) if args.all_dumps else ["run"], "dump", rows)
+        return
+
+    if args.command == "intervals":
+        from stats_store import StatsStore
+        store = StatsStore(args.path)
+        width = args.width or store.meta.get("run", {}).get("width")
+        if width is None:
+            width = config_width(os.path.dirname(os.path.abspath(args.path)))
+        if width is None:
+            sys.exit("Width unknown; give --width")
+        columns = store.columns([n for n in TOPDOWN_STATS if n in store.names])
+        result = topdown(lambda *names: coalesce([columns[n] for n in names if n in columns],
+                                                 len(store.points)), width)
+        rows = [{c: result[c][i] for c in COLUMNS} for i in range(len(store.points))]
+        print_table(store.dump_index, "interval", rows)
+        return
+
+    import analysis
+    runs = analysis.load(args.path, cache_dir=args.cache_dir)
+    result = topdown(runs.stat, runs.numeric("width"))
+    rows = [{c: result[c][i] for c in COLUMNS} for i in range(len(runs))]
+    print_table(runs.points, "point", rows)
+
+
+if __name__ == "__main__":
+    main()